@@ -32,7 +32,13 @@ from app.db import db
 # 延迟导入路由模块，避免循环依赖
 # 在create_app函数内部导入路由模块
 
-def create_app():
+def create_app(test_config=None):
+    """创建应用
+
+    Args:
+        test_config (dict, optional): 覆盖配置类中的配置项（如测试时的TESTING、数据库地址），
+            在初始化各扩展之前生效. Defaults to None.
+    """
     # 延迟导入配置，避免循环依赖
     from config import Config
     
@@ -47,6 +53,8 @@ def create_app():
     
     # 从配置对象加载配置（会自动根据环境选择development或production配置）
     app.config.from_object(Config)
+    if test_config:
+        app.config.update(test_config)
     # 初始化邮件服务
     mail.init_app(app)
     # 初始化CORS
@@ -57,12 +65,17 @@ def create_app():
     #, origins="*", methods=["GET", "POST"], allow_headers=["Content-Type", "Authorization"]
     # 导入工具函数
     from app.utils import generate_request_id
+    from app.utils.metrics import start_request_metrics, finish_request_metrics
+    metrics_enabled = app.config.get('METRICS_ENABLED', True)
 
     # 添加请求拦截器，生成requestId
     @app.before_request
     def before_request():
         # 生成requestId并存储在g对象中
         g.request_id = generate_request_id()
+        # 记录请求开始时间，开始统计SQL语句数和耗时
+        if metrics_enabled:
+            start_request_metrics()
         # 可以从请求头中获取（如果前端传递）
         # g.request_id = request.headers.get('X-Request-Id', generate_request_id())
 
@@ -71,11 +84,25 @@ def create_app():
     def after_request(response):
         # 将requestId添加到响应头
         response.headers['X-Request-Id'] = g.request_id
+        # 记录请求耗时、SQL统计和响应大小，并添加Server-Timing响应头
+        if metrics_enabled:
+            response = finish_request_metrics(response)
         return response
 
+    # 初始化JSON序列化器（优先使用orjson）
+    from app.utils.json_provider import init_json_provider
+    init_json_provider(app)
+
     # 初始化数据库和迁移工具
+    # 配置了只读从库时，先将从库注册为bind
+    from app.utils.db_router import init_db_router
+    init_db_router(app, db)
     db.init_app(app)
     migrate = Migrate(app, db)  # 绑定应用和数据库到Migrate
+
+    # 在 /metrics 接口中输出连接池使用情况和取连接等待时间
+    from app.utils.db_pool import init_pool_metrics
+    init_pool_metrics(app, db)
     
     # 在应用上下文中导入模型，确保迁移工具能识别
     with app.app_context():
@@ -97,6 +124,38 @@ def create_app():
     # 配置日志系统
     from app.utils.logger import setup_logger
     setup_logger(app)
+
+    # 根据配置初始化用户昵称缓存
+    from app.utils.user_utils import init_nickname_cache
+    init_nickname_cache(app)
+
+    # 根据配置初始化用户权限缓存
+    from app.services.permission_service import init_permission_cache
+    init_permission_cache(app)
+
+    # 登记scope=own权限检查使用的资源归属解析方式
+    from app.services.ownership_service import init_ownership_resolvers
+    init_ownership_resolvers(app)
+
+    # 根据配置初始化JWT黑名单存储（Redis + 布隆过滤器）
+    from app.utils.token_blocklist import init_token_blocklist
+    init_token_blocklist(app)
+
+    # 根据配置启用SQL慢查询日志和N+1检测
+    from app.utils.query_profiler import init_query_profiler
+    init_query_profiler(app)
+
+    # 注册响应压缩（在请求指标之前执行，响应大小统计的是压缩后的大小）
+    from app.utils.compression import init_compression
+    init_compression(app)
+
+    # 启动报告计数定时校准任务：处理第一个请求时才启动，flask命令、数据库迁移和脚本创建应用时不启动；测试环境不启动
+    if not app.testing:
+        from app.services.report.report_counter import ReportCounterService
+
+        @app.before_first_request
+        def _start_report_counter_reconcile():
+            ReportCounterService.start_reconcile_job(app)
     
     # ------------------------------
     # JWT相关配置和处理
@@ -11,6 +11,18 @@ def init_commands(app):
         register_init_permissions(app)
     except ImportError as e:
         logger.error(f"导入并注册初始化权限命令失败: {e}")
+
+    try:
+        from .reconcile_report_counters import register_command as register_reconcile_report_counters
+        register_reconcile_report_counters(app)
+    except ImportError as e:
+        logger.error(f"导入并注册报告计数校准命令失败: {e}")
+
+    try:
+        from .purge_token_blocklist import register_command as register_purge_token_blocklist
+        register_purge_token_blocklist(app)
+    except ImportError as e:
+        logger.error(f"导入并注册JWT黑名单清理命令失败: {e}")
     
     # 可以在这里添加其他命令的导入和注册
     # try:
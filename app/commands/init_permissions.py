@@ -4,6 +4,7 @@ from app.db import db
 from app.models.user.role import Role
 from app.models.user.permission import Permission
 from app.models.user.user import User
+from app.services.permission_service import PermissionService
 from datetime import datetime, timezone
 
 @click.command('init-permissions')
@@ -205,6 +206,9 @@ def init_permissions():
             db.session.add(admin_user)
             db.session.commit()
 
+        # 角色和权限已重建，使编译后的用户权限缓存失效
+        PermissionService.invalidate_permission_cache()
+
         click.echo('角色和权限初始化完成！')
         click.echo(f'创建了 {len(permissions)} 个权限')
         click.echo(f'创建了 {5} 个角色')
@@ -0,0 +1,16 @@
+import click
+from flask import current_app
+from app.utils.token_blocklist import TokenBlocklistStore
+
+@click.command('purge-token-blocklist')
+@click.option('--batch-size', type=int, default=None, help='每批删除的行数，默认使用JWT_BLOCKLIST_PURGE_BATCH_SIZE')
+def purge_token_blocklist(batch_size):
+    """分批删除令牌已过期的JWT黑名单记录"""
+    with current_app.app_context():
+        click.echo('开始清理过期的JWT黑名单记录...')
+        deleted = TokenBlocklistStore.purge_expired(batch_size)
+        click.echo(f'已删除 {deleted} 条过期记录')
+
+def register_command(app):
+    """将命令注册到应用对象"""
+    app.cli.add_command(purge_token_blocklist)
@@ -0,0 +1,23 @@
+import click
+from flask import current_app
+from app.services.report.report_counter import ReportCounterService
+
+@click.command('reconcile-report-counters')
+def reconcile_report_counters():
+    """按数据库实际数据校准报告计数"""
+    with current_app.app_context():
+        click.echo('开始校准报告计数...')
+        drift = ReportCounterService.reconcile()
+        if drift:
+            click.echo(f'发现 {len(drift)} 项偏差，已修正:')
+            for key, (old_value, new_value) in sorted(drift.items()):
+                click.echo(f'  {key}: {old_value} -> {new_value}')
+        else:
+            click.echo('计数与数据库一致')
+
+        summary = ReportCounterService.get_summary()
+        click.echo(f"报告总数: {summary['total']}，有效报告数: {summary['active']}")
+
+def register_command(app):
+    """将命令注册到应用对象"""
+    app.cli.add_command(reconcile_report_counters)
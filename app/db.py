@@ -1,3 +1,52 @@
 # app/db.py
-from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()  # 创建 SQLAlchemy 实例
\ No newline at end of file
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm
+from sqlalchemy.dialects import mysql
+from app.utils.db_pool import TimedQueuePool
+from app.utils.db_router import ReplicaRouter, get_replica_router
+
+# 只对QueuePool有效的引擎参数
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+class RoutingSession(SignallingSession):
+    """支持读写分离的会话，只读查询的路由规则见app/utils/db_router.py"""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        router = get_replica_router(self.app)
+        if router is not None and not _has_bind_key(mapper) and ReplicaRouter.should_use_replica(self, clause):
+            return router.choose()
+        return super().get_bind(mapper, clause)
+
+
+def _has_bind_key(mapper):
+    """模型是否通过__bind_key__指定了数据库"""
+    if mapper is None:
+        return False
+    return mapper.persist_selectable.info.get('bind_key') is not None
+
+
+class PooledSQLAlchemy(SQLAlchemy):
+    """使用TimedQueuePool连接池和读写分离会话的SQLAlchemy
+
+    SQLite（测试、本地脚本）使用StaticPool/NullPool，不接受连接池大小等参数，创建引擎前去掉这些参数。
+    """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def create_engine(self, sa_url, engine_opts):
+        engine_opts = dict(engine_opts)
+        if sa_url.drivername.startswith('sqlite'):
+            for key in QUEUE_POOL_OPTIONS:
+                engine_opts.pop(key, None)
+        else:
+            engine_opts.setdefault('poolclass', TimedQueuePool)
+        return super().create_engine(sa_url, engine_opts)
+
+
+db = PooledSQLAlchemy()  # 创建 SQLAlchemy 实例
+
+# 精确到微秒的时间类型（MySQL的DATETIME默认只精确到秒），用于作为ETag依据的updated_at，
+# 同一秒内的多次修改也会得到不同的ETag
+PreciseDateTime = db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
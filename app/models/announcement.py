@@ -1,4 +1,4 @@
-from app.db import db
+from app.db import db, PreciseDateTime
 from datetime import datetime, timezone
 from app.utils.user_utils import get_user_nickname
 
@@ -18,7 +18,7 @@ class Announcement(db.Model):
     start_date = db.Column(db.DateTime)  # 开始显示时间
     end_date = db.Column(db.DateTime)  # 结束显示时间
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # 创建时间
-    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))  # 更新时间，自动更新
+    updated_at = db.Column(PreciseDateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))  # 更新时间，自动更新
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))  # 创建人ID，外键关联users表
     created_by_nickname = db.Column(db.String(50))  # 创建人昵称或者账号
 
@@ -1,11 +1,25 @@
-from app.db import db
+from app.db import db, PreciseDateTime
 from datetime import datetime, timezone
-from app.utils.user_utils import get_user_nickname
+from sqlalchemy.orm import load_only
+from app.utils.user_utils import get_user_nickname, get_user_nicknames
 
 
 class InspectionReport(db.Model):
     """检测报告数据库模型"""
     __tablename__ = 'inspection_reports'
+    __table_args__ = (
+        # 报告列表的访问路径：按is_deleted过滤、按created_at倒序（总数统计也可走该索引）
+        db.Index('ix_inspection_reports_deleted_created', 'is_deleted', 'created_at'),
+        # 仅查看自己报告（scope='own'）时额外按registrant_id过滤
+        db.Index('ix_inspection_reports_deleted_registrant_created', 'is_deleted', 'registrant_id', 'created_at'),
+        # 报告检索使用的全文索引（MySQL FULLTEXT + ngram解析器，支持中文），见report_search模块
+        db.Index(
+            'ft_inspection_reports_search',
+            'report_code', 'project_name', 'client_unit', 'construction_unit', 'inspection_object',
+            mysql_prefix='FULLTEXT',
+            mysql_with_parser='ngram'
+        ),
+    )
 
     # 一、工程基本信息
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)  # 检测报告的唯一标识，自增主键
@@ -76,7 +90,7 @@ class InspectionReport(db.Model):
     # 九、通用管理字段
     is_deleted = db.Column(db.Boolean, default=False)  # 软删除标记
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # 报告记录创建的时间
-    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))  # 报告记录最后修改的时间
+    updated_at = db.Column(PreciseDateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))  # 报告记录最后修改的时间
 
     registrant_id = db.Column(db.Integer, db.ForeignKey('users.id'), comment='登记人ID')  # 登记人ID，外键关联users表
     registrant = db.Column(db.String(50), comment='登记人')  # 登记人昵称或者账号
@@ -86,14 +100,105 @@ class InspectionReport(db.Model):
     last_modified_by = db.Column(db.String(50), comment='最后修改人')  # 最后修改该报告的人员姓名
 
 
+    # 列表接口fields参数可用的预设字段组合，full表示全部字段
+    FIELD_PRESETS = {
+        'summary': (
+            'id', 'report_code', 'project_name', 'client_unit', 'inspection_object',
+            'inspection_conclusion', 'report_status', 'report_date', 'registrant', 'created_at'
+        ),
+        'full': None,
+    }
+    # 序列化时由其他列计算得到的字段: {字段: 实际需要加载的列}
+    COMPUTED_FIELDS = {
+        'registrant': 'registrant_id',
+        'last_modified_by': 'last_modified_by_id',
+    }
+
     def __repr__(self):
         return f'<InspectionReport {self.report_code} (ID: {self.id})>'
 
-    def to_dict(self):
+    @classmethod
+    def parse_fields(cls, value):
+        """解析列表接口的fields参数
+
+        Args:
+            value (str): 逗号分隔的字段名或预设名（如summary），为空时返回全部字段
+
+        Returns:
+            tuple or None: 按参数顺序排列的字段名，None表示全部字段
+
+        Raises:
+            ValueError: 包含未知的字段名
+        """
+        names = [name.strip() for name in (value or '').split(',') if name.strip()]
+        if not names:
+            return None
+        columns = cls.__table__.columns
+        fields = []
+        unknown = []
+        for name in names:
+            if name in cls.FIELD_PRESETS:
+                preset = cls.FIELD_PRESETS[name]
+                if preset is None:
+                    return None
+                candidates = preset
+            elif name in columns:
+                candidates = (name,)
+            else:
+                unknown.append(name)
+                continue
+            fields.extend(field for field in candidates if field not in fields)
+        if unknown:
+            raise ValueError(f"未知的字段: {', '.join(unknown)}")
+        return tuple(fields)
+
+    @classmethod
+    def load_only_option(cls, fields, extra=()):
+        """只加载指定字段所需列的查询选项（主键总会加载）
+
+        Args:
+            fields (iterable): parse_fields返回的字段名
+            extra (iterable, optional): 额外需要加载的列，如游标分页使用的created_at
+
+        Returns:
+            Load: 传给query.options()的选项
+        """
+        columns = {cls.COMPUTED_FIELDS.get(field, field) for field in fields}
+        columns.update(extra)
+        return load_only(*[getattr(cls, column) for column in sorted(columns)])
+
+    def _field_value(self, field, nicknames):
+        """to_dict中单个字段的值"""
+        if field in self.COMPUTED_FIELDS:
+            user_id = getattr(self, self.COMPUTED_FIELDS[field])
+            if not user_id:
+                return ''
+            return get_user_nickname(user_id) if nicknames is None else nicknames.get(user_id, '')
+        value = getattr(self, field)
+        if field in ('created_at', 'updated_at'):
+            return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+        return value
+
+    def to_dict(self, nicknames=None, fields=None):
         """将模型转换为字典格式
         返回的字典包含检测报告的所有关键信息，方便API返回或数据处理
+
+        Args:
+            nicknames (dict, optional): 预先解析好的{用户ID: 昵称}映射，
+                由to_dict_list批量传入；未传入时逐个查询用户昵称
+            fields (tuple, optional): 只输出这些字段（见parse_fields），
+                查询时应配合load_only_option只加载对应的列；默认输出全部字段
         """
-        
+        if fields is not None:
+            return {field: self._field_value(field, nicknames) for field in fields}
+
+        if nicknames is None:
+            registrant_name = get_user_nickname(self.registrant_id) if self.registrant_id else ''
+            last_modified_name = get_user_nickname(self.last_modified_by_id) if self.last_modified_by_id else ''
+        else:
+            registrant_name = nicknames.get(self.registrant_id, '') if self.registrant_id else ''
+            last_modified_name = nicknames.get(self.last_modified_by_id, '') if self.last_modified_by_id else ''
+
         return {
             'id': self.id,  # 报告ID
             'project_name': self.project_name,  # 项目名称
@@ -107,8 +212,8 @@ class InspectionReport(db.Model):
             'remarks': self.remarks,  # 备注信息
             'client_unit': self.client_unit,  # 委托单位
             'client_contact': self.client_contact,  # 委托单位联系人
-            'acceptance_date': datetime.combine(self.acceptance_date, datetime.min.time()).strftime('%Y-%m-%d') if self.acceptance_date else None,  # 受理日期
-            'commission_date': datetime.combine(self.commission_date, datetime.min.time()).strftime('%Y-%m-%d') if self.commission_date else None,  # 委托日期
+            'acceptance_date': self.acceptance_date,  # 受理日期
+            'commission_date': self.commission_date,  # 委托日期
             'commission_code': self.commission_code,  # 委托编号
             'salesperson': self.salesperson,  # 业务员
             'inspection_unit': self.inspection_unit,  # 检测单位
@@ -116,7 +221,7 @@ class InspectionReport(db.Model):
             'contact_address': self.contact_address,  # 联系地址
             'contact_phone': self.contact_phone,  # 联系电话
             'contact_phone': self.contact_phone,  # 联系电话
-            'registrant': get_user_nickname(self.registrant_id) if self.registrant_id else '',  # 登记人、创建人
+            'registrant': registrant_name,  # 登记人、创建人
             'registrant_id': self.registrant_id,  # 登记人ID
 
             'inspection_object': self.inspection_object,  # 检测对象
@@ -132,25 +237,25 @@ class InspectionReport(db.Model):
             'conclusion_description': self.conclusion_description,  # 结论描述
             'is_recheck': self.is_recheck,  # 是否为复检
             'sampling_method': self.sampling_method,  # 抽样方法
-            'sampling_date': datetime.combine(self.sampling_date, datetime.min.time()).strftime('%Y-%m-%d') if self.sampling_date else None,  # 抽样日期
+            'sampling_date': self.sampling_date,  # 抽样日期
             'sampler': self.sampler,  # 抽样人
-            'start_date': datetime.combine(self.start_date, datetime.min.time()).strftime('%Y-%m-%d') if self.start_date else None,  # 开始日期
-            'end_date': datetime.combine(self.end_date, datetime.min.time()).strftime('%Y-%m-%d') if self.end_date else None,  # 结束日期
+            'start_date': self.start_date,  # 开始日期
+            'end_date': self.end_date,  # 结束日期
             'inspection_code': self.inspection_code,  # 检测编号
             'inspector': self.inspector,  # 检测人
-            'tester_date': datetime.combine(self.tester_date, datetime.min.time()).strftime('%Y-%m-%d') if self.tester_date else None,  # 检测日期
+            'tester_date': self.tester_date,  # 检测日期
             'reviewer': self.reviewer,  # 审核人
-            'review_date': datetime.combine(self.review_date, datetime.min.time()).strftime('%Y-%m-%d') if self.review_date else None,  # 审核日期
+            'review_date': self.review_date,  # 审核日期
             'approver': self.approver,  # 批准人
-            'approve_date': datetime.combine(self.approve_date, datetime.min.time()).strftime('%Y-%m-%d') if self.approve_date else None,  # 批准日期
-            'report_date': datetime.combine(self.report_date, datetime.min.time()).strftime('%Y-%m-%d') if self.report_date else None,  # 报告日期
-            'issue_date': datetime.combine(self.issue_date, datetime.min.time()).strftime('%Y-%m-%d') if self.issue_date else None,  # 发放日期
+            'approve_date': self.approve_date,  # 批准日期
+            'report_date': self.report_date,  # 报告日期
+            'issue_date': self.issue_date,  # 发放日期
             'report_code': self.report_code,  # 报告编号
             'report_status': self.report_status,  # 报告状态
             'qrcode_content': self.qrcode_content,  # 二维码内容
             'attachment_paths': self.attachment_paths,  # 附件路径
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,  # 创建时间
-            'last_modified_by': get_user_nickname(self.last_modified_by_id) if self.last_modified_by_id else '',  # 最后修改人
+            'last_modified_by': last_modified_name,  # 最后修改人
             'last_modified_by_id': self.last_modified_by_id,  # 最后修改人ID
 
 
@@ -158,7 +263,34 @@ class InspectionReport(db.Model):
             'is_deleted': self.is_deleted  # 是否删除
         }
 
-    
+    @classmethod
+    def to_dict_list(cls, reports, fields=None):
+        """批量将报告转换为字典列表
+
+        先收集所有登记人和最后修改人ID，用一次IN查询解析昵称，
+        再逐行序列化，查询次数与列表长度无关
+
+        Args:
+            reports (iterable): InspectionReport对象集合
+            fields (tuple, optional): 只输出这些字段，默认输出全部字段
+
+        Returns:
+            list: 报告字典列表
+        """
+        reports = list(reports)
+        if fields is None:
+            id_columns = list(cls.COMPUTED_FIELDS.values())
+        else:
+            id_columns = [column for field, column in cls.COMPUTED_FIELDS.items() if field in fields]
+        user_ids = set()
+        for report in reports:
+            for column in id_columns:
+                user_id = getattr(report, column)
+                if user_id:
+                    user_ids.add(user_id)
+        nicknames = get_user_nicknames(user_ids)
+        return [report.to_dict(nicknames, fields) for report in reports]
+
     def to_dict_cn(self):
         """将模型转换为中文键的字典格式"""
         data = self.to_dict()
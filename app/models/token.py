@@ -6,4 +6,6 @@ class TokenBlocklist(db.Model):
     # 下次迁移  新建字段区分 access_token和refresh_token
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, index=True)
-    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
\ No newline at end of file
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    # 令牌过期时间（UTC），过期后的记录不再参与黑名单判断，并由清理任务删除
+    exp = db.Column(db.DateTime, nullable=True, index=True)
\ No newline at end of file
@@ -40,10 +40,13 @@ class Role(db.Model):
         Returns:
             set: 包含所有权限对象的集合
         """
-        permissions = set(self.permissions)  # 当前角色的权限
-        if self.parent:  # 如果有父角色
-            permissions.update(self.parent.get_all_permissions())  # 递归获取父角色的权限
-        return permissions
+        # 延迟导入，避免循环依赖
+        from app.models.user.permission import Permission
+        from app.services.permission_service import RoleHierarchy
+        role_ids = RoleHierarchy.ancestors(self.id) or (self.id,)  # 角色自身及所有父角色
+        return set(Permission.query.join(
+            role_permissions, role_permissions.c.permission_id == Permission.id
+        ).filter(role_permissions.c.role_id.in_(role_ids)).all())
 
     def get_permission_codes(self):
         """获取角色及其父角色的所有权限代码
@@ -51,7 +54,4 @@ class Role(db.Model):
         Returns:
             set: 包含所有权限代码的集合
         """
-        codes = {permission.code for permission in self.permissions}  # 当前角色的权限代码
-        if self.parent:  # 如果有父角色
-            codes.update(self.parent.get_permission_codes())  # 递归获取父角色的权限代码
-        return codes
\ No newline at end of file
+        return {permission.code for permission in self.get_all_permissions()}
\ No newline at end of file
@@ -179,6 +179,10 @@ class User(db.Model):
         self.updated_at = datetime.now(timezone.utc)
         # 提交数据库会话，保存更改
         db.session.commit()
+        # 昵称可能已修改，使昵称缓存失效
+        if nickname is not None:
+            from app.utils.user_utils import invalidate_user_nickname
+            invalidate_user_nickname(self.id)
         # 返回更新后的用户对象
         return self
 
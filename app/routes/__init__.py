@@ -14,6 +14,7 @@ from app.routes.user.user_routes import user_bp
 from app.routes.user.auth_routes import auth_bp
 from app.routes.admin.admin import admin_bp
 from app.routes.announcement.announcement_routes import announcement_bp
+from app.routes.metrics.metrics_routes import metrics_bp
 
 
 def register_routes(app: Flask):
@@ -33,5 +34,9 @@ def register_routes(app: Flask):
     
     # 注册公告路由蓝图
     app.register_blueprint(announcement_bp)
+
+    # 注册性能指标路由蓝图
+    if app.config.get('METRICS_ENABLED', True):
+        app.register_blueprint(metrics_bp)
     
     return app
\ No newline at end of file
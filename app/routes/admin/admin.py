@@ -14,6 +14,7 @@ from app.utils.schemas import StaffCreate, StaffUpdate, StaffRoleUpdate, StaffPe
 from pydantic import ValidationError
 from flask_jwt_extended import jwt_required
 from app.utils.auth import permission_required
+from app.utils.http_cache import conditional_response
 
 # 创建蓝图
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -263,20 +264,53 @@ def get_all_roles_with_permissions():
     获取系统中所有角色及其拥有的权限信息
     """
     try:
-        # 调用服务层方法
-        roles_with_permissions = StaffService.get_all_roles_with_permissions()
+        # 角色和权限未修改时直接返回304，不加载角色权限和序列化
+        return conditional_response(
+            StaffService.get_roles_with_permissions_etag(),
+            lambda: api_response(
+                success=True,
+                code=HTTP_200_OK,
+                message='获取所有角色及其权限成功',
+                data=StaffService.get_all_roles_with_permissions()
+            )
+        )
+    except Exception as e:
+        return api_response(
+            success=False,
+            code=HTTP_500_INTERNAL_SERVER_ERROR,
+            message=f'获取所有角色及其权限失败: {str(e)}'
+        )
+
+
+@admin_bp.route('/get_cache_stats', methods=['GET'])
+@jwt_required()
+@permission_required('system', 'permission:manage', 'all')
+def get_cache_stats():
+    """
+    获取缓存统计信息
+    ---
+    返回进程内缓存的容量、命中/未命中次数，用于评估缓存容量配置
+    """
+    try:
+        from app.utils.user_utils import get_nickname_cache_stats
+        from app.services.permission_service import PermissionService
+        from app.utils.token_blocklist import TokenBlocklistStore
 
         return api_response(
             success=True,
             code=HTTP_200_OK,
-            message='获取所有角色及其权限成功',
-            data=roles_with_permissions
+            message='获取缓存统计信息成功',
+            data={
+                'nickname_cache': get_nickname_cache_stats(),
+                'permission_cache': PermissionService.get_permission_cache_stats(),
+                'jwt_blocklist': TokenBlocklistStore.stats()
+            }
         )
     except Exception as e:
         return api_response(
             success=False,
             code=HTTP_500_INTERNAL_SERVER_ERROR,
-            message=f'获取所有角色及其权限失败: {str(e)}'
+            message=f'获取缓存统计信息失败: {str(e)}'
         )
 
 
@@ -749,6 +783,43 @@ def delete_role(role_id):
             message=f'删除角色失败: {str(e)}'
         )
 
+@admin_bp.route('/set_role_parent/<int:role_id>', methods=['POST'])
+@jwt_required()
+@permission_required('system', 'role:manage', 'all')
+def set_role_parent(role_id):
+    """
+    设置父角色
+    ---
+    设置角色的父角色，角色将继承父角色链上的所有权限；设置后出现循环时拒绝
+    请求体格式: {
+        "parent_id": 1  # 父角色ID，为null时取消父角色
+    }
+    """
+    try:
+        data = request.get_json() or {}
+
+        # 调用服务层方法
+        role = StaffService.set_role_parent(role_id, data.get('parent_id'))
+
+        return api_response(
+            success=True,
+            code=HTTP_200_OK,
+            message='设置父角色成功',
+            data=role
+        )
+    except ValueError as e:
+        return api_response(
+            success=False,
+            code=HTTP_400_BAD_REQUEST,
+            message=str(e)
+        )
+    except Exception as e:
+        return api_response(
+            success=False,
+            code=HTTP_500_INTERNAL_SERVER_ERROR,
+            message=f'设置父角色失败: {str(e)}'
+        )
+
 @admin_bp.route('/update_role_permissions/<int:role_id>', methods=['POST'])
 @jwt_required()
 @permission_required('system', 'permission:manage', 'all')
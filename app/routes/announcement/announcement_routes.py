@@ -11,6 +11,7 @@ from app.utils.status_codes import (
 from app.utils.response import api_response, handle_exception
 from app.services.announcement.announcement_service import AnnouncementService
 from app.utils.auth import permission_required
+from app.utils.http_cache import conditional_response
 
 announcement_bp = Blueprint('announcement_bp', __name__, url_prefix='/announcement')
 
@@ -19,12 +20,15 @@ announcement_bp = Blueprint('announcement_bp', __name__, url_prefix='/announceme
 @permission_required('announcement', 'view', 'all')
 def get_all_announcements():
     try:
-        result = AnnouncementService.get_all_announcements()
-        return api_response(
-            success=True,
-            code=HTTP_200_OK,
-            message='操作成功',
-            data=result
+        # 公告未修改时直接返回304
+        return conditional_response(
+            AnnouncementService.get_announcements_etag('all'),
+            lambda: api_response(
+                success=True,
+                code=HTTP_200_OK,
+                message='操作成功',
+                data=AnnouncementService.get_all_announcements()
+            )
         )
     except Exception as e:
         logging.error(f"Error in /announcement/get-all: {str(e)}")
@@ -37,12 +41,15 @@ def get_announcements_paginated():
         per_page = request.args.get('per_page', 10, type=int)
         search_keyword = request.args.get('search_keyword', '', type=str)
 
-        result = AnnouncementService.get_announcements_paginated(page, per_page, search_keyword)
-        return api_response(
-            success=True,
-            code=HTTP_200_OK,
-            message='操作成功',
-            data=result
+        return conditional_response(
+            AnnouncementService.get_announcements_etag('paginated', page, per_page, search_keyword),
+            lambda: api_response(
+                success=True,
+                code=HTTP_200_OK,
+                message='操作成功',
+                data=AnnouncementService.get_announcements_paginated(page, per_page, search_keyword)
+            ),
+            private=False
         )
     except Exception as e:
         logging.error(f"Error in /announcement/get-paginated: {str(e)}")
@@ -87,12 +94,15 @@ def get_total_active_announcements():
 def get_latest_announcements():
     try:
         limit = request.args.get('limit', 10, type=int)
-        result = AnnouncementService.get_latest_announcements(limit)
-        return api_response(
-            success=True,
-            code=HTTP_200_OK,
-            message='操作成功',
-            data=result
+        return conditional_response(
+            AnnouncementService.get_announcements_etag('latest', limit),
+            lambda: api_response(
+                success=True,
+                code=HTTP_200_OK,
+                message='操作成功',
+                data=AnnouncementService.get_latest_announcements(limit)
+            ),
+            private=False
         )
     except Exception as e:
         logging.error(f"Error in /announcement/get-latest: {str(e)}")
@@ -0,0 +1,4 @@
+"""性能指标路由包
+
+此包包含Prometheus指标接口
+"""
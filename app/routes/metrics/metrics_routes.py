@@ -0,0 +1,21 @@
+from flask import Blueprint, Response, current_app, request
+from app.utils.metrics import render_metrics
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus指标
+    ---
+    以Prometheus文本格式输出本进程的请求数、请求耗时、SQL语句数/耗时和响应大小（按端点汇总）。
+    配置了METRICS_TOKEN时需在请求头中携带 Authorization: Bearer <METRICS_TOKEN>；
+    未配置令牌且METRICS_ALLOW_ANONYMOUS为False（生产环境默认）时返回404，不公开指标
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token and not current_app.config.get('METRICS_ALLOW_ANONYMOUS', False):
+        return Response('not found\n', status=404, mimetype='text/plain')
+    if token and request.headers.get('Authorization', '') != f'Bearer {token}':
+        return Response('unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
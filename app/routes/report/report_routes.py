@@ -1,11 +1,9 @@
 from flask_jwt_extended import jwt_required
 from app.models.report.inspection_report import InspectionReport
-from app.models.user.user import User  # 添加User模型导入
-from app.services.permission_service import PermissionService  # 添加PermissionService导入
 import logging
 import re
 from datetime import datetime, timezone
-from flask import request, g, Blueprint
+from flask import request, g, Blueprint, Response, stream_with_context
 from app.utils.status_codes import (
     HTTP_200_OK,
     HTTP_400_BAD_REQUEST,
@@ -14,10 +12,13 @@ from app.utils.status_codes import (
 )
 from app.utils.response import api_response, handle_exception, generate_request_id
 from app.services.report.report_service import ReportService
+from app.services.report.report_export import ReportExportService, EXPORT_FORMATS
 from app.utils.report_schemas import ReportUpdate
 from pydantic import ValidationError
 from app import db
 from app.utils.auth import permission_required, get_current_user
+from app.utils.identity import get_identity
+from app.utils.http_cache import conditional_response
 
 report_bp = Blueprint('report_bp', __name__, url_prefix='/report')  # Confirmed correct URL prefix as required
 
@@ -25,8 +26,21 @@ report_bp = Blueprint('report_bp', __name__, url_prefix='/report')  # Confirmed
 @jwt_required()
 @permission_required('inspection_report', 'view', 'own')
 def get_all_reports():
+    """获取全部报告
+
+    查询参数:
+        fields: 返回的字段，逗号分隔的字段名或预设名（summary、full），默认返回全部字段
+    """
     try:
-        result = ReportService.get_all_reports()
+        try:
+            fields = InspectionReport.parse_fields(request.args.get('fields', '', type=str))
+        except ValueError as e:
+            return api_response(
+                success=False,
+                code=HTTP_400_BAD_REQUEST,
+                message=str(e)
+            )
+        result = ReportService.get_all_reports(fields)
         return api_response(
             success=True,
             code=HTTP_200_OK,
@@ -38,6 +52,52 @@ def get_all_reports():
         return handle_exception(e, '获取报告列表失败')
 
 
+@report_bp.route('/export', methods=['GET'])
+@jwt_required()
+@permission_required('inspection_report', 'export', 'all')
+def export_reports():
+    """流式导出报告
+
+    查询参数:
+        format: 导出格式，csv（默认）、ndjson或xlsx
+        cn_headers: 是否使用中文表头，true/false（默认false）
+        search_keyword: 搜索关键字，可选
+    """
+    try:
+        export_format = request.args.get('format', 'csv', type=str).lower()
+        cn_headers = request.args.get('cn_headers', 'false', type=str).lower() == 'true'
+        search_keyword = request.args.get('search_keyword', '', type=str)
+
+        # 根据用户的'inspection_report'查看权限范围确定导出范围
+        user_id = g.user_id
+        scope = get_identity().scope_for('inspection_report', 'view')
+
+        try:
+            content = ReportExportService.export(
+                export_format, cn_headers, search_keyword, user_id=user_id, scope=scope
+            )
+        except ValueError as e:
+            return api_response(
+                success=False,
+                code=HTTP_400_BAD_REQUEST,
+                message=str(e)
+            )
+
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        filename = f"reports_{datetime.now().strftime('%Y%m%d%H%M%S')}.{extension}"
+        # stream_with_context使生成器在整个响应期间保持请求上下文和数据库会话
+        return Response(
+            stream_with_context(content),
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+    except Exception as e:
+        logging.error(f"Error in /report/export: {str(e)}")
+        return handle_exception(e, '导出报告失败')
+
 
 @report_bp.route('/get-reports', methods=['GET'])
 @jwt_required()
@@ -47,22 +107,42 @@ def get_reports():
         page = request.args.get('page', 1, type=int)#当前页码
         per_page = request.args.get('per_page', 10, type=int)#每页数量
         search_keyword = request.args.get('search_keyword', '', type=str)
+        # 游标分页参数：pagination=cursor或传入cursor时使用游标分页，否则使用页码分页
+        pagination_mode = request.args.get('pagination', 'page', type=str)
+        cursor = request.args.get('cursor', '', type=str)
+        with_total = request.args.get('with_total', 'false', type=str).lower() == 'true'
+        # 字段投影：逗号分隔的字段名或预设名（summary、full），只查询和返回这些字段
+        try:
+            fields = InspectionReport.parse_fields(request.args.get('fields', '', type=str))
+        except ValueError as e:
+            return api_response(
+                success=False,
+                code=HTTP_400_BAD_REQUEST,
+                message=str(e)
+            )
 
         # 获取当前用户ID
         user_id = g.user_id
 
-        # 检查用户是否拥有'inspection_report'的'view'权限且范围为'all'
-        user = User.query.get(user_id)
-        has_all_permission = PermissionService.has_user_permission(
-            user, 'inspection_report', 'view', 'all'
-        )
+        # 根据权限范围确定是否需要过滤（身份已在permission_required中加载）
+        scope = get_identity().scope_for('inspection_report', 'view')
 
-        # 根据权限范围确定是否需要过滤
-        scope = 'all' if has_all_permission else 'own'
-
-        result = ReportService.get_reports_paginated(
-            page, per_page, search_keyword, user_id=user_id, scope=scope
-        )
+        if pagination_mode == 'cursor' or cursor:
+            try:
+                result = ReportService.get_reports_by_cursor(
+                    cursor, per_page, search_keyword, user_id=user_id, scope=scope, with_total=with_total,
+                    fields=fields
+                )
+            except ValueError as e:
+                return api_response(
+                    success=False,
+                    code=HTTP_400_BAD_REQUEST,
+                    message=str(e)
+                )
+        else:
+            result = ReportService.get_reports_paginated(
+                page, per_page, search_keyword, user_id=user_id, scope=scope, fields=fields
+            )
 
         return api_response(
             success=True,
@@ -75,8 +155,30 @@ def get_reports():
         return handle_exception(e, '获取报告列表失败')
 
 
+def _report_detail_response(report_code):
+    """查询报告详情并生成响应"""
+    result = ReportService.get_report_by_code(report_code)
+    if result['success']:
+        return api_response(
+            success=True,
+            code=HTTP_200_OK,
+            message='操作成功',
+            data=result['data']
+        )
+    else:
+        return api_response(
+            success=False,
+            code=HTTP_404_NOT_FOUND,
+            message=result['message']
+        )
+
+
 @report_bp.route('/get-report-by-code', methods=['GET'])
 def get_report_by_code():
+    """根据报告编号获取报告详情
+
+    支持条件请求：报告未修改时（If-None-Match与ETag一致）返回304，不查询完整报告和序列化
+    """
     try:
         report_code = request.args.get('report_code', '', type=str)
         if not report_code:
@@ -85,20 +187,16 @@ def get_report_by_code():
                 code=HTTP_400_BAD_REQUEST,
                 message='报告编号不能为空'
             )
-        result = ReportService.get_report_by_code(report_code)
-        if result['success']:
-            return api_response(
-                success=True,
-                code=HTTP_200_OK,
-                message='操作成功',
-                data=result['data']
-            )
-        else:
-            return api_response(
-                success=False,
-                code=HTTP_404_NOT_FOUND,
-                message=result['message']
-            )
+
+        etag, last_modified = ReportService.get_report_etag(report_code)
+        if etag is None:
+            return _report_detail_response(report_code)
+        return conditional_response(
+            etag,
+            lambda: _report_detail_response(report_code),
+            last_modified=last_modified,
+            private=False
+        )
     except Exception as e:
         logging.error(f"Error in /report/get-report-by-code: {str(e)}")
         return handle_exception(e, '获取报告详情失败')
@@ -119,15 +217,37 @@ def get_total_active_reports():
         return handle_exception(e, '获取有效报告总数失败')
 
 
+@report_bp.route('/get-report-counts', methods=['GET'])
+@jwt_required()
+@permission_required('inspection_report', 'view', 'all')
+def get_report_counts():
+    """获取报告计数汇总（总数、有效数、按登记人和按状态的分布）"""
+    try:
+        counts = ReportService.get_report_counts()
+        return api_response(
+            success=True,
+            code=HTTP_200_OK,
+            message='操作成功',
+            data=counts
+        )
+    except Exception as e:
+        logging.error(f"Error in /report/get-report-counts: {str(e)}")
+        return handle_exception(e, '获取报告计数失败')
+
+
 @report_bp.route('/search', methods=['GET'])
 @jwt_required()
 @permission_required('inspection_report', 'view', 'own')
 def search_reports():
     try:
         search_param = request.args.get('search_keyword', '', type=str)
+        limit = request.args.get('limit', 100, type=int)
+
+        # 根据用户的'inspection_report'查看权限范围确定搜索范围
+        scope = get_identity().scope_for('inspection_report', 'view')
 
         # 调用服务层方法搜索报告
-        result = ReportService.search_reports(search_param)
+        result = ReportService.search_reports(search_param, user_id=g.user_id, scope=scope, limit=limit)
 
         if result['success']:
             return api_response(
@@ -323,16 +443,20 @@ def batch_delete_reports():
                 data={}
             )
 
-        result = ReportService.batch_soft_delete_reports(report_codes)
+        # 没有'all'删除权限时只能删除自己登记的报告
+        scope = get_identity().scope_for('inspection_report', 'delete')
+
+        result = ReportService.batch_soft_delete_reports(report_codes, user_id=g.user_id, scope=scope)
         return api_response(
-            success=True,
-            code=HTTP_200_OK,
+            success=result['success'],
+            code=result['code'],
             message=result['message'],
             data={
                 'total_count': result['data']['total_count'],
                 'success_count': result['data']['success_count'],
                 'failed_count': result['data']['failed_count'],
-                'failed_reports': result['data']['failed_reports']
+                'failed_reports': result['data']['failed_reports'],
+                'results': result['data']['results']
             }
         )
     except Exception as e:
@@ -492,9 +616,7 @@ def get_reports_by_codes():
         user_id = str(current_user.id)
         
         # 检查用户是否拥有'inspection_report'的'view'权限且范围为'all'
-        has_all_permission = PermissionService.has_user_permission(
-            current_user, 'inspection_report', 'view', 'all'
-        )
+        has_all_permission = get_identity().scope_for('inspection_report', 'view') == 'all'
         
         # 根据权限获取报告数据
         result = ReportService.get_reports_by_codes(report_codes, user_id, has_all_permission)
@@ -1,19 +1,23 @@
 from app import db
 from app.models.user.user import User
-from app.models.user.role import Role
+from app.models.user.role import Role, role_permissions
 from app.models.user.permission import Permission
 from app.models.user.user_role import user_roles
 from app.models.user.permission import user_permissions
 from app.utils.date_time import datetime_to_string
 from app.utils.logger import logger
+from app.utils.user_utils import invalidate_user_nickname
 from app.utils.response import api_response
 from app.utils.status_codes import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
-from app.services.permission_service import PermissionService
+from app.services.permission_service import PermissionService, RoleHierarchy
 from app.utils.schemas import StaffCreate, StaffUpdate, StaffRoleUpdate
+from app.utils.db_router import use_replica
+from app.utils.http_cache import make_etag
 
 
 class StaffService:
     @staticmethod
+    @use_replica()
     def get_staff_list(page=1, per_page=10, keyword='', status=None, role_id=None):
         """
         获取人员列表
@@ -242,6 +246,9 @@ class StaffService:
 
             # 保存更改（非敏感信息）
             db.session.commit()
+            # 用户名或昵称可能已修改，使昵称缓存失效
+            if 'username' in data or 'nickname' in data:
+                invalidate_user_nickname(staff.id)
 
             # 单独处理敏感信息更新
             if 'id_card_number' in data:
@@ -268,6 +275,7 @@ class StaffService:
     
             # 软删除
             staff.soft_delete()
+            invalidate_user_nickname(staff.id)
             
             # 移除重复的status设置和commit
             # staff.status = 0
@@ -340,6 +348,8 @@ class StaffService:
 
             # 保存更改
             db.session.commit()
+            # 角色/权限已修改，使编译后的用户权限缓存失效
+            PermissionService.invalidate_permission_cache()
 
             return True
         except Exception as e:
@@ -370,6 +380,8 @@ class StaffService:
             if role in staff.roles:
                 staff.roles.remove(role)
                 db.session.commit()
+                # 角色/权限已修改，使编译后的用户权限缓存失效
+                PermissionService.invalidate_permission_cache()
             else:
                 raise ValueError("该人员没有此角色")
 
@@ -409,6 +421,8 @@ class StaffService:
 
             # 保存更改
             db.session.commit()
+            # 角色/权限已修改，使编译后的用户权限缓存失效
+            PermissionService.invalidate_permission_cache()
 
             return True
         except Exception as e:
@@ -491,6 +505,9 @@ class StaffService:
             if Role.query.filter_by(name=data['name']).first():
                 raise ValueError("角色名称已存在")
 
+            # 检查父角色是否存在
+            RoleHierarchy.check_parent(None, data.get('parent_id'))
+
             # 创建新角色
             role = Role(
                 name=data['name'],
@@ -501,6 +518,8 @@ class StaffService:
             # 保存到数据库
             db.session.add(role)
             db.session.commit()
+            # 角色层级已修改，使编译后的用户权限缓存和角色闭包失效
+            PermissionService.invalidate_permission_cache()
 
             return {
                 'id': role.id,
@@ -516,6 +535,43 @@ class StaffService:
 
 
 
+    @staticmethod
+    def set_role_parent(role_id, parent_id):
+        """
+        设置角色的父角色
+
+        Args:
+            role_id (int): 角色ID
+            parent_id (int): 父角色ID，为None时取消父角色
+
+        Returns:
+            dict: 更新后的角色信息
+        """
+        try:
+            role = Role.query.get(role_id)
+            if not role:
+                raise ValueError("角色不存在")
+
+            # 检查父角色是否存在，以及设置后是否出现循环
+            RoleHierarchy.check_parent(role.id, parent_id)
+
+            role.parent_id = parent_id
+            db.session.commit()
+            # 角色层级已修改，使编译后的用户权限缓存和角色闭包失效
+            PermissionService.invalidate_permission_cache()
+
+            return {
+                'id': role.id,
+                'name': role.name,
+                'description': role.description,
+                'parent_id': role.parent_id,
+                'created_at': datetime_to_string(role.created_at)
+            }
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"设置父角色失败: {str(e)}")
+            raise
+
     @staticmethod
     def update_role_permissions(role_id, add_permission_ids, remove_permission_ids):
         """
@@ -551,6 +607,8 @@ class StaffService:
 
             # 保存更改
             db.session.commit()
+            # 角色/权限已修改，使编译后的用户权限缓存失效
+            PermissionService.invalidate_permission_cache()
 
             return True
         except Exception as e:
@@ -588,6 +646,8 @@ class StaffService:
 
             # 保存更改
             db.session.commit()
+            # 角色/权限已修改，使编译后的用户权限缓存失效
+            PermissionService.invalidate_permission_cache()
 
             return True
         except Exception as e:
@@ -688,6 +748,8 @@ class StaffService:
 
             # 保存更改
             db.session.commit()
+            # 角色/权限已修改，使编译后的用户权限缓存失效
+            PermissionService.invalidate_permission_cache()
 
             return True
         except Exception as e:
@@ -726,6 +788,8 @@ class StaffService:
 
             # 保存更改
             db.session.commit()
+            # 角色/权限已修改，使编译后的用户权限缓存失效
+            PermissionService.invalidate_permission_cache()
 
             return True
         except Exception as e:
@@ -782,6 +846,8 @@ class StaffService:
             # 逻辑删除角色
             role.is_active = False
             db.session.commit()
+            # 角色/权限已修改，使编译后的用户权限缓存失效
+            PermissionService.invalidate_permission_cache()
 
             return True
         except Exception as e:
@@ -816,6 +882,27 @@ class StaffService:
             logger.error(f"修改用户密码失败: {str(e)}")
             raise
 
+    @staticmethod
+    def get_roles_with_permissions_etag():
+        """计算get_all_roles_with_permissions结果的ETag
+
+        只查询角色、权限的ID和updated_at以及角色权限关联，不加载完整对象；
+        角色权限关联的增删不会修改updated_at，因此关联记录本身计入ETag
+
+        Returns:
+            str: ETag
+        """
+        roles = db.session.query(Role.id, Role.updated_at).filter_by(is_active=True).order_by(Role.id).all()
+        permissions = db.session.query(Permission.id, Permission.updated_at).order_by(Permission.id).all()
+        links = db.session.query(role_permissions.c.role_id, role_permissions.c.permission_id).order_by(
+            role_permissions.c.role_id, role_permissions.c.permission_id
+        ).all()
+        return make_etag(
+            [tuple(row) for row in roles],
+            [tuple(row) for row in permissions],
+            [tuple(row) for row in links]
+        )
+
     @staticmethod
     def get_all_roles_with_permissions():
         """
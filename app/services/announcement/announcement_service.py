@@ -2,8 +2,35 @@ from app.db import db
 from app.models.announcement import Announcement
 import logging
 from app.utils.date_time import string_to_datetime, datetime_to_string
+from app.utils.http_cache import make_etag
+from app.utils.user_utils import get_user_nicknames
 
 class AnnouncementService:
+    @staticmethod
+    def get_announcements_etag(*params):
+        """计算公告列表的ETag
+
+        由公告总数（含已删除）、最大ID、最后更新时间和创建人昵称计算，
+        新增、删除、修改任意公告或修改创建人昵称后ETag都会变化
+
+        Args:
+            *params: 列表接口的参数（页码、关键字等），不同参数的结果使用不同的ETag
+
+        Returns:
+            str: ETag
+        """
+        total, max_id, last_updated = db.session.query(
+            db.func.count(Announcement.id),
+            db.func.max(Announcement.id),
+            db.func.max(Announcement.updated_at)
+        ).one()
+        creator_ids = [
+            row.created_by for row in
+            db.session.query(Announcement.created_by).filter(Announcement.created_by.isnot(None)).distinct()
+        ]
+        nicknames = get_user_nicknames(creator_ids)
+        return make_etag(total, max_id, last_updated, sorted(nicknames.items()), params)
+
     @staticmethod
     def get_total_announcements_count():
         """获取数据库中公告的总条数(包含已删除)"""
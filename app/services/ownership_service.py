@@ -0,0 +1,111 @@
+"""资源归属解析服务
+
+scope='own'的权限需要判断当前用户是否为资源的所有者。这里按资源类型登记
+(模型类, 查询字段, 所有者字段)，在应用启动时完成注册：
+- 只查询查询字段和所有者字段两列，不加载整行数据
+- 同一请求内查询过的资源归属记录在g中，后续检查直接复用
+- owners_of()一次IN查询解析一批资源的所有者，供批量接口使用
+"""
+from flask import g, has_request_context
+from app.db import db
+
+# 资源ID在一次IN查询中的最大数量
+OWNER_QUERY_CHUNK_SIZE = 1000
+
+
+class OwnershipService:
+    """资源归属解析"""
+
+    # {资源类型: (模型类, 查询字段, 所有者字段)}
+    _resolvers = {}
+
+    @staticmethod
+    def register(resource, model_class, query_field, owner_field):
+        """登记资源类型的归属解析方式
+
+        Args:
+            resource (str): 资源类型，与权限的resource一致
+            model_class: 资源的模型类
+            query_field (str): 资源ID对应的字段
+            owner_field (str): 所有者用户ID所在的字段
+        """
+        OwnershipService._resolvers[resource] = (
+            model_class,
+            getattr(model_class, query_field),
+            getattr(model_class, owner_field)
+        )
+
+    @staticmethod
+    def is_registered(resource):
+        """资源类型是否已登记"""
+        return resource in OwnershipService._resolvers
+
+    @staticmethod
+    def _get_memo():
+        """获取当前请求的归属缓存 {(资源类型, 资源ID): 所有者ID}，不在请求上下文中时返回None"""
+        if not has_request_context():
+            return None
+        if 'ownership_memo' not in g:
+            g.ownership_memo = {}
+        return g.ownership_memo
+
+    @staticmethod
+    def owners_of(resource, resource_ids):
+        """批量解析资源的所有者
+
+        Args:
+            resource (str): 资源类型
+            resource_ids (iterable): 资源ID集合
+
+        Returns:
+            dict: {资源ID: 所有者ID}，不存在的资源对应None
+
+        Raises:
+            KeyError: 资源类型未登记
+        """
+        model_class, query_column, owner_column = OwnershipService._resolvers[resource]
+        memo = OwnershipService._get_memo()
+        if memo is None:
+            memo = {}
+
+        result = {}
+        missing = []
+        for resource_id in resource_ids:
+            key = (resource, str(resource_id))
+            if key in memo:
+                result[resource_id] = memo[key]
+            else:
+                missing.append(resource_id)
+
+        for start in range(0, len(missing), OWNER_QUERY_CHUNK_SIZE):
+            chunk = missing[start:start + OWNER_QUERY_CHUNK_SIZE]
+            rows = db.session.query(query_column, owner_column).filter(query_column.in_(chunk)).all()
+            owners = {str(row[0]): row[1] for row in rows}
+            for resource_id in chunk:
+                owner_id = owners.get(str(resource_id))
+                memo[(resource, str(resource_id))] = owner_id
+                result[resource_id] = owner_id
+        return result
+
+    @staticmethod
+    def owner_of(resource, resource_id):
+        """解析单个资源的所有者，资源不存在时返回None"""
+        return OwnershipService.owners_of(resource, [resource_id])[resource_id]
+
+    @staticmethod
+    def is_owner(resource, resource_id, user_id):
+        """判断用户是否为资源的所有者，未登记的资源类型或不存在的资源返回False"""
+        if not OwnershipService.is_registered(resource):
+            return False
+        owner_id = OwnershipService.owner_of(resource, resource_id)
+        return owner_id is not None and str(owner_id) == str(user_id)
+
+
+def init_ownership_resolvers(app):
+    """注册内置资源类型的归属解析方式，在应用启动时调用"""
+    from app.models.report.inspection_report import InspectionReport
+    from app.models.user.user import User
+
+    OwnershipService.register('inspection_report', InspectionReport, 'report_code', 'registrant_id')
+    OwnershipService.register('user', User, 'id', 'id')
+    # 可根据需要添加其他资源类型的注册
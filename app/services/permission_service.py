@@ -1,7 +1,145 @@
+import json
+import threading
+import time
 from app.models.user.user import User
-from app.models.user.role import Role
-from app.models.user.permission import Permission
+from app.models.user.role import Role, role_permissions
+from app.models.user.permission import Permission, user_permissions
+from app.models.user.user_role import user_roles
 from app.db import db
+from app.utils.cache import TTLCache, MISSING
+from app.utils.redis_client import safe_redis
+from app.utils.logger import logger
+from app.utils.db_router import use_replica, use_primary
+from app.services.ownership_service import OwnershipService
+
+# 编译后的用户权限集合缓存，键为(权限版本号, 用户ID)，值为frozenset{(resource, action, scope)}
+# 权限判断是每个受保护请求的必经路径，而角色、权限很少修改，因此缓存编译结果，
+# 并在StaffService修改角色、权限时递增版本号使所有缓存失效
+permission_cache = TTLCache(maxsize=1024, ttl=60)
+
+# 是否同时使用Redis保存编译结果和版本号（多进程部署时各进程共享失效）
+_use_redis = False
+
+# 进程内的权限版本号（未使用Redis或Redis不可用时使用）
+_local_version = 0
+
+# 从库复制延迟的上限（秒）：版本号变化后的这段时间内在主库编译权限，避免从库的旧数据被缓存到新版本号下
+_replica_delay = 5
+
+# 本进程最近观察到的权限版本号，及首次观察到该版本号的时间
+_version_seen = (None, 0.0)
+
+# Redis中的权限版本号键和编译结果键
+PERMISSION_VERSION_REDIS_KEY = 'perm:version'
+PERMISSION_SET_REDIS_KEY = 'perm:set:{}:{}'
+
+
+def init_permission_cache(app):
+    """根据应用配置初始化权限缓存
+
+    配置项:
+        PERMISSION_CACHE_MAXSIZE: 最大缓存用户数
+        PERMISSION_CACHE_TTL: 缓存过期时间（秒），也是Redis不可用时其他进程感知失效的最长延迟
+        PERMISSION_CACHE_USE_REDIS: 是否使用Redis共享编译结果和版本号
+        PERMISSION_REPLICA_DELAY: 版本号变化后在主库编译权限的时间（秒），应不小于从库复制延迟
+    """
+    global _use_redis, _replica_delay
+    permission_cache.configure(
+        maxsize=app.config.get('PERMISSION_CACHE_MAXSIZE', 1024),
+        ttl=app.config.get('PERMISSION_CACHE_TTL', 60)
+    )
+    _use_redis = app.config.get('PERMISSION_CACHE_USE_REDIS', False)
+    _replica_delay = app.config.get('PERMISSION_REPLICA_DELAY', 5)
+
+class RoleHierarchy:
+    """角色层级闭包
+
+    角色表很小，将所有角色的父角色链一次性展开为 {角色ID: (自身, 父角色, 祖父角色, ...)}，
+    角色的有效权限只需对闭包内的角色做一次IN查询。闭包随权限版本号重建，
+    因此修改角色或父角色后调用PermissionService.invalidate_permission_cache()即可。
+    """
+
+    _ancestors = {}
+    _version = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    @use_primary()
+    def _build():
+        """从主库的roles表构建闭包，历史数据中存在环时在环处截断并记录警告
+
+        闭包在整个版本号内复用，从库可能尚未同步刚修改的父角色，因此不读取从库
+        """
+        parents = dict(db.session.query(Role.id, Role.parent_id).all())
+        ancestors = {}
+        for role_id in parents:
+            chain = [role_id]
+            parent_id = parents.get(role_id)
+            while parent_id is not None and parent_id in parents:
+                if parent_id in chain:
+                    logger.warning(f"角色层级存在循环: {' -> '.join(str(item) for item in chain + [parent_id])}")
+                    break
+                chain.append(parent_id)
+                parent_id = parents.get(parent_id)
+            ancestors[role_id] = tuple(chain)
+        return ancestors
+
+    @staticmethod
+    def _get_closure(version=None):
+        """获取当前版本的闭包，版本号变化时重建"""
+        if version is None:
+            version = PermissionService._get_permission_version()
+        with RoleHierarchy._lock:
+            if RoleHierarchy._version == version:
+                return RoleHierarchy._ancestors
+        ancestors = RoleHierarchy._build()
+        with RoleHierarchy._lock:
+            RoleHierarchy._ancestors = ancestors
+            RoleHierarchy._version = version
+        return ancestors
+
+    @staticmethod
+    def ancestors(role_id, version=None):
+        """获取角色自身及其所有父角色的ID（由近到远）
+
+        Args:
+            role_id (int): 角色ID
+            version (int, optional): 权限版本号，调用方已获取时传入以避免重复读取
+
+        Returns:
+            tuple: 角色ID元组；角色不存在时为空元组
+        """
+        return RoleHierarchy._get_closure(version).get(role_id, ())
+
+    @staticmethod
+    def ancestors_of(role_ids, version=None):
+        """获取多个角色及其所有父角色的ID集合"""
+        closure = RoleHierarchy._get_closure(version)
+        result = set()
+        for role_id in role_ids:
+            result.update(closure.get(role_id, ()))
+        return result
+
+    @staticmethod
+    def check_parent(role_id, parent_id):
+        """校验为角色设置父角色是否合法
+
+        Args:
+            role_id (int): 角色ID，新建角色时为None
+            parent_id (int): 父角色ID，为None表示取消父角色
+
+        Raises:
+            ValueError: 父角色不存在，或设置后角色层级出现循环
+        """
+        if parent_id is None:
+            return
+        # 校验结果决定是否写入父角色，重新从主库构建闭包，不依赖缓存的闭包和可能延迟的从库
+        closure = RoleHierarchy._build()
+        if parent_id not in closure:
+            raise ValueError(f"父角色ID {parent_id} 不存在")
+        if role_id is not None and role_id in closure[parent_id]:
+            raise ValueError("不能将角色自身或其子角色设置为父角色，角色层级将出现循环")
+
 
 class PermissionService:
     """权限服务类，集中管理用户、角色、权限的关系判断"""
@@ -36,6 +174,135 @@ class PermissionService:
             'permissions': permission_dicts
         }
 
+    @staticmethod
+    def _get_permission_version():
+        """获取当前权限版本号"""
+        if _use_redis:
+            version = safe_redis(lambda client: client.get(PERMISSION_VERSION_REDIS_KEY))
+            if version is not None:
+                return int(version)
+        return _local_version
+
+    @staticmethod
+    def invalidate_permission_cache():
+        """递增权限版本号，使所有用户的编译权限失效
+
+        应在角色、权限、角色权限、用户角色或用户权限修改并提交后调用
+        """
+        global _local_version
+        _local_version += 1
+        permission_cache.clear()
+        if _use_redis:
+            safe_redis(lambda client: client.incr(PERMISSION_VERSION_REDIS_KEY))
+
+    @staticmethod
+    def get_permission_cache_stats():
+        """获取权限缓存统计信息（命中、未命中、淘汰次数等）"""
+        stats = permission_cache.stats()
+        stats['use_redis'] = _use_redis
+        stats['version'] = PermissionService._get_permission_version()
+        return stats
+
+    @staticmethod
+    def _compile_context(version):
+        """编译权限时使用的数据库
+
+        编译结果会缓存到当前版本号下。版本号刚变化时（本进程首次观察到新版本号后的
+        PERMISSION_REPLICA_DELAY秒内）从库可能还没有同步触发失效的修改，此时使用主库，之后使用从库
+
+        Args:
+            version (int): 权限版本号
+
+        Returns:
+            use_primary()或use_replica()上下文管理器
+        """
+        global _version_seen
+        now = time.monotonic()
+        seen_version, seen_at = _version_seen
+        if seen_version != version:
+            _version_seen = (version, now)
+            return use_primary()
+        if now - seen_at < _replica_delay:
+            return use_primary()
+        return use_replica()
+
+    @staticmethod
+    def _compile_role_ids(role_ids):
+        """查询一组角色拥有的激活权限，返回(resource, action, scope)集合"""
+        if not role_ids:
+            return set()
+        rows = db.session.query(Permission.resource, Permission.action, Permission.scope).join(
+            role_permissions, role_permissions.c.permission_id == Permission.id
+        ).filter(
+            role_permissions.c.role_id.in_(role_ids),
+            Permission.is_active == True
+        ).all()
+        return {(row.resource, row.action, row.scope) for row in rows}
+
+    @staticmethod
+    def compile_user_permissions(user_id, version=None):
+        """从数据库编译用户的有效权限集合
+
+        合并用户直接拥有的权限和其所有角色（含父角色链）的权限，只保留激活的权限
+
+        Args:
+            user_id (int): 用户ID
+            version (int, optional): 权限版本号，用于读取对应版本的角色闭包
+
+        Returns:
+            frozenset: {(resource, action, scope), ...}
+        """
+        if version is None:
+            version = PermissionService._get_permission_version()
+        with PermissionService._compile_context(version):
+            # 用户直接拥有的权限
+            rows = db.session.query(Permission.resource, Permission.action, Permission.scope).join(
+                user_permissions, user_permissions.c.permission_id == Permission.id
+            ).filter(
+                user_permissions.c.user_id == user_id,
+                Permission.is_active == True
+            ).all()
+            compiled = {(row.resource, row.action, row.scope) for row in rows}
+
+            # 用户角色及其所有父角色的权限
+            role_ids = [row.role_id for row in db.session.query(user_roles.c.role_id).filter(user_roles.c.user_id == user_id)]
+            if role_ids:
+                compiled.update(PermissionService._compile_role_ids(RoleHierarchy.ancestors_of(role_ids, version)))
+        return frozenset(compiled)
+
+    @staticmethod
+    def get_permission_set(user_id):
+        """获取用户的编译权限集合，优先读取进程内缓存和Redis
+
+        Args:
+            user_id (int): 用户ID
+
+        Returns:
+            frozenset: {(resource, action, scope), ...}
+        """
+        user_id = int(user_id)
+        version = PermissionService._get_permission_version()
+        key = (version, user_id)
+        permissions = permission_cache.get(key)
+        if permissions is not MISSING:
+            return permissions
+
+        redis_key = PERMISSION_SET_REDIS_KEY.format(version, user_id)
+        if _use_redis:
+            value = safe_redis(lambda client: client.get(redis_key))
+            if value is not None:
+                permissions = frozenset(tuple(item) for item in json.loads(value))
+                permission_cache.set(key, permissions)
+                return permissions
+
+        permissions = PermissionService.compile_user_permissions(user_id, version)
+        permission_cache.set(key, permissions)
+        if _use_redis:
+            safe_redis(lambda client: client.set(
+                redis_key, json.dumps(sorted(permissions)), ex=permission_cache.ttl
+            ))
+        return permissions
+
     @staticmethod
     def has_user_permission(user, resource, action, scope='all', resource_id=None):
         """检查用户是否拥有指定资源的操作权限
@@ -50,197 +317,92 @@ class PermissionService:
         Returns:
             bool: 是否拥有权限
         """
-        # 优先检查用户直接拥有的'all'权限
-        for perm in user.permissions:
-            if perm.scope == 'all' and PermissionService._check_permission(perm, resource, action, 'all', user, None):
-                return True
-
-        # 然后检查用户角色拥有的'all'权限
-        for role in user.roles:
-            if PermissionService.has_role_permission(role, resource, action, 'all', user, None):
-                return True
-
-        # 如果请求的不是'all'权限，再检查指定scope的权限
-        if scope != 'all':
-            # 检查用户直接拥有的指定scope权限
-            for perm in user.permissions:
-                if PermissionService._check_permission(perm, resource, action, scope, user, resource_id):
-                    return True
-
-            # 检查用户角色拥有的指定scope权限
-            for role in user.roles:
-                if PermissionService.has_role_permission(role, resource, action, scope, user, resource_id):
-                    return True
-
-        return False
-
-    @staticmethod
-    def has_role_permission(role, resource, action, scope='all', user=None, resource_id=None, checked_roles=None):
-        """检查角色是否拥有指定资源的操作权限"""
-        # 初始化已检查角色集合，避免循环引用
-        if checked_roles is None:
-            checked_roles = set()
-        # 若当前角色已检查过，直接返回False（避免循环）
-        if role.id in checked_roles:
-    
-            return False
-        checked_roles.add(role.id)
-
-        # 如果请求的不是'all'权限，先检查是否有对应的'all'权限
-        if scope != 'all':
-            for perm in role.permissions:
-                if perm.scope == 'all' and PermissionService._check_permission(perm, resource, action, 'all', user, None):
-                    return True
+        permissions = PermissionService.get_permission_set(user.id)
+        return PermissionService._match(permissions, resource, action, scope, user, resource_id)
 
-            # 递归检查父角色是否有'all'权限
-            if role.parent:
-                if PermissionService.has_role_permission(role.parent, resource, action, 'all', user, None, checked_roles.copy()):
-                    return True
+    @staticmethod
+    def get_role_permission_set(role_id):
+        """获取角色（含父角色链）的有效权限集合
 
-        # 检查当前角色指定scope的权限
-        for perm in role.permissions:
-            if PermissionService._check_permission(perm, resource, action, scope, user, resource_id):
-                return True
+        Args:
+            role_id (int): 角色ID
 
-        # 递归检查父角色指定scope的权限
-        if role.parent:
-            return PermissionService.has_role_permission(role.parent, resource, action, scope, user, resource_id, checked_roles)
+        Returns:
+            frozenset: {(resource, action, scope), ...}
+        """
+        version = PermissionService._get_permission_version()
+        key = (version, 'role', role_id)
+        permissions = permission_cache.get(key)
+        if permissions is MISSING:
+            with PermissionService._compile_context(version):
+                permissions = frozenset(PermissionService._compile_role_ids(RoleHierarchy.ancestors(role_id, version)))
+            permission_cache.set(key, permissions)
+        return permissions
 
-        return False
+    @staticmethod
+    def has_role_permission(role, resource, action, scope='all', user=None, resource_id=None):
+        """检查角色（含父角色链）是否拥有指定资源的操作权限"""
+        permissions = PermissionService.get_role_permission_set(role.id)
+        return PermissionService._match(permissions, resource, action, scope, user, resource_id)
 
     @staticmethod
-    def _check_permission(permission, resource, action, scope='all', user=None, resource_id=None):
-        """检查单个权限是否匹配资源、操作和范围
+    def _match(permissions, resource, action, scope, user, resource_id):
+        """在编译后的权限集合中判断权限
 
-        当scope为'own'时，还需验证用户是否为资源的所有者
+        拥有'all'范围的权限时直接通过；否则需拥有指定范围的权限，
+        且'own'范围指定了资源时还需验证用户是否为资源所有者
         """
-        is_active = permission.is_active
-        resource_match = permission.resource == resource
-        action_match = permission.action == action
-        scope_match = permission.scope == 'all' or permission.scope == scope
+        # 拥有'all'范围的权限时直接通过
+        if (resource, action, 'all') in permissions:
+            return True
 
-        # 基础权限检查不通过，直接返回False
-        if not (is_active and resource_match and action_match and scope_match):
+        # 请求'all'范围，或不拥有指定范围的权限
+        if scope == 'all' or (resource, action, scope) not in permissions:
             return False
 
-        # 需求1: 前三个参数为true(即is_active, resource_match, action_match都为True)
-        # 如果scope_match也为True且未传入resource_id(使用默认值)且scope不是'own'，则返回True
-        if is_active and resource_match and action_match and scope_match and resource_id is None and scope != 'own':
-            return True
-
-        # 需求2: 前两个参数为true(即is_active, resource_match都为True)
-        # 如果action_match也为True且未传入scope和resource_id(都使用默认值)，则返回True
-        if is_active and resource_match and action_match and scope == 'all' and resource_id is None:
-            return True
+        # 'own'范围且指定了资源时，还需验证用户是否为资源所有者
+        if scope == 'own' and resource_id is not None:
+            return PermissionService._is_resource_owner(resource, resource_id, user)
+        return True
 
-        # 如果scope为'own'，需要额外检查用户是否为资源所有者
-        if scope == 'own' and resource_id != None:
-            # 确保提供了resource_id和user
-            if not resource_id or not user:
-                return False
-
-            try:
-                # 根据资源类型和ID查询资源并检查所有权
-                resource_type_config = {
-                    'inspection_report': {
-                        'model': 'app.models.report.inspection_report.InspectionReport',
-                        'query_field': 'report_code',
-                        'owner_field': 'registrant_id'
-                    },
-                    'user': {
-                        'model': 'app.models.user.user.User',
-                        'query_field': 'id',
-                        'owner_field': 'id'
-                    }
-                    # 可根据需要添加其他资源类型的配置
-                }
-
-                if resource in resource_type_config:
-                    config = resource_type_config[resource]
-                    # 动态导入模型
-                    from importlib import import_module
-                    module_path, class_name = config['model'].rsplit('.', 1)
-                    module = import_module(module_path)
-                    model_class = getattr(module, class_name)
-                    
-                    # 构建查询 kwargs
-                    query_kwargs = {config['query_field']: resource_id}
-                    resource_instance = model_class.query.filter_by(**query_kwargs).first()
-                    
-                    if not resource_instance:
-                        return False
-                    
-                    # 比较用户ID与资源的所有者字段是否一致
-                    owner_id = getattr(resource_instance, config['owner_field'])
-                    return str(user.id) == str(owner_id)
-                else:
-                    # 对于未配置的资源类型，返回False
-                    return False
-            except Exception as e:
-                # 发生异常时，返回False
-                return False
+    @staticmethod
+    def _is_resource_owner(resource, resource_id, user):
+        """检查用户是否为资源的所有者"""
+        # 确保提供了resource_id和user
+        if not resource_id or not user:
+            return False
 
-        return True
+        try:
+            # 模型类在应用启动时已登记，这里只查询所有者字段，同一请求内的结果会被复用
+            return OwnershipService.is_owner(resource, resource_id, user.id)
+        except Exception as e:
+            # 发生异常时，返回False
+            return False
 
     @staticmethod
     def get_user_permissions(user):
-        """获取用户的所有有效权限"""
-        # print(f"PermissionService: 获取用户 {user.id} 的所有有效权限...")
+        """获取用户的所有有效权限（用户直接拥有的权限 + 所有角色及父角色的权限）"""
         permissions = []
         permission_codes = set()
 
         # 添加用户直接拥有的有效权限
-        # print(f"PermissionService: 添加用户 {user.id} 直接拥有的有效权限...")
         for perm in user.permissions:
             if perm.is_active and perm.code not in permission_codes:
-                # print(f"PermissionService: 添加用户直接权限: {perm.code} ({perm.resource}:{perm.action}:{perm.scope})")
                 permissions.append(perm)
                 permission_codes.add(perm.code)
-            elif not perm.is_active:
-                # print(f"PermissionService: 跳过非激活权限: {perm.code}")
-                pass
-            else:
-                # print(f"PermissionService: 跳过重复权限: {perm.code}")
-                pass
-
-        # 添加用户角色拥有的有效权限
-        # print(f"PermissionService: 添加用户 {user.id} 角色拥有的有效权限...")
-        checked_roles = set()
-        for role in user.roles:
-            # print(f"PermissionService: 处理角色 '{role.name}'...")
-            PermissionService._add_role_permissions(role, permissions, permission_codes, checked_roles)
-
-        # print(f"PermissionService: 用户 {user.id} 共拥有 {len(permissions)} 个有效权限")
-        return permissions
-
-    @staticmethod
-    def _add_role_permissions(role, permissions, permission_codes, checked_roles):
-        """递归添加角色及其父角色的有效权限"""
-        # 避免循环引用
-        if role.id in checked_roles:
-            # print(f"PermissionService: 角色 '{role.name}' (ID={role.id}) 已处理过，跳过")
-            return
-        checked_roles.add(role.id)
 
-        # print(f"PermissionService: 处理角色 '{role.name}' (ID={role.id}) 的权限...")
+        # 添加用户角色及其父角色拥有的有效权限，按角色闭包一次查询
+        role_ids = RoleHierarchy.ancestors_of([role.id for role in user.roles])
+        if role_ids:
+            role_perms = Permission.query.join(
+                role_permissions, role_permissions.c.permission_id == Permission.id
+            ).filter(
+                role_permissions.c.role_id.in_(role_ids),
+                Permission.is_active == True
+            ).order_by(Permission.id).all()
+            for perm in role_perms:
+                if perm.code not in permission_codes:
+                    permissions.append(perm)
+                    permission_codes.add(perm.code)
 
-        # 添加当前角色的有效权限
-        for perm in role.permissions:
-            if perm.is_active and perm.code not in permission_codes:
-                # print(f"PermissionService: 添加角色权限: {perm.code} ({perm.resource}:{perm.action}:{perm.scope}) 来自角色 '{role.name}'")
-                permissions.append(perm)
-                permission_codes.add(perm.code)
-            elif not perm.is_active:
-                # print(f"PermissionService: 跳过角色 '{role.name}' 的非激活权限: {perm.code}")
-                pass
-            else:
-                # print(f"PermissionService: 跳过角色 '{role.name}' 的重复权限: {perm.code}")
-                pass
-
-        # 递归添加父角色的有效权限
-        if role.parent:
-            # print(f"PermissionService: 递归处理角色 '{role.name}' 的父角色 '{role.parent.name}'...")
-            PermissionService._add_role_permissions(role.parent, permissions, permission_codes, checked_roles)
-        else:
-            # print(f"PermissionService: 角色 '{role.name}' 没有父角色")
-            pass
\ No newline at end of file
+        return permissions
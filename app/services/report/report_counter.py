@@ -0,0 +1,313 @@
+"""检测报告计数服务
+
+维护报告总数、有效（未软删除）报告数，以及有效报告按登记人、按状态的分布，
+避免仪表盘轮询的统计接口每次都对inspection_reports执行COUNT。
+
+- 计数在报告创建、软删除、状态/登记人修改并提交成功后增量更新
+- 默认保存在进程内；配置REPORT_COUNTER_USE_REDIS=True时同时保存在Redis中，
+  多进程部署下各进程读取同一份计数（Redis不可用时自动退化为进程内计数）
+- 首次读取时从数据库加载；后台定时任务和 flask reconcile-report-counters 命令
+  会按数据库实际数据重新校准，修正多进程或异常导致的偏差
+- 校准以增量方式合并：统计期间其他请求的增量保留在计数上，不会被统计结果覆盖
+"""
+import threading
+from types import SimpleNamespace
+from flask import current_app
+from sqlalchemy import func
+from app.db import db
+from app.models.report.inspection_report import InspectionReport
+from app.utils.logger import logger
+from app.utils.redis_client import safe_redis
+
+# Redis中保存计数的哈希键
+REDIS_KEY = 'report:counters'
+
+# 报告状态未填写时数据库使用的默认值
+DEFAULT_STATUS = InspectionReport.__table__.c.report_status.default.arg
+
+
+class ReportCounterService:
+    """报告计数服务"""
+
+    # 进程内计数，键为 total / active / registrant:<id> / status:<状态>
+    _counters = {}
+    _loaded = False
+    _lock = threading.Lock()
+    # 同一进程内的校准依次执行
+    _reconcile_lock = threading.Lock()
+    _reconcile_timer = None
+
+    @staticmethod
+    def _use_redis():
+        return current_app.config.get('REPORT_COUNTER_USE_REDIS', False)
+
+    @staticmethod
+    def _report_keys(report):
+        """报告当前计入的计数键，已软删除的报告不计入"""
+        if report.is_deleted:
+            return []
+        status = report.report_status if report.report_status is not None else DEFAULT_STATUS
+        keys = ['active', f'status:{status}']
+        if report.registrant_id:
+            keys.append(f'registrant:{report.registrant_id}')
+        return keys
+
+    @staticmethod
+    def _add(counters, deltas):
+        """将增量加到计数字典上，分布中已归零的登记人/状态不再保留，与从数据库加载的结果一致"""
+        for key, value in deltas.items():
+            counters[key] = counters.get(key, 0) + value
+            if counters[key] == 0 and ':' in key:
+                del counters[key]
+
+    @staticmethod
+    def _apply(deltas):
+        """将增量同时应用到进程内计数和Redis
+
+        Args:
+            deltas (dict): {计数键: 增量}
+        """
+        deltas = {key: value for key, value in deltas.items() if value}
+        if not deltas:
+            return
+        with ReportCounterService._lock:
+            # 尚未加载时不做增量，首次读取会从数据库完整加载
+            if ReportCounterService._loaded:
+                ReportCounterService._add(ReportCounterService._counters, deltas)
+
+        if ReportCounterService._use_redis():
+            def _incr(client):
+                # 哈希不存在时不做增量，避免在空哈希上累加出错误的计数
+                if not client.exists(REDIS_KEY):
+                    return
+                pipe = client.pipeline()
+                for key, value in deltas.items():
+                    pipe.hincrby(REDIS_KEY, key, value)
+                pipe.execute()
+            safe_redis(_incr)
+
+    @staticmethod
+    def snapshot(reports):
+        """记录报告当前计入的计数键
+
+        应在修改前和提交前调用（提交后对象属性会过期，再读取会逐条查询数据库）
+
+        Args:
+            reports (iterable): InspectionReport对象集合
+
+        Returns:
+            list: 每个报告的计数键列表
+        """
+        return [ReportCounterService._report_keys(report) for report in reports]
+
+    @staticmethod
+    def snapshot_mappings(mappings):
+        """记录批量插入数据（bulk_insert_mappings的字典）计入的计数键
+
+        Args:
+            mappings (iterable): 报告字段字典集合
+
+        Returns:
+            list: 每个报告的计数键列表
+        """
+        return [
+            ReportCounterService._report_keys(SimpleNamespace(
+                is_deleted=mapping.get('is_deleted'),
+                report_status=mapping.get('report_status'),
+                registrant_id=mapping.get('registrant_id')
+            ))
+            for mapping in mappings
+        ]
+
+    @staticmethod
+    def on_created(snapshots):
+        """报告创建并提交后调用
+
+        Args:
+            snapshots (list): 新报告提交前snapshot()的结果
+        """
+        deltas = {'total': len(snapshots)}
+        for keys in snapshots:
+            for key in keys:
+                deltas[key] = deltas.get(key, 0) + 1
+        ReportCounterService._apply(deltas)
+
+    @staticmethod
+    def on_changed(before, after):
+        """报告修改（包括软删除、状态或登记人变更）并提交后调用
+
+        Args:
+            before (list): 修改前snapshot()的结果
+            after (list): 提交前snapshot()的结果
+        """
+        deltas = {}
+        for keys in before:
+            for key in keys:
+                deltas[key] = deltas.get(key, 0) - 1
+        for keys in after:
+            for key in keys:
+                deltas[key] = deltas.get(key, 0) + 1
+        ReportCounterService._apply(deltas)
+
+    @staticmethod
+    def _load_from_db():
+        """从数据库统计完整计数"""
+        counters = {'total': InspectionReport.query.count(), 'active': 0}
+        rows = db.session.query(
+            InspectionReport.registrant_id,
+            InspectionReport.report_status,
+            func.count(InspectionReport.id)
+        ).filter(
+            InspectionReport.is_deleted == False
+        ).group_by(
+            InspectionReport.registrant_id,
+            InspectionReport.report_status
+        ).all()
+        for registrant_id, status, count in rows:
+            counters['active'] += count
+            status_key = f'status:{status if status is not None else DEFAULT_STATUS}'
+            counters[status_key] = counters.get(status_key, 0) + count
+            if registrant_id:
+                registrant_key = f'registrant:{registrant_id}'
+                counters[registrant_key] = counters.get(registrant_key, 0) + count
+        return counters
+
+    @staticmethod
+    def _diff(counters, previous):
+        """数据库计数与统计前计数的差值 {计数键: 增量}"""
+        deltas = {}
+        for key in set(previous) | set(counters):
+            delta = counters.get(key, 0) - int(previous.get(key, 0))
+            if delta:
+                deltas[key] = delta
+        return deltas
+
+    @staticmethod
+    def reconcile():
+        """按数据库实际数据重新校准计数
+
+        统计前记录当时的计数，统计后将差值（数据库计数 - 统计前计数）加到当前计数上，
+        统计期间其他请求（或其他进程在Redis中）的增量不会丢失
+
+        Returns:
+            dict: 校准前后有偏差的计数键 {计数键: (原值, 新值)}，此前没有计数时为空
+        """
+        with ReportCounterService._reconcile_lock:
+            with ReportCounterService._lock:
+                # 尚未加载过计数时没有可比较的旧值
+                previous = dict(ReportCounterService._counters) if ReportCounterService._loaded else None
+            use_redis = ReportCounterService._use_redis()
+            redis_previous = safe_redis(lambda client: client.hgetall(REDIS_KEY), default=None) if use_redis else None
+
+            counters = ReportCounterService._load_from_db()
+
+            deltas = ReportCounterService._diff(counters, previous or {})
+            with ReportCounterService._lock:
+                if not ReportCounterService._loaded:
+                    ReportCounterService._counters = {}
+                    ReportCounterService._loaded = True
+                ReportCounterService._add(ReportCounterService._counters, deltas)
+
+            if use_redis:
+                def _store(client):
+                    pipe = client.pipeline()
+                    if redis_previous:
+                        for key, delta in ReportCounterService._diff(counters, redis_previous).items():
+                            pipe.hincrby(REDIS_KEY, key, delta)
+                    else:
+                        pipe.delete(REDIS_KEY)
+                        pipe.hset(REDIS_KEY, mapping=counters)
+                    pipe.execute()
+                safe_redis(_store)
+                previous = redis_previous or previous
+
+        drift = {}
+        if previous is None:
+            return drift
+        for key in set(previous) | set(counters):
+            old_value = int(previous.get(key, 0))
+            if old_value != counters.get(key, 0):
+                drift[key] = (old_value, counters.get(key, 0))
+        if drift:
+            logger.warning(f"报告计数校准发现偏差: {drift}")
+        return drift
+
+    @staticmethod
+    def get_counters():
+        """获取全部计数
+
+        Returns:
+            dict: {计数键: 数量}
+        """
+        if ReportCounterService._use_redis():
+            values = safe_redis(lambda client: client.hgetall(REDIS_KEY), default=None)
+            if values:
+                return {key: int(value) for key, value in values.items()}
+        with ReportCounterService._lock:
+            if ReportCounterService._loaded:
+                return dict(ReportCounterService._counters)
+        ReportCounterService.reconcile()
+        with ReportCounterService._lock:
+            return dict(ReportCounterService._counters)
+
+    @staticmethod
+    def get_total_count():
+        """报告总数（包含已删除）"""
+        return ReportCounterService.get_counters().get('total', 0)
+
+    @staticmethod
+    def get_active_count():
+        """有效（未软删除）报告数"""
+        return ReportCounterService.get_counters().get('active', 0)
+
+    @staticmethod
+    def get_summary():
+        """获取有效报告按登记人、按状态的分布
+
+        Returns:
+            dict: 包含total、active、by_registrant、by_status的字典
+        """
+        counters = ReportCounterService.get_counters()
+        by_registrant = {}
+        by_status = {}
+        for key, value in counters.items():
+            # Redis中增量归零的键仍然存在，汇总时忽略
+            if not value:
+                continue
+            if key.startswith('registrant:'):
+                by_registrant[key[len('registrant:'):]] = value
+            elif key.startswith('status:'):
+                by_status[key[len('status:'):]] = value
+        return {
+            'total': counters.get('total', 0),
+            'active': counters.get('active', 0),
+            'by_registrant': by_registrant,
+            'by_status': by_status
+        }
+
+    @staticmethod
+    def start_reconcile_job(app):
+        """启动后台定时校准任务
+
+        配置项REPORT_COUNTER_RECONCILE_INTERVAL为校准间隔（秒），小于等于0时不启动
+        """
+        interval = app.config.get('REPORT_COUNTER_RECONCILE_INTERVAL', 0)
+        if not interval or interval <= 0 or ReportCounterService._reconcile_timer is not None:
+            return
+
+        def _run():
+            try:
+                with app.app_context():
+                    ReportCounterService.reconcile()
+            except Exception as e:
+                logger.error(f"报告计数定时校准失败: {str(e)}")
+            finally:
+                _schedule()
+
+        def _schedule():
+            timer = threading.Timer(interval, _run)
+            timer.daemon = True
+            ReportCounterService._reconcile_timer = timer
+            timer.start()
+
+        _schedule()
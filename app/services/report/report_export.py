@@ -0,0 +1,142 @@
+"""检测报告导出模块
+
+以流式方式导出报告，适用于数据量较大的场景：
+- 按(created_at, id)键集分页分批查询，每批都是普通的（缓冲）查询，不会一次性加载全部报告。
+  不使用yield_per：MySQL下yield_per使用服务端游标，读取过程中在同一连接上解析昵称等其他查询
+  会使PyMySQL丢弃未读完的结果，导出在第一批之后静默结束
+- 每批报告的登记人/最后修改人昵称用一次IN查询解析，序列化后立即写出
+- 支持CSV、NDJSON（每行一个JSON对象）和XLSX，表头可选使用get_field_mapping()中的中文名称
+"""
+import csv
+import io
+import json
+from flask import current_app
+from app.models.report.inspection_report import InspectionReport
+from app.services.report.report_search import ReportSearchService
+from app.services.report.report_service import ReportService
+from app.utils.xlsx_writer import iter_xlsx
+from app.utils.json_provider import json_default
+
+# 支持的导出格式: {格式: (MIME类型, 文件扩展名)}
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+# 导出的字段及顺序，与中文字段映射保持一致
+EXPORT_FIELDS = list(InspectionReport.get_field_mapping().keys())
+
+
+class ReportExportService:
+    """报告流式导出"""
+
+    @staticmethod
+    def iter_report_batches(search_keyword='', user_id=None, scope='all', chunk_size=None):
+        """分批读取并序列化报告
+
+        Args:
+            search_keyword (str, optional): 搜索关键字. Defaults to ''.
+            user_id (int, optional): 当前用户ID，scope为own时只导出该用户登记的报告. Defaults to None.
+            scope (str, optional): 权限范围，all或own. Defaults to 'all'.
+            chunk_size (int, optional): 每批读取的行数，默认使用配置项REPORT_EXPORT_CHUNK_SIZE
+
+        Yields:
+            list: 每批报告的字典列表
+        """
+        chunk_size = chunk_size or current_app.config.get('REPORT_EXPORT_CHUNK_SIZE', 1000)
+        query = ReportService._build_reports_query(user_id=user_id, scope=scope)
+        query, _ = ReportSearchService.apply(query, search_keyword)
+
+        last = None
+        while True:
+            batch_query = query if last is None else ReportService._apply_keyset(query, *last)
+            batch = batch_query.order_by(
+                InspectionReport.created_at.desc(), InspectionReport.id.desc()
+            ).limit(chunk_size).all()
+            if not batch:
+                return
+            last = (batch[-1].created_at, batch[-1].id)
+            yield InspectionReport.to_dict_list(batch)
+            if len(batch) < chunk_size:
+                return
+
+    @staticmethod
+    def get_headers(cn_headers=False):
+        """获取导出表头
+
+        Args:
+            cn_headers (bool, optional): 是否使用中文表头. Defaults to False.
+
+        Returns:
+            list: 与EXPORT_FIELDS顺序一致的表头
+        """
+        if not cn_headers:
+            return list(EXPORT_FIELDS)
+        field_mapping = InspectionReport.get_field_mapping()
+        return [field_mapping.get(field, field) for field in EXPORT_FIELDS]
+
+    @staticmethod
+    def _iter_csv(batches, headers):
+        """生成CSV内容，带BOM以便Excel正确识别UTF-8中文"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        writer.writerow(headers)
+        yield buffer.getvalue().encode('utf-8')
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([[data.get(field) for field in EXPORT_FIELDS] for data in batch])
+            yield buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def _iter_ndjson(batches, headers):
+        """生成NDJSON内容，每行一个报告对象，键为表头"""
+        for batch in batches:
+            lines = [
+                json.dumps(
+                    {header: data.get(field) for header, field in zip(headers, EXPORT_FIELDS)},
+                    ensure_ascii=False,
+                    default=json_default
+                )
+                for data in batch
+            ]
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+    @staticmethod
+    def _iter_xlsx(batches, headers):
+        """生成XLSX内容，第一行为表头"""
+        def row_batches():
+            yield [headers]
+            for batch in batches:
+                yield [[data.get(field) for field in EXPORT_FIELDS] for data in batch]
+        return iter_xlsx(row_batches(), sheet_name='检测报告')
+
+    @staticmethod
+    def export(export_format='csv', cn_headers=False, search_keyword='', user_id=None, scope='all'):
+        """流式导出报告
+
+        Args:
+            export_format (str, optional): 导出格式，csv、ndjson或xlsx. Defaults to 'csv'.
+            cn_headers (bool, optional): 是否使用中文表头. Defaults to False.
+            search_keyword (str, optional): 搜索关键字. Defaults to ''.
+            user_id (int, optional): 当前用户ID. Defaults to None.
+            scope (str, optional): 权限范围，all或own. Defaults to 'all'.
+
+        Returns:
+            generator: 文件内容的字节片段
+
+        Raises:
+            ValueError: 导出格式不受支持
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'不支持的导出格式: {export_format}，可选: {", ".join(EXPORT_FORMATS)}')
+        headers = ReportExportService.get_headers(cn_headers)
+        batches = ReportExportService.iter_report_batches(search_keyword, user_id=user_id, scope=scope)
+        writer = {
+            'csv': ReportExportService._iter_csv,
+            'ndjson': ReportExportService._iter_ndjson,
+            'xlsx': ReportExportService._iter_xlsx,
+        }[export_format]
+        return writer(batches, headers)
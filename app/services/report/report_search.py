@@ -0,0 +1,155 @@
+"""检测报告搜索模块
+
+为报告列表和搜索接口提供统一的关键字检索：
+- 报告编号快速路径: 输入形如报告编号（如 REP-20250813-）时，先在report_code唯一索引上
+  做前缀匹配（LIKE 'kw%'，可走索引范围扫描），完全匹配的排在最前；无结果时才进行下面的全字段检索
+- MySQL: 使用inspection_reports上的FULLTEXT(ngram)索引，MATCH ... AGAINST布尔模式检索，
+  返回值即相关度得分（索引由迁移 a7d2c4e9f1b3 创建）
+- 其他数据库（如测试使用的SQLite）或关键字短于ngram长度时: 退化为LIKE检索，
+  并按匹配的字段和位置（完全匹配 > 前缀匹配 > 包含）计算相关度
+"""
+import re
+from flask import current_app
+from app.db import db
+from app.models.report.inspection_report import InspectionReport
+
+# 参与检索的字段及其在LIKE检索中的权重
+SEARCH_FIELDS = (
+    ('report_code', 5),
+    ('project_name', 4),
+    ('client_unit', 3),
+    ('construction_unit', 2),
+    ('inspection_object', 2),
+)
+
+# MySQL ngram分词的默认长度（ngram_token_size），短于该长度的关键字无法命中全文索引
+NGRAM_TOKEN_SIZE = 2
+
+# 默认的报告编号形状：字母前缀 + '-' + 字母数字/'-'（如 REP-、REP-20250813-、REP-20250813-A1B2C3）
+# 可通过配置项REPORT_CODE_SEARCH_PATTERN覆盖
+DEFAULT_REPORT_CODE_PATTERN = r'^[A-Za-z]+-[A-Za-z0-9\-]*$'
+
+# 检索词作为短语放在双引号内，短语内的布尔运算符按字面处理，只需剔除双引号本身
+_PHRASE_DELIMITER = re.compile(r'"')
+
+
+def split_keywords(search_keyword):
+    """将搜索关键字按空白拆分为多个检索词（多个词之间为AND关系）"""
+    return [term for term in (search_keyword or '').split() if term]
+
+
+def escape_like(term):
+    """转义LIKE通配符，使用户输入的%和_按字面匹配"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class ReportSearchService:
+    """报告关键字检索"""
+
+    @staticmethod
+    def looks_like_report_code(search_keyword):
+        """判断输入是否为报告编号（或其前缀）的形状"""
+        pattern = current_app.config.get('REPORT_CODE_SEARCH_PATTERN') or DEFAULT_REPORT_CODE_PATTERN
+        return bool(re.match(pattern, search_keyword))
+
+    @staticmethod
+    def _report_code_fast_path(query, code):
+        """在report_code唯一索引上做前缀匹配
+
+        Returns:
+            tuple: (过滤后的查询, 相关度表达式)；没有任何匹配时返回(None, None)
+        """
+        fast_query = query.filter(InspectionReport.report_code.like(f'{escape_like(code)}%', escape='\\'))
+        # 只探测是否存在匹配，避免无结果时多做一次完整查询
+        if not db.session.query(fast_query.exists()).scalar():
+            return None, None
+        # 完全匹配的编号排在最前
+        score = db.case((InspectionReport.report_code == code, 1), else_=0)
+        return fast_query, score
+
+    @staticmethod
+    def use_fulltext(terms):
+        """判断当前环境和检索词是否可以使用全文索引"""
+        if not current_app.config.get('REPORT_SEARCH_FULLTEXT', True):
+            return False
+        if db.engine.dialect.name != 'mysql':
+            return False
+        # 检索词需满足ngram长度，否则全文索引无法命中
+        return all(len(_PHRASE_DELIMITER.sub('', term)) >= NGRAM_TOKEN_SIZE for term in terms)
+
+    @staticmethod
+    def _fulltext_expression(terms):
+        """构建MATCH ... AGAINST表达式，每个检索词作为必须命中的短语"""
+        from sqlalchemy.dialects.mysql import match
+        against = ' '.join(f'+"{_PHRASE_DELIMITER.sub("", term)}"' for term in terms)
+        columns = [getattr(InspectionReport, name) for name, _ in SEARCH_FIELDS]
+        return match(*columns, against=against).in_boolean_mode()
+
+    @staticmethod
+    def _like_filter(terms):
+        """构建LIKE过滤条件：每个检索词至少命中一个字段"""
+        conditions = []
+        for term in terms:
+            pattern = f'%{escape_like(term)}%'
+            conditions.append(db.or_(*[
+                getattr(InspectionReport, name).like(pattern, escape='\\')
+                for name, _ in SEARCH_FIELDS
+            ]))
+        return db.and_(*conditions)
+
+    @staticmethod
+    def _like_score(terms):
+        """构建LIKE检索的相关度表达式：字段权重 × 匹配程度（完全匹配3、前缀2、包含1）"""
+        score = None
+        for term in terms:
+            escaped = escape_like(term)
+            for name, weight in SEARCH_FIELDS:
+                column = getattr(InspectionReport, name)
+                expression = db.case(
+                    (column == term, weight * 3),
+                    (column.like(f'{escaped}%', escape='\\'), weight * 2),
+                    (column.like(f'%{escaped}%', escape='\\'), weight),
+                    else_=0
+                )
+                score = expression if score is None else score + expression
+        return score
+
+    @staticmethod
+    def apply(query, search_keyword):
+        """为查询添加关键字过滤条件
+
+        Args:
+            query (Query): InspectionReport查询
+            search_keyword (str): 搜索关键字，空白分隔的多个词之间为AND关系
+
+        Returns:
+            tuple: (过滤后的查询, 相关度表达式)；关键字为空时相关度表达式为None
+        """
+        terms = split_keywords(search_keyword)
+        if not terms:
+            return query, None
+        # 报告编号形状的输入优先走索引友好的前缀匹配，无结果时再进行全字段检索
+        if len(terms) == 1 and ReportSearchService.looks_like_report_code(terms[0]):
+            fast_query, score = ReportSearchService._report_code_fast_path(query, terms[0])
+            if fast_query is not None:
+                return fast_query, score
+        if ReportSearchService.use_fulltext(terms):
+            expression = ReportSearchService._fulltext_expression(terms)
+            return query.filter(expression > 0), expression
+        return query.filter(ReportSearchService._like_filter(terms)), ReportSearchService._like_score(terms)
+
+    @staticmethod
+    def apply_ranked(query, search_keyword):
+        """为查询添加关键字过滤条件，并按相关度降序、创建时间降序排序
+
+        Args:
+            query (Query): InspectionReport查询
+            search_keyword (str): 搜索关键字
+
+        Returns:
+            Query: 已排序的查询；关键字为空时按创建时间降序
+        """
+        query, score = ReportSearchService.apply(query, search_keyword)
+        if score is None:
+            return query.order_by(InspectionReport.created_at.desc())
+        return query.order_by(score.desc(), InspectionReport.created_at.desc())
@@ -1,42 +1,84 @@
+from flask import current_app
 from app.db import db
 from app.models.report.inspection_report import InspectionReport
 from app.models.user.user import User
 from app.services.permission_service import PermissionService
+from app.services.report.report_search import ReportSearchService
+from app.services.report.report_counter import ReportCounterService, DEFAULT_STATUS
 import logging
 import datetime
+import base64
+import json
 from app.utils.date_time import string_to_datetime, datetime_to_string
+from app.utils.identity import get_request_user
+from app.utils.db_router import use_replica
+from app.utils.http_cache import make_etag
+from app.utils.user_utils import get_user_nicknames
+
+# 批量创建时需要解析的日期字段及其名称（按校验顺序）
+BATCH_DATE_FIELDS = (
+    ('commission_date', '委托日期'),
+    ('acceptance_date', '受理日期'),
+    ('sampling_date', '抽样日期'),
+    ('start_date', '开始日期'),
+    ('end_date', '结束日期'),
+    ('tester_date', '检测完成日期'),
+    ('review_date', '审核日期'),
+    ('approve_date', '批准日期'),
+    ('issue_date', '签发日期'),
+)
+
+# 批量创建时必须提供的字段
+BATCH_REQUIRED_FIELDS = (
+    'project_name', 'client_unit', 'inspection_unit',
+    'inspection_object', 'inspection_type', 'inspection_conclusion'
+)
+
+# 批量创建时直接取自提交数据的可选字段
+BATCH_OPTIONAL_FIELDS = (
+    'qrcode_content', 'attachment_paths',
+    'project_location', 'project_type', 'project_stage', 'construction_unit',
+    'contractor', 'supervisor', 'witness_unit', 'remarks',
+    'client_contact', 'commission_code',
+    'certificate_no', 'contact_address', 'contact_phone',
+    'object_part', 'object_spec', 'design_spec',
+    'inspection_items', 'test_items', 'inspection_quantity', 'measurement_unit', 'conclusion_description',
+    'sampling_method', 'sampler', 'inspection_code', 'inspector',
+    'reviewer', 'approver',
+)
 
 class ReportService:
     @staticmethod
     def get_total_reports_count():
-        """获取数据库中检测报告的总条数(包含已删除)"""
-        return InspectionReport.query.count()
+        """获取数据库中检测报告的总条数(包含已删除)，读取增量维护的计数"""
+        return ReportCounterService.get_total_count()
 
     @staticmethod
     def get_total_active_reports_count():
-        """获取数据库中未软删除的检测报告总条数"""
-        return InspectionReport.query.filter_by(is_deleted=False).count()
+        """获取数据库中未软删除的检测报告总条数，读取增量维护的计数"""
+        return ReportCounterService.get_active_count()
 
     @staticmethod
-    def get_reports_paginated(page=1, per_page=10, search_keyword='', user_id=None, scope='all'):
-        """分页获取检测报告
+    def get_report_counts():
+        """获取报告计数汇总：总数、有效数，以及有效报告按登记人、按状态的分布"""
+        return ReportCounterService.get_summary()
+
+    @staticmethod
+    def _build_reports_query(user_id=None, scope='all'):
+        """构建报告列表基础查询（未软删除、权限范围过滤），供分页、游标分页和搜索共用
 
         Args:
-            page (int): 当前页码
-            per_page (int): 每页条数
-            search_keyword (str): 搜索关键字
             user_id (int): 用户ID，用于权限过滤
             scope (str): 权限范围，'all'或'own'
 
         Returns:
-            dict: 包含报告列表和分页信息的字典
+            Query: 未排序的查询对象
         """
-        per_page = min(per_page, 1000)
         # 只查询未软删除的报告
         query = InspectionReport.query.filter_by(is_deleted=False)
 
         # 如果scope为'own'且提供了user_id，添加registrant_id过滤
-        
+
         # 确保user_id为整数类型
         try:
             user_id_int = int(user_id)
@@ -46,20 +88,34 @@ class ReportService:
 
         if scope == 'own' and user_id_int is not None:
             query = query.filter_by(registrant_id=user_id_int)
+        return query
 
-        # 如果提供了搜索关键字，添加模糊查询条件
-        if search_keyword:
-            query = query.filter(
-                db.or_(
-                    InspectionReport.project_name.like(f'%{search_keyword}%'),
-                    InspectionReport.report_code.like(f'%{search_keyword}%')
-                )
-            )
-        
-        pagination = query.order_by(
-            InspectionReport.created_at.desc()
+    @staticmethod
+    @use_replica()
+    def get_reports_paginated(page=1, per_page=10, search_keyword='', user_id=None, scope='all', fields=None):
+        """分页获取检测报告
+
+        Args:
+            page (int): 当前页码
+            per_page (int): 每页条数
+            search_keyword (str): 搜索关键字
+            user_id (int): 用户ID，用于权限过滤
+            scope (str): 权限范围，'all'或'own'
+            fields (tuple): 只查询和返回这些字段（InspectionReport.parse_fields的结果），None表示全部字段
+
+        Returns:
+            dict: 包含报告列表和分页信息的字典
+        """
+        per_page = min(per_page, 1000)
+        query = ReportService._build_reports_query(user_id, scope)
+        if fields is not None:
+            query = query.options(InspectionReport.load_only_option(fields))
+
+        # 提供了搜索关键字时按相关度排序，否则按创建时间倒序
+        pagination = ReportSearchService.apply_ranked(
+            query, search_keyword
         ).paginate(page=page, per_page=per_page, error_out=False)
-        reports = [report.to_dict() for report in pagination.items]
+        reports = InspectionReport.to_dict_list(pagination.items, fields)
         return {
             'reports': reports,
             'pagination': {
@@ -71,16 +127,132 @@ class ReportService:
         }
 
     @staticmethod
-    def get_all_reports():
+    def _encode_cursor(report):
+        """将报告的(created_at, id)编码为不透明的游标字符串"""
+        payload = json.dumps({
+            'created_at': report.created_at.strftime('%Y-%m-%d %H:%M:%S.%f') if report.created_at else None,
+            'id': report.id
+        })
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        """解析游标字符串
+
+        Returns:
+            tuple: (created_at, id)，created_at可能为None
+
+        Raises:
+            ValueError: 游标格式不正确
+        """
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            created_at = payload['created_at']
+            if created_at is not None:
+                created_at = datetime.datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
+            return created_at, int(payload['id'])
+        except Exception:
+            raise ValueError('无效的分页游标')
+
+    @staticmethod
+    def _apply_keyset(query, created_at, report_id):
+        """只保留按(created_at, id)倒序排列时位于指定记录之后的报告
+
+        MySQL和SQLite倒序排列时created_at为NULL的记录排在最后
+
+        Args:
+            query (Query): InspectionReport查询
+            created_at (datetime): 上一条记录的创建时间，可能为None
+            report_id (int): 上一条记录的ID
+
+        Returns:
+            Query: 添加了过滤条件的查询
+        """
+        if created_at is None:
+            return query.filter(InspectionReport.created_at.is_(None), InspectionReport.id < report_id)
+        return query.filter(
+            db.or_(
+                InspectionReport.created_at < created_at,
+                db.and_(
+                    InspectionReport.created_at == created_at,
+                    InspectionReport.id < report_id
+                ),
+                InspectionReport.created_at.is_(None)
+            )
+        )
+
+    @staticmethod
+    @use_replica()
+    def get_reports_by_cursor(cursor=None, per_page=10, search_keyword='', user_id=None, scope='all', with_total=False,
+                              fields=None):
+        """游标（keyset）分页获取检测报告
+
+        按(created_at, id)倒序排列，通过上一页最后一条记录定位下一页，
+        避免OFFSET扫描；默认不执行COUNT查询
+
+        Args:
+            cursor (str): 上一页返回的next_cursor，为空时获取第一页
+            per_page (int): 每页条数
+            search_keyword (str): 搜索关键字
+            user_id (int): 用户ID，用于权限过滤
+            scope (str): 权限范围，'all'或'own'
+            with_total (bool): 是否返回搜索结果总条数（需要额外的COUNT查询）
+            fields (tuple): 只查询和返回这些字段，None表示全部字段
+
+        Returns:
+            dict: 包含报告列表和游标分页信息的字典
+
+        Raises:
+            ValueError: 游标格式不正确
+        """
+        per_page = max(1, min(per_page, 1000))
+        query = ReportService._build_reports_query(user_id, scope)
+        # 游标依赖(created_at, id)排序，关键字只用于过滤，不按相关度排序
+        query, _ = ReportSearchService.apply(query, search_keyword)
+        total_items = query.count() if with_total else None
+        if fields is not None:
+            # 游标由最后一条记录的(created_at, id)生成，created_at总需要加载
+            query = query.options(InspectionReport.load_only_option(fields, extra=('created_at',)))
+
+        if cursor:
+            query = ReportService._apply_keyset(query, *ReportService._decode_cursor(cursor))
+
+        # 多取一条用于判断是否还有下一页
+        items = query.order_by(
+            InspectionReport.created_at.desc(),
+            InspectionReport.id.desc()
+        ).limit(per_page + 1).all()
+        has_more = len(items) > per_page
+        items = items[:per_page]
+
+        pagination = {
+            'per_page': per_page,  # 每页条数
+            'next_cursor': ReportService._encode_cursor(items[-1]) if has_more else None,  # 下一页游标
+            'has_more': has_more  # 是否还有下一页
+        }
+        if with_total:
+            pagination['total_items'] = total_items  # 搜索结果总条数
+        return {
+            'reports': InspectionReport.to_dict_list(items, fields),
+            'pagination': pagination
+        }
+
+    @staticmethod
+    @use_replica()
+    def get_all_reports(fields=None):
         """获取所有未软删除的报告
 
+        Args:
+            fields (tuple): 只查询和返回这些字段，None表示全部字段
+
         Returns:
             list: 报告字典列表
         """
-        reports = InspectionReport.query.filter_by(is_deleted=False).order_by(
-            InspectionReport.created_at.desc()
-        ).all()
-        return [report.to_dict() for report in reports]
+        query = InspectionReport.query.filter_by(is_deleted=False)
+        if fields is not None:
+            query = query.options(InspectionReport.load_only_option(fields))
+        reports = query.order_by(InspectionReport.created_at.desc()).all()
+        return InspectionReport.to_dict_list(reports, fields)
 
     @staticmethod
     def get_reports_by_codes(report_codes, user_id, has_all_permission):
@@ -116,9 +288,12 @@ class ReportService:
             for report in reports:
                 # 如果有'all'权限或报告属于当前用户，则添加到结果中
                 if has_all_permission or str(report.registrant_id) == user_id:
-                    filtered_reports.append(report.to_dict())
+                    filtered_reports.append(report)
                 report_code_set.remove(report.report_code)
 
+            # 统一批量序列化，避免逐行查询登记人/修改人昵称
+            filtered_reports = InspectionReport.to_dict_list(filtered_reports)
+
             # 添加未找到的报告编号到失败列表
             failed_codes.extend(report_code_set)
 
@@ -176,75 +351,219 @@ class ReportService:
         """软删除报告：将报告标记为已删除但不实际从数据库中删除"""
         report = InspectionReport.query.filter_by(report_code=report_code).first()
         if report:
+            # 已删除的报告再次删除时快照为空，不会重复扣减计数
+            counter_before = ReportCounterService.snapshot([report])
             report.is_deleted = True
             db.session.commit()
+            ReportCounterService.on_changed(counter_before, [])
             return {'success': True, 'message': '报告已成功删除'}
         return {'success': False, 'message': '未找到该报告'}
 
     @staticmethod
-    def batch_soft_delete_reports(report_codes):
-        """批量软删除报告"""
-        success_count = 0
-        failed_count = 0
+    def batch_soft_delete_reports(report_codes, user_id=None, scope='all'):
+        """批量软删除报告
+
+        先用一次IN查询取出所有目标报告，在内存中判断每个编号的结果，
+        再用一条 UPDATE ... WHERE report_code IN (...) AND is_deleted = 0 完成删除
+        （编号数量超过REPORT_BATCH_CHUNK_SIZE时分块执行）
+
+        Args:
+            report_codes (list): 报告编号列表
+            user_id (int, optional): 当前用户ID，scope为own时只能删除该用户登记的报告. Defaults to None.
+            scope (str, optional): 权限范围，all或own. Defaults to 'all'.
+
+        Returns:
+            dict: 包含删除结果的字典，data.results中为每个编号的结果，
+                  status取值: deleted / not_found / not_owned / already_deleted / duplicate
+                  （duplicate表示该编号在本次提交中重复出现，结果以第一次出现时为准）
+        """
+        chunk_size = current_app.config.get('REPORT_BATCH_CHUNK_SIZE', 1000)
+        # 去重并保持提交顺序
+        unique_codes = list(dict.fromkeys(code for code in report_codes if isinstance(code, str)))
+
+        reports = {}
+        for start in range(0, len(unique_codes), chunk_size):
+            rows = db.session.query(
+                InspectionReport.report_code,
+                InspectionReport.registrant_id,
+                InspectionReport.report_status,
+                InspectionReport.is_deleted
+            ).filter(
+                InspectionReport.report_code.in_(unique_codes[start:start + chunk_size])
+            ).all()
+            reports.update({row.report_code: row for row in rows})
+
+        results = []
         failed_reports = []
-        
+        delete_codes = []
+        seen_codes = set()
         for code in report_codes:
-            report = InspectionReport.query.filter_by(report_code=code).first()
-            if report:
-                report.is_deleted = True
-                success_count += 1
+            report = reports.get(code) if isinstance(code, str) else None
+            if isinstance(code, str) and code in seen_codes:
+                status, message = 'duplicate', '报告编号重复提交'
+            elif not report:
+                status, message = 'not_found', '未找到该报告'
+            elif report.is_deleted:
+                status, message = 'already_deleted', '该报告已被删除'
+            elif scope == 'own' and str(report.registrant_id) != str(user_id):
+                status, message = 'not_owned', '无权限删除该报告，该报告不属于您'
             else:
-                failed_count += 1
-                failed_reports.append({'report_code': code, 'message': '未找到该报告'})
-        
-        db.session.commit()
-        
+                status, message = 'deleted', '报告已成功删除'
+                delete_codes.append(code)
+            if isinstance(code, str):
+                seen_codes.add(code)
+            results.append({'report_code': code, 'status': status, 'message': message})
+            if status != 'deleted':
+                failed_reports.append({'report_code': code, 'message': message})
+
+        deleted_count = 0
+        try:
+            for start in range(0, len(delete_codes), chunk_size):
+                query = InspectionReport.query.filter(
+                    InspectionReport.report_code.in_(delete_codes[start:start + chunk_size]),
+                    InspectionReport.is_deleted == False
+                )
+                if scope == 'own':
+                    query = query.filter(InspectionReport.registrant_id == user_id)
+                deleted_count += query.update({InspectionReport.is_deleted: True}, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"批量删除报告失败: {str(e)}")
+            return {
+                'success': False,
+                'message': f'批量删除报告失败: {str(e)}',
+                'code': 500,
+                'data': {
+                    'total_count': len(report_codes),
+                    'success_count': 0,
+                    'failed_count': len(report_codes),
+                    'failed_reports': [],
+                    'results': []
+                }
+            }
+
+        if deleted_count != len(delete_codes):
+            # 预查询与UPDATE之间有并发修改，计数以定时校准为准
+            logging.warning(f"批量删除报告: 预期删除 {len(delete_codes)} 个，实际删除 {deleted_count} 个")
+        # 计数在整批提交后更新一次
+        ReportCounterService.on_changed(
+            ReportCounterService.snapshot_mappings([
+                {
+                    'is_deleted': False,
+                    'report_status': reports[code].report_status,
+                    'registrant_id': reports[code].registrant_id
+                }
+                for code in delete_codes
+            ]),
+            []
+        )
+
+        success_count = len(delete_codes)
+        failed_count = len(failed_reports)
         return {
             'success': True,
-            'total_count': len(report_codes),
-            'success_count': success_count,
-            'failed_count': failed_count,
-            'failed_reports': failed_reports,
-            'message': f'成功删除 {success_count} 个报告，失败 {failed_count} 个'
+            'message': f'成功删除 {success_count} 个报告，失败 {failed_count} 个',
+            'code': 200,
+            'data': {
+                'total_count': len(report_codes),
+                'success_count': success_count,
+                'failed_count': failed_count,
+                'failed_reports': failed_reports,
+                'results': results
+            }
         }
 
+    @staticmethod
+    def _parse_batch_dates(data, date_cache):
+        """解析一行批量创建数据中的日期字段
+
+        Args:
+            data (dict): 报告数据
+            date_cache (dict): {日期字符串: date或None}，同一批数据中重复出现的日期只解析一次
+
+        Returns:
+            tuple: (日期字段字典, 错误信息)；解析成功时错误信息为None
+        """
+        dates = {}
+        for field, label in BATCH_DATE_FIELDS:
+            value = data.get(field)
+            if not value:
+                dates[field] = None
+                continue
+            if value not in date_cache:
+                try:
+                    # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
+                    date_cache[value] = string_to_datetime(value).date()
+                except ValueError:
+                    date_cache[value] = None
+            if date_cache[value] is None:
+                return None, f'{label}格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
+            dates[field] = date_cache[value]
+        return dates, None
+
     @staticmethod
     def batch_create_reports(reports_data, user_id):
         """批量创建报告
 
+        按集合处理整批数据：
+        1. 用IN查询一次性取出已存在的报告编号（每REPORT_BATCH_CHUNK_SIZE个编号一次查询）
+        2. 单次遍历完成编号查重（包括本批内重复）、日期解析和必填字段校验，生成插入数据
+        3. 按REPORT_BATCH_CHUNK_SIZE分块执行多行INSERT，整批在同一事务中提交
+
         Args:
             reports_data (list): 报告数据列表
             user_id (int): 当前登录用户ID
 
         Returns:
-            dict: 包含创建结果的字典
+            dict: 包含创建结果的字典，data中created_report_codes为成功创建的报告编号
         """
         try:
             # 检查用户是否存在
-            user = User.query.get(user_id)
+            user = get_request_user(user_id)
             if not user:
                 return {'success': False, 'message': '用户不存在', 'code': 404}
 
-            success_count = 0
-            failed_count = 0
+            chunk_size = current_app.config.get('REPORT_BATCH_CHUNK_SIZE', 1000)
             failed_reports = []
-            created_reports = []
+            mappings = []
+            current_time = datetime.datetime.now(datetime.timezone.utc)
 
+            # 一次性查出已存在的报告编号，避免逐行查询
+            submitted_codes = list({
+                data['report_code'] for data in reports_data
+                if isinstance(data, dict) and isinstance(data.get('report_code'), str) and data['report_code']
+            })
+            existing_codes = set()
+            for start in range(0, len(submitted_codes), chunk_size):
+                rows = db.session.query(InspectionReport.report_code).filter(
+                    InspectionReport.report_code.in_(submitted_codes[start:start + chunk_size])
+                ).all()
+                existing_codes.update(row.report_code for row in rows)
+
+            accepted_codes = set()
+            date_cache = {}
             for data in reports_data:
                 try:
                     # 确保报告编号必须存在
                     if 'report_code' not in data or not data['report_code']:
-                        failed_count += 1
                         failed_reports.append({
                             'data': data,
                             'message': '报告编号必须上传'
                         })
                         continue
+                    # 非字符串的编号（如数字123）不在上面的查重范围内，写入时会被数据库转换为字符串，
+                    # 可能在提交时违反唯一索引导致整批失败，因此逐行拒绝
+                    if not isinstance(data['report_code'], str):
+                        failed_reports.append({
+                            'data': data,
+                            'message': '报告编号必须是字符串'
+                        })
+                        continue
 
-                    # 检查报告编号是否已存在
-                    existing_report = InspectionReport.query.filter_by(report_code=data['report_code']).first()
-                    if existing_report:
-                        failed_count += 1
+                    # 检查报告编号是否已存在（数据库中或本批前面的数据中）
+                    report_code = data['report_code']
+                    if report_code in existing_codes or report_code in accepted_codes:
                         failed_reports.append({
                             'data': data,
                             'message': '报告编号已存在'
@@ -252,239 +571,63 @@ class ReportService:
                         continue
 
                     # 解析日期字段
-                    # 委托日期解析
-                    commission_date_str = data.get('commission_date')
-                    if commission_date_str:
-                        try:
-                            # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                            commission_date = string_to_datetime(commission_date_str).date()
-                        except ValueError:
-                            failed_count += 1
-                            failed_reports.append({
-                                'data': data,
-                                'message': '委托日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
-                            })
-                            continue
-                    else:
-                        commission_date = datetime.datetime.now(datetime.timezone.utc).date()
-
-                    # 受理日期解析
-                    acceptance_date_str = data.get('acceptance_date')
-                    if acceptance_date_str:
-                        try:
-                            # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                            acceptance_date = string_to_datetime(acceptance_date_str).date()
-                        except ValueError:
-                            failed_count += 1
-                            failed_reports.append({
-                                'data': data,
-                                'message': '受理日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
-                            })
-                            continue
-                    else:
-                        acceptance_date = None
-
-                    # 抽样日期解析
-                    sampling_date_str = data.get('sampling_date')
-                    if sampling_date_str:
-                        try:
-                            # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                            sampling_date = string_to_datetime(sampling_date_str).date()
-                        except ValueError:
-                            failed_count += 1
-                            failed_reports.append({
-                                'data': data,
-                                'message': '抽样日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
-                            })
-                            continue
-                    else:
-                        sampling_date = None
-
-                    # 开始日期解析
-                    start_date_str = data.get('start_date')
-                    if start_date_str:
-                        try:
-                            # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                            start_date = string_to_datetime(start_date_str).date()
-                        except ValueError:
-                            failed_count += 1
-                            failed_reports.append({
-                                'data': data,
-                                'message': '开始日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
-                            })
-                            continue
-                    else:
-                        start_date = None
-
-                    # 结束日期解析
-                    end_date_str = data.get('end_date')
-                    if end_date_str:
-                        try:
-                            # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                            end_date = string_to_datetime(end_date_str).date()
-                        except ValueError:
-                            failed_count += 1
-                            failed_reports.append({
-                                'data': data,
-                                'message': '结束日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
-                            })
-                            continue
-                    else:
-                        end_date = None
-
-                    # 检测完成日期解析
-                    tester_date_str = data.get('tester_date')
-                    if tester_date_str:
-                        try:
-                            # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                            tester_date = string_to_datetime(tester_date_str).date()
-                        except ValueError:
-                            failed_count += 1
-                            failed_reports.append({
-                                'data': data,
-                                'message': '检测完成日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
-                            })
-                            continue
-                    else:
-                        tester_date = None
-
-                    # 审核日期解析
-                    review_date_str = data.get('review_date')
-                    if review_date_str:
-                        try:
-                            # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                            review_date = string_to_datetime(review_date_str).date()
-                        except ValueError:
-                            failed_count += 1
-                            failed_reports.append({
-                                'data': data,
-                                'message': '审核日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
-                            })
-                            continue
-                    else:
-                        review_date = None
-
-                    # 批准日期解析
-                    approve_date_str = data.get('approve_date')
-                    if approve_date_str:
-                        try:
-                            # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                            approve_date = string_to_datetime(approve_date_str).date()
-                        except ValueError:
-                            failed_count += 1
-                            failed_reports.append({
-                                'data': data,
-                                'message': '批准日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
-                            })
-                            continue
-                    else:
-                        approve_date = None
-
-                    # 签发日期解析
-                    issue_date_str = data.get('issue_date')
-                    if issue_date_str:
-                        try:
-                            # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                            issue_date = string_to_datetime(issue_date_str).date()
-                        except ValueError:
-                            failed_count += 1
-                            failed_reports.append({
-                                'data': data,
-                                'message': '签发日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式'
-                            })
-                            continue
-                    else:
-                        issue_date = None
+                    dates, error = ReportService._parse_batch_dates(data, date_cache)
+                    if error:
+                        failed_reports.append({
+                            'data': data,
+                            'message': error
+                        })
+                        continue
+                    # 委托日期未填写时默认为当天
+                    if dates['commission_date'] is None:
+                        dates['commission_date'] = current_time.date()
 
-                    # 创建新报告
-                    current_time = datetime.datetime.now(datetime.timezone.utc)
+                    # 检查必填字段
+                    missing_fields = [field for field in BATCH_REQUIRED_FIELDS if field not in data]
+                    if missing_fields:
+                        failed_reports.append({
+                            'data': data,
+                            'message': f'缺少必填字段: {missing_fields}'
+                        })
+                        continue
 
-                    new_report = InspectionReport(
-                        # 报告标识信息
-                        report_code=data['report_code'],
-                        report_status=data.get('report_status'),
+                    mapping = {field: data.get(field) for field in BATCH_OPTIONAL_FIELDS}
+                    mapping.update({field: data[field] for field in BATCH_REQUIRED_FIELDS})
+                    mapping.update(dates)
+                    # 所有行使用相同的列集合（None按NULL写入），有默认值的列在这里显式赋值，
+                    # 使每个分块只生成一条多行INSERT
+                    mapping.update(
+                        report_code=report_code,
+                        report_status=data.get('report_status') or DEFAULT_STATUS,
                         report_date=current_time.date(),
-                        qrcode_content=data.get('qrcode_content'),
-                        attachment_paths=data.get('attachment_paths'),
-
-                        # 工程基本信息
-                        project_name=data['project_name'],
-                        project_location=data.get('project_location'),
-                        project_type=data.get('project_type'),
-                        project_stage=data.get('project_stage'),
-                        construction_unit=data.get('construction_unit'),
-                        contractor=data.get('contractor'),
-                        supervisor=data.get('supervisor'),
-                        witness_unit=data.get('witness_unit'),
-                        remarks=data.get('remarks'),
-
-                        # 委托与受理信息
-                        client_unit=data['client_unit'],
-                        client_contact=data.get('client_contact'),
-                        acceptance_date=acceptance_date,
-                        commission_date=commission_date,
-                        commission_code=data.get('commission_code'),
                         salesperson=data.get('salesperson', ''),
-
-                        # 检测机构与资质
-                        inspection_unit=data['inspection_unit'],
-                        certificate_no=data.get('certificate_no'),
-                        contact_address=data.get('contact_address'),
-                        contact_phone=data.get('contact_phone'),
-
-                        # 检测对象与参数
-                        inspection_object=data['inspection_object'],
-                        object_part=data.get('object_part'),
-                        object_spec=data.get('object_spec'),
-                        design_spec=data.get('design_spec'),
-                        inspection_type=data['inspection_type'],
-
-                        # 检测项目与结果
-                        inspection_items=data.get('inspection_items'),
-                        test_items=data.get('test_items'),
-                        inspection_quantity=data.get('inspection_quantity'),
-                        measurement_unit=data.get('measurement_unit'),
-                        inspection_conclusion=data['inspection_conclusion'],
-                        conclusion_description=data.get('conclusion_description'),
-                        is_recheck=data.get('is_recheck', False),
-
-                        # 抽样与检测流程
-                        sampling_method=data.get('sampling_method'),
-                        sampling_date=sampling_date,
-                        sampler=data.get('sampler'),
-                        start_date=start_date,
-                        end_date=end_date,
-                        inspection_code=data.get('inspection_code'),
-                        inspector=data.get('inspector'),
-                        tester_date=tester_date,
-
-                        # 审批与归档
-                        review_date=review_date,
-                        reviewer=data.get('reviewer'),
-                        approve_date=approve_date,
-                        approver=data.get('approver'),
-                        issue_date=issue_date,
-                        # 其他字段
+                        is_recheck=bool(data.get('is_recheck', False)),
                         created_at=current_time,
                         updated_at=current_time,
                         is_deleted=False,
-                        registrant_id=user_id,
+                        registrant_id=int(user_id),
                         registrant=user.username,
-                        last_modified_by_id=user_id
+                        last_modified_by_id=int(user_id)
                     )
-
-                    db.session.add(new_report)
-                    created_reports.append(new_report.to_dict())
-                    success_count += 1
+                    mappings.append(mapping)
+                    accepted_codes.add(report_code)
 
                 except Exception as e:
-                    failed_count += 1
                     failed_reports.append({
                         'data': data,
                         'message': f'创建失败: {str(e)}'
                     })
 
+            for start in range(0, len(mappings), chunk_size):
+                db.session.bulk_insert_mappings(
+                    InspectionReport, mappings[start:start + chunk_size], render_nulls=True
+                )
+            counter_snapshots = ReportCounterService.snapshot_mappings(mappings)
             db.session.commit()
+            ReportCounterService.on_created(counter_snapshots)
+
+            success_count = len(mappings)
+            failed_count = len(failed_reports)
             return {
                 'success': True,
                 'message': f'批量创建报告完成，成功 {success_count} 个，失败 {failed_count} 个',
@@ -494,7 +637,7 @@ class ReportService:
                     'success_count': success_count,
                     'failed_count': failed_count,
                     'failed_reports': failed_reports,
-                    'created_reports': created_reports
+                    'created_report_codes': [mapping['report_code'] for mapping in mappings]
                 }
             }
 
@@ -512,19 +655,24 @@ class ReportService:
     def batch_update_reports(reports_data, user_id):
         """批量更新报告
 
+        按集合处理整批数据：
+        1. 用IN查询一次性取出所有目标报告（每REPORT_BATCH_CHUNK_SIZE个编号一次查询），按编号建立字典
+        2. 在内存中完成存在性、归属权限、必填字段和日期格式校验，生成更新数据
+           （校验失败的条目不会修改对应报告）
+        3. 按REPORT_BATCH_CHUNK_SIZE分块执行bulk_update_mappings，整批在同一事务中提交
+
         Args:
             reports_data (list): 报告更新数据列表，每个元素包含report_code和要更新的字段
             user_id (int): 当前登录用户ID
 
         Returns:
-            dict: 包含更新结果的字典
+            dict: 包含更新结果的字典，data中updated_report_codes为成功更新的报告编号
         """
         try:
-            success_count = 0
-            failed_count = 0
             failed_reports = []
-            updated_reports = []
+            updated_report_codes = []
             current_time = datetime.datetime.now(datetime.timezone.utc)
+            chunk_size = current_app.config.get('REPORT_BATCH_CHUNK_SIZE', 1000)
 
             # 日期字段列表，需要从模型定义中同步更新
             date_fields = ['commission_date', 'report_date', 'acceptance_date', 'sampling_date', 
@@ -535,10 +683,12 @@ class ReportService:
             # 必填字段列表
             required_fields = ['project_name', 'client_unit', 'inspection_object', 'inspection_type', 'inspection_conclusion', 'inspection_unit']
 
+            # 可更新的字段：除主键外的所有列（报告编号已在下面单独移除）
+            updatable_fields = set(InspectionReport.__table__.columns.keys()) - {'id'}
+
             # 检查用户是否拥有'inspection_report'的'edit'权限且scope为'all'
-            # 注意：需要先获取user对象，这里假设通过user_id从数据库获取
-            # 实际应用中可能需要根据项目架构调整获取方式
-            user = User.query.get(user_id)
+            # 在请求中调用时复用permission_required已加载的用户身份
+            user = get_request_user(user_id)
             if not user:
                 return {
                     'success': False,
@@ -549,17 +699,38 @@ class ReportService:
                         'success_count': 0,
                         'failed_count': len(reports_data),
                         'failed_reports': [{'data': item, 'message': '无法获取当前用户信息'} for item in reports_data],
-                        'updated_reports': []
+                        'updated_report_codes': []
                     }
                 }
             
             has_all_permission = PermissionService.has_user_permission(user, 'inspection_report', 'edit', 'all')
 
+            # 一次性查出所有目标报告，只取校验和计数需要的列
+            submitted_codes = list({
+                item['report_code'].strip() for item in reports_data
+                if isinstance(item, dict) and isinstance(item.get('report_code'), str)
+            })
+            reports = {}
+            for start in range(0, len(submitted_codes), chunk_size):
+                rows = db.session.query(
+                    InspectionReport.id,
+                    InspectionReport.report_code,
+                    InspectionReport.registrant_id,
+                    InspectionReport.report_status,
+                    InspectionReport.is_deleted
+                ).filter(
+                    InspectionReport.report_code.in_(submitted_codes[start:start + chunk_size]),
+                    InspectionReport.is_deleted == False
+                ).all()
+                reports.update({row.report_code: row for row in rows})
+
+            # {报告ID: 更新数据}，同一报告出现多次时按提交顺序合并
+            mappings = {}
+            date_cache = {}
             for item in reports_data:
                 try:
                     # 检查是否包含report_code
                     if 'report_code' not in item:
-                        failed_count += 1
                         failed_reports.append({
                             'data': item,
                             'message': '缺少report_code字段'
@@ -571,10 +742,9 @@ class ReportService:
                     update_data = item.copy()
                     del update_data['report_code']
 
-                    # 查询报告
-                    report = InspectionReport.query.filter_by(report_code=report_code, is_deleted=False).first()
+                    # 查找报告
+                    report = reports.get(report_code)
                     if not report:
-                        failed_count += 1
                         failed_reports.append({
                             'data': item,
                             'message': f'未找到报告编号为{report_code}的报告或报告已被删除'
@@ -582,8 +752,7 @@ class ReportService:
                         continue
 
                     # 如果用户没有'all'权限，检查报告是否属于当前用户
-                    if not has_all_permission and str(report.registrant_id) != user_id:
-                        failed_count += 1
+                    if not has_all_permission and str(report.registrant_id) != str(user_id):
                         failed_reports.append({
                             'data': item,
                             'message': f'无权限修改报告编号为{report_code}的报告，该报告不属于您'
@@ -596,71 +765,77 @@ class ReportService:
                         if field in update_data and not update_data[field]:
                             missing_fields.append(field)
                     if missing_fields:
-                        failed_count += 1
                         failed_reports.append({
                             'data': item,
                             'message': f'缺少必填字段: {missing_fields}'
                         })
                         continue
 
-                    # 更新报告字段
-                    update_success = True
+                    # 生成更新数据，忽略不存在的字段
+                    changes = {}
+                    error = None
                     for key, value in update_data.items():
-                        if hasattr(report, key):
-                            # 处理日期字段
-                            if key in date_fields and value:
-                                try:
-                                    # 检查value是否已经是datetime.date类型
-                                    if isinstance(value, datetime.date):
-                                        date_value = value
-                                    else:
-                                        # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
-                                        date_value = string_to_datetime(value).date()
-                                    setattr(report, key, date_value)
-                                except ValueError as ve:
-                                    failed_count += 1
-                                    failed_reports.append({
-                                        'data': item,
-                                        'message': f'{key}日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式: {str(ve)}'
-                                    })
-                                    update_success = False
-                                    # 跳过当前报告的其他字段更新
-                                    break
-                            # 处理日期时间字段
-                            elif key in datetime_fields and value:
+                        if key not in updatable_fields:
+                            continue
+                        # 处理日期字段
+                        if key in date_fields and value and not isinstance(value, datetime.date):
+                            if value not in date_cache:
                                 try:
-                                    # 不指定格式，利用string_to_datetime函数的自动匹配功能
-                                    datetime_value = string_to_datetime(value)
-                                    setattr(report, key, datetime_value)
+                                    # 不指定格式，让string_to_datetime函数自动识别日期格式（包括中文格式）
+                                    date_cache[value] = string_to_datetime(value).date()
                                 except ValueError as ve:
-                                    failed_count += 1
-                                    failed_reports.append({
-                                        'data': item,
-                                        'message': f'{key}日期时间格式不正确，支持的格式有: YYYY-MM-DD HH:MM:SS, YYYY/MM/DD HH:MM:SS等: {str(ve)}'
-                                    })
-                                    update_success = False
-                                    # 跳过当前报告的其他字段更新
-                                    break
-                            else:
-                                setattr(report, key, value)
-                        # 忽略不存在的字段
+                                    date_cache[value] = ve
+                            if isinstance(date_cache[value], ValueError):
+                                error = f'{key}日期格式不正确，请使用YYYY-MM-DD、YYYY/MM/DD、YYYY年MM月DD日等格式: {str(date_cache[value])}'
+                                break
+                            value = date_cache[value]
+                        # 处理日期时间字段
+                        elif key in datetime_fields and value:
+                            try:
+                                # 不指定格式，利用string_to_datetime函数的自动匹配功能
+                                value = string_to_datetime(value)
+                            except ValueError as ve:
+                                error = f'{key}日期时间格式不正确，支持的格式有: YYYY-MM-DD HH:MM:SS, YYYY/MM/DD HH:MM:SS等: {str(ve)}'
+                                break
+                        changes[key] = value
+                    if error:
+                        failed_reports.append({
+                            'data': item,
+                            'message': error
+                        })
+                        continue
 
-                    if update_success:
-                        # 设置最后修改人和更新时间
-                        report.last_modified_by_id = int(user_id)
-                        report.updated_at = current_time
-                        
-                        updated_reports.append(report.to_dict())
-                        success_count += 1
+                    # 设置最后修改人和更新时间
+                    changes['last_modified_by_id'] = int(user_id)
+                    changes['updated_at'] = current_time
+                    mappings.setdefault(report.id, {'id': report.id}).update(changes)
+                    updated_report_codes.append(report_code)
 
                 except Exception as e:
-                    failed_count += 1
                     failed_reports.append({
                         'data': item,
                         'message': f'更新失败: {str(e)}'
                     })
 
+            mappings = list(mappings.values())
+            for start in range(0, len(mappings), chunk_size):
+                db.session.bulk_update_mappings(InspectionReport, mappings[start:start + chunk_size])
+
+            # 根据更新前的状态和更新数据计算计数变化
+            counter_fields = ('is_deleted', 'report_status', 'registrant_id')
+            rows_by_id = {row.id: row for row in reports.values()}
+            before = [{field: getattr(rows_by_id[mapping['id']], field) for field in counter_fields} for mapping in mappings]
+            after = [
+                {field: mapping.get(field, state[field]) for field in counter_fields}
+                for mapping, state in zip(mappings, before)
+            ]
+            counter_before = ReportCounterService.snapshot_mappings(before)
+            counter_after = ReportCounterService.snapshot_mappings(after)
             db.session.commit()
+            ReportCounterService.on_changed(counter_before, counter_after)
+
+            success_count = len(updated_report_codes)
+            failed_count = len(failed_reports)
             return {
                 'success': True,
                 'message': f'批量更新报告完成，成功 {success_count} 个，失败 {failed_count} 个',
@@ -670,7 +845,7 @@ class ReportService:
                     'success_count': success_count,
                     'failed_count': failed_count,
                     'failed_reports': failed_reports,
-                    'updated_reports': updated_reports
+                    'updated_report_codes': updated_report_codes
                 }
             }
 
@@ -689,6 +864,31 @@ class ReportService:
                 }
             }
 
+    @staticmethod
+    def get_report_etag(report_code):
+        """计算报告详情的ETag和最后修改时间，只查询ID、updated_at和登记人/最后修改人ID
+
+        登记人和最后修改人的昵称也会出现在报告详情中，一并计入ETag（昵称有缓存，通常不查询数据库）
+
+        Args:
+            report_code (str): 报告编号
+
+        Returns:
+            tuple: (ETag, updated_at)，报告不存在或已删除时为(None, None)
+        """
+        row = db.session.query(
+            InspectionReport.id,
+            InspectionReport.updated_at,
+            InspectionReport.registrant_id,
+            InspectionReport.last_modified_by_id
+        ).filter_by(report_code=report_code, is_deleted=False).first()
+        if row is None:
+            return None, None
+        nicknames = get_user_nicknames(
+            user_id for user_id in (row.registrant_id, row.last_modified_by_id) if user_id
+        )
+        return make_etag(row.id, row.updated_at, sorted(nicknames.items())), row.updated_at
+
     @staticmethod
     def get_report_by_code(report_code):
         """根据报告编号查询单条未软删除的报告数据"""
@@ -721,6 +921,7 @@ class ReportService:
             # 报告编号不可修改，移除report_code字段(如果存在)
             if 'report_code' in update_data:
                 del update_data['report_code']
+            counter_before = ReportCounterService.snapshot([report])
             # 检查必填字段
             required_fields = ['project_name', 'client_unit', 'inspection_object', 'inspection_type', 'inspection_conclusion', 'inspection_unit']
             missing_fields = []
@@ -769,7 +970,9 @@ class ReportService:
             report.last_modified_by_id = int(user_id)
             report.updated_at = datetime.datetime.now(datetime.timezone.utc)
             
+            counter_after = ReportCounterService.snapshot([report])
             db.session.commit()
+            ReportCounterService.on_changed(counter_before, counter_after)
             return {'success': True, 'message': '报告更新成功', 'data': report.to_dict(), 'code': 200}
         except Exception as e:
             db.session.rollback()
@@ -789,7 +992,7 @@ class ReportService:
         """
         try:
             # 检查用户是否存在
-            user = User.query.get(user_id)
+            user = get_request_user(user_id)
             if not user:
                 return {'success': False, 'message': '用户不存在', 'code': 404}
 
@@ -973,7 +1176,9 @@ class ReportService:
             )
 
             db.session.add(new_report)
+            counter_snapshots = ReportCounterService.snapshot([new_report])
             db.session.commit()
+            ReportCounterService.on_created(counter_snapshots)
 
             return {
                 'success': True,
@@ -986,6 +1191,43 @@ class ReportService:
             logging.error(f"添加报告失败: {str(e)}")
             return {'success': False, 'message': f'添加报告失败: {str(e)}', 'code': 500}
 
+    @staticmethod
+    def search_reports(search_param, user_id=None, scope='all', limit=100):
+        """按关键字搜索报告，结果按相关度排序
+
+        检索工程名称、报告编号、委托单位、建设单位和检测对象
+
+        Args:
+            search_param (str): 搜索参数，空白分隔的多个词之间为AND关系
+            user_id (int): 用户ID，用于权限过滤
+            scope (str): 权限范围，'all'或'own'
+            limit (int): 最多返回的条数
+
+        Returns:
+            dict: 包含搜索结果的字典
+        """
+        try:
+            if not search_param or not search_param.strip():
+                return {'success': False, 'message': '搜索参数不能为空', 'code': 400, 'data': {}}
+
+            limit = max(1, min(limit, 1000))
+            query = ReportService._build_reports_query(user_id, scope)
+            reports = ReportSearchService.apply_ranked(query, search_param).limit(limit).all()
+            reports_dict = InspectionReport.to_dict_list(reports)
+
+            return {
+                'success': True,
+                'code': 200,
+                'message': '操作成功',
+                'data': {
+                    'reports': reports_dict,
+                    'total_count': len(reports_dict)
+                }
+            }
+        except Exception as e:
+            logging.error(f"搜索报告失败: {str(e)}")
+            return {'success': False, 'message': f'搜索报告失败: {str(e)}', 'code': 500, 'data': {}}
+
     # @staticmethod
     # def search_reports(search_param):
     #     """搜索报告
@@ -1,8 +1,7 @@
 import functools
 from flask import request, g
 from app.utils.response import api_response
-from app.models.user.user import User
-from app.services.permission_service import PermissionService
+from app.utils.identity import get_identity
 from app.utils.status_codes import HTTP_401_UNAUTHORIZED, HTTP_404_NOT_FOUND, HTTP_403_FORBIDDEN
 from flask_jwt_extended import get_jwt_identity
 from app.utils.logger import logger
@@ -39,8 +38,9 @@ def permission_required(resource, action, scope='all', resource_id_param='id'):
                     message='未认证，请先登录'
                 )
 
-            user = User.query.get(user_id)
-            if not user:
+            # 加载当前请求的用户身份，路由和服务通过g.identity复用
+            identity = get_identity()
+            if not identity:
                 return api_response(
                     success=False,
                     code=HTTP_404_NOT_FOUND,
@@ -51,7 +51,7 @@ def permission_required(resource, action, scope='all', resource_id_param='id'):
             resource_id = kwargs.get(resource_id_param) if scope == 'own' else None
 
             # 检查权限
-            has_perm = PermissionService.has_user_permission(user, resource, action, scope, resource_id)
+            has_perm = identity.has_permission(resource, action, scope, resource_id)
             if not has_perm:
                 logger.warning(f'用户 {user_id} 权限不足，需要{resource}:{action}:{scope}权限，请求ID: {getattr(g, "request_id", None)}')
                 return api_response(
@@ -82,6 +82,7 @@ def role_required(role_name):
                     code=HTTP_401_UNAUTHORIZED,
                     message='未认证，请先登录'
                 )
+                g.user_id = user_id
             except Exception as e:
                 return api_response(
                     success=False,
@@ -89,8 +90,8 @@ def role_required(role_name):
                     message='未认证，请先登录'
                 )
 
-            user = User.query.get(user_id)
-            if not user:
+            identity = get_identity()
+            if not identity:
                 return api_response(
                     success=False,
                     code=HTTP_404_NOT_FOUND,
@@ -98,7 +99,7 @@ def role_required(role_name):
                 )
 
             # 检查角色
-            has_role = PermissionService.has_user_role(user, role_name)
+            has_role = identity.has_role(role_name)
             if not has_role:
                 logger.warning(f'用户 {user_id} 角色不足，需要{role_name}角色权限，请求ID: {getattr(g, "request_id", None)}')
                 return api_response(
@@ -117,7 +118,5 @@ def get_current_user():
     Returns:
         User: 当前登录用户对象或None
     """
-    user_id = getattr(g, 'user_id', None)
-    if not user_id:
-        return None
-    return User.query.get(user_id)
\ No newline at end of file
+    identity = get_identity()
+    return identity.user if identity else None
\ No newline at end of file
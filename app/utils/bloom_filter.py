@@ -0,0 +1,60 @@
+"""布隆过滤器工具模块
+
+用于在进程内快速判断"一定不在集合中"，判断为"可能在集合中"时再查询Redis或数据库。
+"""
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """线程安全的布隆过滤器
+
+    - 按预期元素数量和误判率计算位数组大小和哈希函数个数
+    - 使用一次blake2b摘要派生出的两个哈希值做双重哈希，得到k个位置
+    - 不支持删除元素，需要清理时重建新的过滤器替换旧的
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(str(item).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        """添加元素"""
+        positions = self._positions(item)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def update(self, items):
+        """批量添加元素"""
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        """元素可能在集合中时返回True，一定不在集合中时返回False"""
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def stats(self):
+        """获取过滤器统计信息"""
+        return {
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'size_bits': self.size,
+            'hash_count': self.hash_count,
+            'count': self.count
+        }
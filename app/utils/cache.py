@@ -0,0 +1,94 @@
+"""进程内缓存工具模块
+
+提供线程安全的TTL+LRU缓存，供昵称、权限等高频读取、低频修改的数据使用。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# 未命中标记，用于区分"缓存了None/空字符串"和"没有缓存"
+MISSING = object()
+
+
+class TTLCache:
+    """带过期时间和容量上限的LRU缓存
+
+    - 每个条目写入后ttl秒过期
+    - 条目数超过maxsize时淘汰最久未使用的条目
+    - 记录命中、未命中、淘汰次数，便于评估缓存容量
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (过期时间, 值)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, maxsize=None, ttl=None):
+        """调整缓存容量和过期时间（通常在应用初始化时根据配置调用）"""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._shrink()
+
+    def get(self, key, default=MISSING):
+        """读取缓存，过期或不存在时返回default"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """写入缓存"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            self._shrink()
+
+    def delete(self, key):
+        """删除单个条目"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """清空缓存（统计计数保留）"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """获取缓存统计信息
+
+        Returns:
+            dict: 容量、当前条目数、命中/未命中/淘汰次数及命中率
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+    def _shrink(self):
+        # 调用方需持有锁
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,113 @@
+"""HTTP响应压缩模块
+
+在after_request中按客户端的Accept-Encoding压缩响应体：
+- 安装了brotli时优先使用br，否则使用gzip
+- 只压缩JSON、文本等可压缩类型，且响应体不小于COMPRESS_MIN_SIZE
+- 流式响应（如报告导出）、已编码的响应、非2xx响应不压缩
+
+压缩后在ETag后追加编码后缀（如"xxx-gzip"），不同编码的响应体使用不同的强ETag，
+http_cache模块比较If-None-Match时会忽略该后缀。
+"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖
+    brotli = None
+
+# 可压缩的MIME类型
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/x-ndjson',
+    'text/plain',
+    'text/html',
+    'text/css',
+    'text/csv',
+}
+
+
+def choose_encoding(accept_encodings):
+    """根据请求头Accept-Encoding选择压缩编码
+
+    Args:
+        accept_encodings: request.accept_encodings
+
+    Returns:
+        str or None: 'br'、'gzip'，客户端不支持时返回None
+    """
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, min_size=1024, gzip_level=6, brotli_quality=4):
+    """压缩响应体
+
+    Args:
+        response: Flask响应对象
+        min_size (int, optional): 最小压缩大小（字节），过小的响应压缩收益不抵开销. Defaults to 1024.
+        gzip_level (int, optional): gzip压缩级别（1~9）. Defaults to 6.
+        brotli_quality (int, optional): brotli压缩质量（0~11），接口响应需要实时压缩，不宜过高. Defaults to 4.
+
+    Returns:
+        response: 压缩后的响应对象（不满足条件时原样返回）
+    """
+    if response.status_code == 304:
+        # 304响应没有响应体，但需要与200响应一致地声明Vary
+        response.vary.add('Accept-Encoding')
+        return response
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or not 200 <= response.status_code < 300
+        or response.status_code == 204
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    # 响应内容随Accept-Encoding变化，缓存需要区分
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=brotli_quality)
+    else:
+        # mtime=0使相同内容的压缩结果一致
+        compressed = gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def init_compression(app):
+    """根据应用配置注册响应压缩
+
+    配置项:
+        COMPRESS_ENABLED: 是否启用
+        COMPRESS_MIN_SIZE: 最小压缩大小（字节）
+        COMPRESS_GZIP_LEVEL: gzip压缩级别
+        COMPRESS_BROTLI_QUALITY: brotli压缩质量
+    """
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+
+    @app.after_request
+    def _compress_response(response):
+        return compress_response(response, min_size, gzip_level, brotli_quality)
@@ -0,0 +1,148 @@
+"""数据库连接池监控模块
+
+连接池大小等参数通过SQLALCHEMY_ENGINE_OPTIONS配置（见config），这里负责：
+- TimedQueuePool: 记录每次从连接池取连接的等待时间和超时次数，每个连接池单独统计
+- 在 /metrics 接口输出连接池使用情况（常驻连接数、已取出、空闲、溢出连接数）和等待时间直方图，
+  主库和各从库（见db_router）的连接池以bind标签区分，主库为default
+
+批量接口等突发请求耗尽连接池时，请求会阻塞在取连接上，表现为等待时间升高、
+已取出连接数接近 pool_size + max_overflow，严重时出现超时。
+"""
+import threading
+import time
+from flask import g, has_request_context
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from app.utils.metrics import Histogram, render_histogram, register_collector
+
+# 取连接等待时间直方图的分桶上限（秒）
+CHECKOUT_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolStats:
+    """连接池取连接的统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_wait = Histogram(CHECKOUT_WAIT_BUCKETS)
+        self.timeouts = 0
+
+    def observe(self, wait, timed_out=False):
+        with self._lock:
+            self.checkout_wait.observe(wait)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self):
+        """复制当前统计，输出指标时不必持有锁
+
+        Returns:
+            tuple: (等待时间Histogram, 超时次数)
+        """
+        with self._lock:
+            histogram = Histogram(CHECKOUT_WAIT_BUCKETS)
+            histogram.counts = list(self.checkout_wait.counts)
+            histogram.sum = self.checkout_wait.sum
+            histogram.count = self.checkout_wait.count
+            return histogram, self.timeouts
+
+
+
+class TimedQueuePool(QueuePool):
+    """记录取连接等待时间的QueuePool
+
+    等待时间包括连接池已满时的排队时间，以及需要新建连接时的建连时间。
+    在请求中取连接时，等待时间同时累计到g.db_pool_wait，由Server-Timing响应头返回。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        # 引擎dispose时会重建连接池，统计沿用到新连接池
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self.stats.observe(wait, timed_out)
+            if has_request_context() and 'db_pool_wait' in g:
+                g.db_pool_wait += wait
+
+
+def render_pool_metrics(engines, max_overflow=None):
+    """以Prometheus文本格式输出连接池指标
+
+    Args:
+        engines (dict): bind名称到SQLAlchemy引擎的映射，主库为default
+        max_overflow (int, optional): 配置的最大溢出连接数（SQLALCHEMY_ENGINE_OPTIONS）. Defaults to None.
+
+    Returns:
+        str: Prometheus exposition格式的文本
+    """
+    gauges = (
+        ('db_pool_size', '连接池常驻连接数', lambda pool: pool.size()),
+        ('db_pool_checked_out', '已取出（使用中）的连接数', lambda pool: pool.checkedout()),
+        ('db_pool_checked_in', '连接池中空闲的连接数', lambda pool: pool.checkedin()),
+        ('db_pool_overflow', '超出常驻连接数的溢出连接数（负数表示常驻连接尚未全部创建）', lambda pool: pool.overflow()),
+    )
+    queue_pools = {bind: engine.pool for bind, engine in engines.items() if isinstance(engine.pool, QueuePool)}
+    timed_pools = {bind: pool for bind, pool in queue_pools.items() if isinstance(pool, TimedQueuePool)}
+
+    lines = []
+    if queue_pools:
+        for name, help_text, getter in gauges:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            for bind, pool in queue_pools.items():
+                lines.append(f'{name}{{bind="{bind}"}} {getter(pool)}')
+        if max_overflow is not None:
+            lines.append('# HELP db_pool_max_overflow 允许的最大溢出连接数')
+            lines.append('# TYPE db_pool_max_overflow gauge')
+            for bind in queue_pools:
+                lines.append(f'db_pool_max_overflow{{bind="{bind}"}} {max_overflow}')
+
+    if timed_pools:
+        histograms = {}
+        timeouts = {}
+        for bind, pool in timed_pools.items():
+            histograms[bind], timeouts[bind] = pool.stats.snapshot()
+        render_histogram(lines, 'db_pool_checkout_wait_seconds', '从连接池取连接的等待时间（秒）',
+                         histograms, label_name='bind')
+        lines.append('# HELP db_pool_checkout_timeouts_total 取连接超时（超过pool_timeout）的次数')
+        lines.append('# TYPE db_pool_checkout_timeouts_total counter')
+        for bind, value in timeouts.items():
+            lines.append(f'db_pool_checkout_timeouts_total{{bind="{bind}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def init_pool_metrics(app, db):
+    """在 /metrics 接口中输出连接池指标
+
+    Args:
+        app: Flask 应用实例
+        db: SQLAlchemy实例
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    def collect():
+        with app.app_context():
+            engines = {'default': db.engine}
+            # 各bind（包括从库）使用同样的连接池配置，引擎在首次获取时创建，此时尚未建立连接
+            for bind in app.config.get('SQLALCHEMY_BINDS') or {}:
+                engines[bind] = db.get_engine(app, bind=bind)
+            engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+            return render_pool_metrics(engines, engine_options.get('max_overflow'))
+
+    register_collector(collect)
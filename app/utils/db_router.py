@@ -0,0 +1,170 @@
+"""数据库读写分离模块
+
+配置SQLALCHEMY_REPLICA_URIS（只读从库地址列表）后，每个从库注册为一个bind（replica_0、replica_1...），
+被 use_replica() 包裹的代码中执行的只读查询发送到从库，其余语句仍发送到主库：
+
+    @use_replica()
+    def get_all_reports():
+        ...
+
+    with use_replica():
+        users = User.query.all()
+
+必须读取最新数据的代码（如写入前的校验）可以用 use_primary() 包裹，即使外层处于 use_replica() 中也使用主库。
+
+以下情况始终使用主库：
+- 写入语句（flush、INSERT/UPDATE/DELETE）以及 SELECT ... FOR UPDATE
+- 同一会话（即同一请求）中已经写入过数据之后的所有查询，保证读到自己刚写入的数据
+- 文本SQL和直接获取连接（session.connection()）
+- 指定了__bind_key__的模型
+
+从库的选择策略由DB_REPLICA_STRATEGY配置：
+- round_robin: 轮询
+- least_connections: 选择当前使用中连接数最少的从库
+
+注意: 从库存在复制延迟，只应用于能够接受短暂旧数据的查询。
+"""
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+# 从库bind名称前缀
+REPLICA_BIND_PREFIX = 'replica_'
+# 会话已写入数据的标记（保存在session.info中，会话随请求结束而移除）
+PRIMARY_PINNED_KEY = 'db_primary_pinned'
+
+# 当前上下文中 use_replica() 的嵌套层数，按线程/协程隔离
+_replica_depth = ContextVar('db_replica_depth', default=0)
+
+
+@contextmanager
+def use_replica():
+    """将包裹的只读查询发送到从库，可用作上下文管理器或装饰器（@use_replica()）
+
+    未配置从库时不起作用。
+    """
+    _replica_depth.set(_replica_depth.get() + 1)
+    try:
+        yield
+    finally:
+        _replica_depth.set(_replica_depth.get() - 1)
+
+
+@contextmanager
+def use_primary():
+    """包裹的查询始终使用主库，可用作上下文管理器或装饰器（@use_primary()）"""
+    token = _replica_depth.set(0)
+    try:
+        yield
+    finally:
+        _replica_depth.reset(token)
+
+
+class ReplicaRouter:
+    """从库选择器"""
+
+    STRATEGIES = ('round_robin', 'least_connections')
+
+    def __init__(self, app, db, bind_keys, strategy='round_robin'):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f'不支持的从库选择策略: {strategy}')
+        self.app = app
+        self.db = db
+        self.bind_keys = list(bind_keys)
+        self.strategy = strategy
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self._engines = None
+        # 各从库使用中的连接数
+        self._in_use = [0] * len(self.bind_keys)
+
+    def _get_engines(self):
+        """首次使用时创建从库引擎，并通过连接池事件统计使用中的连接数"""
+        if self._engines is None:
+            with self._lock:
+                if self._engines is None:
+                    engines = []
+                    for index, bind_key in enumerate(self.bind_keys):
+                        engine = self.db.get_engine(self.app, bind=bind_key)
+                        event.listen(engine, 'checkout', self._make_counter(index, 1))
+                        event.listen(engine, 'checkin', self._make_counter(index, -1))
+                        engines.append(engine)
+                    self._engines = engines
+        return self._engines
+
+    def _make_counter(self, index, delta):
+        def counter(*args):
+            with self._lock:
+                self._in_use[index] += delta
+        return counter
+
+    def choose(self):
+        """选择一个从库引擎"""
+        engines = self._get_engines()
+        if self.strategy == 'least_connections':
+            with self._lock:
+                index = min(range(len(engines)), key=self._in_use.__getitem__)
+        else:
+            index = next(self._round_robin) % len(engines)
+        return engines[index]
+
+    @staticmethod
+    def should_use_replica(session, clause):
+        """判断本次查询是否可以发送到从库
+
+        Args:
+            session: 当前会话
+            clause: 要执行的语句
+
+        Returns:
+            bool: 是否可以使用从库
+        """
+        # 会话正在写入数据，或执行写入语句：之后本会话的查询都使用主库
+        if session._flushing or isinstance(clause, UpdateBase):
+            session.info[PRIMARY_PINNED_KEY] = True
+            return False
+        if _replica_depth.get() <= 0 or session.info.get(PRIMARY_PINNED_KEY):
+            return False
+        if not isinstance(clause, Select):
+            return False
+        # SELECT ... FOR UPDATE 需要在主库加锁
+        return getattr(clause, '_for_update_arg', None) is None
+
+    def stats(self):
+        """各从库的使用中连接数"""
+        with self._lock:
+            return {
+                'strategy': self.strategy,
+                'in_use': dict(zip(self.bind_keys, self._in_use))
+            }
+
+
+def get_replica_router(app):
+    """获取应用的从库选择器，未配置从库时返回None"""
+    return app.extensions.get('db_router')
+
+
+def init_db_router(app, db):
+    """根据应用配置注册从库bind并创建从库选择器，需要在db.init_app之前调用
+
+    配置项:
+        SQLALCHEMY_REPLICA_URIS: 从库连接地址列表
+        DB_REPLICA_STRATEGY: 从库选择策略，round_robin或least_connections
+    """
+    replica_uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    if not replica_uris:
+        return
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    bind_keys = []
+    for index, uri in enumerate(replica_uris):
+        bind_key = f'{REPLICA_BIND_PREFIX}{index}'
+        binds[bind_key] = uri
+        bind_keys.append(bind_key)
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['db_router'] = ReplicaRouter(
+        app, db, bind_keys, app.config.get('DB_REPLICA_STRATEGY', 'round_robin')
+    )
@@ -0,0 +1,100 @@
+"""HTTP条件请求模块（ETag / Last-Modified）
+
+接口先用很轻的查询（只查updated_at、计数等）计算资源的ETag，与请求头If-None-Match（或If-Modified-Since）比较：
+- 一致时直接返回304 Not Modified，不再查询完整数据和序列化
+- 不一致时正常生成响应，并在响应头中返回ETag和Last-Modified
+
+响应压缩（见compression模块）会在ETag后追加编码后缀（如"xxx-gzip"），比较时忽略该后缀。
+"""
+import hashlib
+import json
+from datetime import timezone
+from flask import current_app, request
+
+# 压缩模块追加到ETag后的编码后缀
+ETAG_ENCODING_SUFFIXES = ('-gzip', '-br')
+
+
+def make_etag(*parts):
+    """根据资源的版本信息（updated_at、计数、ID等）生成ETag
+
+    Returns:
+        str: 不含引号的ETag值
+    """
+    payload = json.dumps(parts, default=str, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _strip_encoding_suffix(etag):
+    for suffix in ETAG_ENCODING_SUFFIXES:
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)]
+    return etag
+
+
+def _matched_etag(etag):
+    """返回请求头If-None-Match中与etag一致的值（可能带编码后缀），不一致时返回None"""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    if if_none_match.star_tag:
+        return etag
+    for candidate in if_none_match.as_set():
+        if _strip_encoding_suffix(candidate) == etag:
+            return candidate
+    return None
+
+
+def _not_modified_since(last_modified):
+    """请求头If-Modified-Since不早于last_modified时返回True（HTTP日期精确到秒）"""
+    if_modified_since = request.if_modified_since
+    if last_modified is None or if_modified_since is None:
+        return False
+    return last_modified.replace(microsecond=0) <= if_modified_since
+
+
+def _to_http_datetime(value):
+    """数据库中的时间为UTC的naive datetime，转换为带时区的datetime"""
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def conditional_response(etag, build_response, last_modified=None, private=True):
+    """带ETag/Last-Modified的条件响应
+
+    Args:
+        etag (str): make_etag生成的ETag
+        build_response (callable): 无参数，返回api_response的结果；资源未修改时不会调用
+        last_modified (datetime, optional): 资源最后修改时间（UTC）. Defaults to None.
+        private (bool, optional): 响应是否只能由客户端缓存（需要登录的接口）. Defaults to True.
+
+    Returns:
+        Response: 304响应或build_response生成的响应
+    """
+    last_modified = _to_http_datetime(last_modified)
+    cache_control = 'private, no-cache' if private else 'no-cache'
+
+    # If-None-Match优先于If-Modified-Since
+    matched = _matched_etag(etag)
+    if matched is not None or (not request.if_none_match and _not_modified_since(last_modified)):
+        response = current_app.response_class(status=304)
+        response.set_etag(matched or etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+    result = build_response()
+    if isinstance(result, tuple):
+        response, status = result
+        response.status_code = status
+    else:
+        response = result
+    # 只有成功的响应才返回校验信息
+    if response.status_code == 200:
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.headers['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,107 @@
+"""请求级身份上下文
+
+一个请求中权限装饰器、路由和服务层都需要当前用户及其权限，此前各处分别执行User.query.get，
+并重复判断'all'范围权限。这里在请求内只加载一次：
+- 用户及其角色（selectinload预加载）
+- 编译后的权限集合（PermissionService.get_permission_set，跨请求缓存）
+- 按(资源, 操作)计算的有效范围
+结果保存在g.identity中，路由和服务通过get_identity()/get_request_user()复用。
+"""
+from flask import g, has_request_context
+from sqlalchemy.orm import selectinload
+from app.models.user.user import User
+from app.services.permission_service import PermissionService
+
+
+class RequestIdentity:
+    """当前请求的用户身份"""
+
+    def __init__(self, user, permissions):
+        self.user = user
+        self.user_id = user.id
+        # 编译后的权限集合 frozenset{(resource, action, scope)}
+        self.permissions = permissions
+        self._scopes = {}
+
+    @property
+    def role_names(self):
+        """用户的角色名称列表（角色已预加载）"""
+        return [role.name for role in self.user.roles]
+
+    def has_role(self, role_name):
+        """是否拥有指定角色"""
+        return role_name in self.role_names
+
+    def has_permission(self, resource, action, scope='all', resource_id=None):
+        """是否拥有指定资源的操作权限，规则与PermissionService.has_user_permission一致"""
+        return PermissionService._match(self.permissions, resource, action, scope, self.user, resource_id)
+
+    def scope_for(self, resource, action):
+        """获取用户对资源操作的有效范围
+
+        拥有'all'范围的权限时返回'all'，否则返回'own'（只能操作自己的数据）。
+        调用方应已通过permission_required校验用户至少拥有'own'范围的权限。
+
+        Returns:
+            str: 'all'或'own'
+        """
+        key = (resource, action)
+        if key not in self._scopes:
+            self._scopes[key] = 'all' if (resource, action, 'all') in self.permissions else 'own'
+        return self._scopes[key]
+
+
+def load_identity(user_id):
+    """加载用户身份
+
+    Args:
+        user_id: 用户ID（JWT中的identity为字符串）
+
+    Returns:
+        RequestIdentity: 用户身份，用户不存在时返回None
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    user = User.query.options(selectinload(User.roles)).filter(User.id == user_id).first()
+    if not user:
+        return None
+    return RequestIdentity(user, PermissionService.get_permission_set(user.id))
+
+
+def get_identity():
+    """获取当前请求的用户身份（g.user_id对应的用户），同一请求内只加载一次
+
+    Returns:
+        RequestIdentity: 用户身份，未认证或用户不存在时返回None
+    """
+    user_id = getattr(g, 'user_id', None)
+    if not user_id:
+        return None
+
+    identity = getattr(g, 'identity', None)
+    if identity is not None and str(identity.user_id) == str(user_id):
+        return identity
+
+    identity = load_identity(user_id)
+    if identity is not None:
+        g.identity = identity
+    return identity
+
+
+def get_request_user(user_id):
+    """获取用户对象，是当前请求的用户时复用已加载的身份
+
+    供服务层使用：在请求中调用时不再重复查询当前用户，在请求外（命令、后台任务）调用时直接查询
+
+    Args:
+        user_id: 用户ID
+
+    Returns:
+        User: 用户对象，不存在时返回None
+    """
+    if has_request_context() and user_id and str(getattr(g, 'user_id', None)) == str(user_id):
+        identity = get_identity()
+        return identity.user if identity is not None else None
+    return User.query.get(user_id)
@@ -14,7 +14,10 @@ from flask import current_app
 from app.db import db
 # 延迟导入TokenBlocklist，避免循环依赖
 # from app.models.token import TokenBlocklist
-from app.utils.logger import logger
+from app.utils.logger import get_logger
+
+# 令牌生成/刷新的日志量较大，使用单独的记录器以便按LOG_SAMPLE_RATES采样
+logger = get_logger('jwt')
 
 # 延迟导入User模型，避免循环依赖
 # from app.models.user import User
@@ -74,23 +77,21 @@ def generate_tokens(user_id, remember_me=False):
         raise
 
 
-def block_token(jti):
+def block_token(jti, exp=None):
     """将JWT令牌加入黑名单
     
     Args:
         jti (str): 令牌的唯一标识符
+        exp (int, optional): 令牌的过期时间戳
         
     Returns:
         bool: 操作是否成功
     """
     try:
-        from datetime import datetime, timezone
-        from app.models.token import TokenBlocklist
+        from app.utils.token_blocklist import TokenBlocklistStore
         
-        # 将 jti 存入黑名单
-        blocklist = TokenBlocklist(jti=jti, created_at=datetime.now(timezone.utc))
-        db.session.add(blocklist)
-        db.session.commit()
+        # 将 jti 存入黑名单（数据库 + Redis）
+        TokenBlocklistStore.revoke(jti, exp)
         return True
     except Exception as e:
         db.session.rollback()
@@ -115,7 +116,7 @@ def process_logout_token(token):
         jti = token_data['jti']
         
         # 调用block_token函数将令牌加入黑名单
-        return block_token(jti)
+        return block_token(jti, token_data.get('exp'))
     except Exception as e:
         logger.error(f"处理注销令牌时出错: {str(e)}")
         return False
@@ -192,10 +193,10 @@ def check_token_in_blocklist(jwt_header, jwt_payload):
     Returns:
         bool: 是否在黑名单中
     """
-    from app.models.token import TokenBlocklist
+    from app.utils.token_blocklist import TokenBlocklistStore
     jti = jwt_payload["jti"]  # 获取令牌唯一标识
-    token = TokenBlocklist.query.filter_by(jti=jti).first()
-    return token is not None  # 存在则返回True（表示被拉黑）
+    # 先经布隆过滤器和Redis判断，未命中时查询数据库
+    return TokenBlocklistStore.is_revoked(jti)  # 已撤销则返回True（表示被拉黑）
 
 
 def handle_refresh():
@@ -219,23 +220,13 @@ def handle_refresh():
         new_access_token, new_refresh_token = refresh_user_token(current_user, jwt_data)
         
         # 将旧的刷新令牌加入黑名单
-        from app.models.token import TokenBlocklist
-        from datetime import datetime, timedelta
+        from app.utils.token_blocklist import TokenBlocklistStore
         
         # 获取令牌过期时间
         exp_timestamp = jwt_data['exp']
-        exp_datetime = datetime.fromtimestamp(exp_timestamp)
-        
-        # 创建TokenBlocklist记录
-        token_block = TokenBlocklist(
-            jti=current_refresh_jti,
-            created_at=datetime.utcnow()
-        )
         
-        # 添加到数据库
-        from app.db import db
-        db.session.add(token_block)
-        db.session.commit()
+        # 写入数据库和Redis，并通知其他进程
+        TokenBlocklistStore.revoke(current_refresh_jti, exp_timestamp)
         logger.info(f"旧刷新令牌已加入黑名单: {current_refresh_jti}")
         
         return True, new_access_token, new_refresh_token, "令牌刷新成功"
@@ -1,10 +1,23 @@
 
-"""日志处理工具模块"""
+"""日志处理工具模块
+
+setup_logger()根据配置将日志切换为异步写入：
+- 请求线程中的日志只放入有界队列（QueueHandler），由后台线程（QueueListener）写入控制台和文件，
+  磁盘延迟不再出现在请求路径上
+- 队列已满时按LOG_QUEUE_POLICY丢弃（drop）或阻塞等待（block）
+- 文件日志可输出为JSON，每条记录带有当前请求的g.request_id
+- LOG_SAMPLE_RATES可对高频日志记录器（如app.request、app.jwt）按比例采样，WARNING及以上级别不采样
+"""
 import os
+import atexit
+import copy
+import json
+import queue
+import random
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime
-from flask import current_app
+from flask import current_app, g, has_app_context
 
 # 创建日志目录
 log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs')
@@ -40,34 +53,207 @@ logger.addHandler(file_handler)
 # 默认日志级别
 logger.setLevel(logging.INFO)
 
+# 异步日志的队列处理器和后台监听器，由setup_logger()创建
+queue_handler = None
+queue_listener = None
+
+
+def _get_request_id():
+    """获取当前请求的request_id，不在应用上下文中时返回None"""
+    if has_app_context():
+        return getattr(g, 'request_id', None)
+    return None
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON格式的日志，每条记录一行"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%d %H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None) or _get_request_id(),
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """按日志记录器名称采样，WARNING及以上级别的日志始终保留"""
+
+    def __init__(self, rates=None):
+        super().__init__()
+        # {日志记录器名称: 保留比例(0~1)}，子记录器未配置时使用最近的父记录器的比例
+        self.rates = rates or {}
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class BoundedQueueHandler(QueueHandler):
+    """写入有界队列的日志处理器
+
+    Args:
+        log_queue (queue.Queue): 有界队列
+        policy (str): 队列已满时的策略，drop为丢弃，block为阻塞等待
+        block_timeout (float): block策略下最长等待时间（秒），超时后丢弃
+    """
+
+    def __init__(self, log_queue, policy='drop', block_timeout=1.0):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record):
+        """在请求线程中完成消息格式化并记录request_id，后台线程中无法访问g"""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.request_id = _get_request_id()
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.policy == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(value):
+    """解析采样配置
+
+    Args:
+        value (str|dict): 形如 'app.request=0.1,app.jwt=0.2' 的字符串或字典
+
+    Returns:
+        dict: {日志记录器名称: 保留比例}
+    """
+    if isinstance(value, dict):
+        return {name: float(rate) for name, rate in value.items()}
+    rates = {}
+    for item in (value or '').split(','):
+        name, _, rate = item.partition('=')
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def _start_async_logging(config):
+    """将控制台和文件处理器移到后台监听线程，记录器只保留队列处理器"""
+    global queue_handler, queue_listener
+    _stop_async_logging()
+
+    log_queue = queue.Queue(maxsize=config.get('LOG_QUEUE_SIZE', 10000))
+    queue_handler = BoundedQueueHandler(
+        log_queue,
+        policy=config.get('LOG_QUEUE_POLICY', 'drop'),
+        block_timeout=config.get('LOG_QUEUE_BLOCK_TIMEOUT', 1.0)
+    )
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(config.get('LOG_SAMPLE_RATES'))))
+
+    logger.removeHandler(console_handler)
+    logger.removeHandler(file_handler)
+    logger.addHandler(queue_handler)
+
+    queue_listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    queue_listener.start()
+
+
+def _stop_async_logging():
+    """停止后台监听线程（写完队列中剩余的日志），恢复同步写入"""
+    global queue_handler, queue_listener
+    if queue_listener is not None:
+        queue_listener.stop()
+        queue_listener = None
+    if queue_handler is not None:
+        logger.removeHandler(queue_handler)
+        queue_handler = None
+    for handler in (console_handler, file_handler):
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
+
+
+def get_logger(name):
+    """获取app下的子日志记录器（如get_logger('request') -> app.request），可通过LOG_SAMPLE_RATES单独采样"""
+    return logger.getChild(name)
+
+
+def get_log_stats():
+    """获取异步日志队列的状态"""
+    if queue_handler is None:
+        return {'async': False}
+    return {
+        'async': True,
+        'policy': queue_handler.policy,
+        'queue_size': queue_handler.queue.qsize(),
+        'queue_maxsize': queue_handler.queue.maxsize,
+        'dropped': queue_handler.dropped
+    }
+
 
 def setup_logger(app=None):
     """
-    根据应用配置设置日志级别
+    根据应用配置设置日志级别、输出格式，并启动异步日志
     应在应用初始化后调用此函数
-    
+
     Args:
         app: Flask应用实例，如果未提供则尝试使用current_app
     """
     # 默认日志级别
     default_level = logging.INFO
-    
+
     try:
         # 获取应用实例
         current_app = app or current_app
-        
+
         # 从配置中获取日志级别
         log_level = current_app.config.get('LOG_LEVEL', 'INFO').upper()
-        
+
         # 转换为logging模块的级别常量
         level = getattr(logging, log_level, default_level)
-        
+
         # 设置日志级别
         logger.setLevel(level)
         # 控制台只输出WARNING及以上级别的日志
         console_handler.setLevel(logging.WARNING)
         file_handler.setLevel(level)
-        
+
+        # 文件日志格式：json或text
+        if current_app.config.get('LOG_FORMAT', 'json') == 'json':
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(formatter)
+
+        # 异步写入日志
+        if current_app.config.get('LOG_ASYNC', True):
+            _start_async_logging(current_app.config)
+        else:
+            _stop_async_logging()
+
         logger.info(f"日志级别已设置为: {log_level}")
     except Exception as e:
         # 避免递归错误，直接打印到控制台
@@ -77,5 +263,8 @@ def setup_logger(app=None):
         console_handler.setLevel(default_level)
         file_handler.setLevel(default_level)
 
+# 进程退出时写完队列中剩余的日志
+atexit.register(_stop_async_logging)
+
 # 测试日志
 # logger.info('日志系统初始化完成')
@@ -0,0 +1,220 @@
+"""请求性能指标模块
+
+在create_app的before_request/after_request中记录每个请求的：
+- 总耗时
+- SQL语句数和SQL耗时（通过SQLAlchemy引擎事件统计，只统计请求线程中执行的语句）
+- 响应大小（流式响应无法预知大小，不计入）
+- 从数据库连接池取连接的等待时间（见app/utils/db_pool.py）
+
+结果以Server-Timing响应头返回给客户端（浏览器开发者工具可直接查看），
+并按端点汇总，由 /metrics 接口以Prometheus文本格式输出。
+每个请求的SQL语句数还记录为直方图，N+1查询会表现为少数端点的语句数集中在高区间。
+
+注意: 指标保存在进程内，多进程部署时每个进程分别统计，由Prometheus按实例抓取后汇总。
+"""
+import threading
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 请求耗时直方图的分桶上限（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 每个请求SQL语句数直方图的分桶上限
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """直方图：各分桶计数、总和及总数"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """按端点汇总的请求指标"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {(端点, 方法, 状态码): 请求数}
+        self.requests = {}
+        # {端点: Histogram}
+        self.durations = {}
+        self.sql_counts = {}
+        # {端点: 累计值}
+        self.sql_seconds = {}
+        self.response_bytes = {}
+
+    def observe(self, endpoint, method, status, duration, sql_count, sql_seconds, response_bytes):
+        """记录一个请求"""
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if endpoint not in self.durations:
+                self.durations[endpoint] = Histogram(DURATION_BUCKETS)
+                self.sql_counts[endpoint] = Histogram(SQL_COUNT_BUCKETS)
+            self.durations[endpoint].observe(duration)
+            self.sql_counts[endpoint].observe(sql_count)
+            self.sql_seconds[endpoint] = self.sql_seconds.get(endpoint, 0.0) + sql_seconds
+            if response_bytes is not None:
+                self.response_bytes[endpoint] = self.response_bytes.get(endpoint, 0) + response_bytes
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self.__init__()
+
+    def render(self):
+        """以Prometheus文本格式输出
+
+        Returns:
+            str: Prometheus exposition格式的文本
+        """
+        lines = []
+        with self._lock:
+            lines.append('# HELP http_requests_total 按端点、方法和状态码统计的请求数')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), value in sorted(self.requests.items()):
+                lines.append(
+                    f'http_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",status="{status}"}} {value}'
+                )
+
+            render_histogram(lines, 'http_request_duration_seconds', '请求耗时（秒）', self.durations)
+            render_histogram(lines, 'http_request_sql_queries', '每个请求执行的SQL语句数', self.sql_counts)
+
+            lines.append('# HELP http_request_sql_duration_seconds_total 请求中SQL语句的累计耗时（秒）')
+            lines.append('# TYPE http_request_sql_duration_seconds_total counter')
+            for endpoint, value in sorted(self.sql_seconds.items()):
+                lines.append(f'http_request_sql_duration_seconds_total{{endpoint="{_escape(endpoint)}"}} {value:.6f}')
+
+            lines.append('# HELP http_response_size_bytes_total 响应体累计大小（字节，不含流式响应）')
+            lines.append('# TYPE http_response_size_bytes_total counter')
+            for endpoint, value in sorted(self.response_bytes.items()):
+                lines.append(f'http_response_size_bytes_total{{endpoint="{_escape(endpoint)}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    """转义Prometheus标签值"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_histogram(lines, name, help_text, histograms, label_name='endpoint'):
+    """输出直方图
+
+    Args:
+        lines (list): 输出行列表
+        name (str): 指标名称
+        help_text (str): 指标说明
+        histograms (dict): {标签值: Histogram}，label_name为None时只输出一个无标签的直方图
+        label_name (str, optional): 标签名. Defaults to 'endpoint'.
+    """
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for label_value, histogram in sorted(histograms.items()):
+        label = f'{label_name}="{_escape(label_value)}",' if label_name else ''
+        cumulative = 0
+        for upper, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label}le="{upper}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{label}le="+Inf"}} {histogram.count}')
+        suffix = f'{{{label.rstrip(",")}}}' if label else ''
+        lines.append(f'{name}_sum{suffix} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{suffix} {histogram.count}')
+
+
+# 进程内的请求指标
+request_metrics = RequestMetrics()
+
+# 其他模块（如连接池）注册的指标输出函数，/metrics接口依次调用并拼接结果
+_collectors = []
+
+
+def register_collector(collector):
+    """注册额外的指标输出函数
+
+    Args:
+        collector (callable): 无参数，返回Prometheus文本格式字符串
+    """
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def render_metrics():
+    """输出全部指标"""
+    parts = [request_metrics.render()]
+    for collector in _collectors:
+        parts.append(collector())
+    return ''.join(parts)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get('query_start_time')
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    if has_request_context() and 'request_started_at' in g:
+        g.sql_count += 1
+        g.sql_seconds += elapsed
+
+
+def start_request_metrics():
+    """请求开始时调用（before_request）"""
+    g.request_started_at = time.perf_counter()
+    g.sql_count = 0
+    g.sql_seconds = 0.0
+    g.db_pool_wait = 0.0
+
+
+def finish_request_metrics(response):
+    """请求结束时调用（after_request），记录指标并添加Server-Timing响应头
+
+    Args:
+        response: Flask响应对象
+
+    Returns:
+        response: 添加了Server-Timing响应头的响应对象
+    """
+    started_at = g.get('request_started_at')
+    if started_at is None:
+        return response
+
+    duration = time.perf_counter() - started_at
+    sql_count = g.get('sql_count', 0)
+    sql_seconds = g.get('sql_seconds', 0.0)
+    response_bytes = None if response.is_streamed else response.calculate_content_length()
+
+    response.headers['Server-Timing'] = (
+        f'app;dur={duration * 1000:.1f}, '
+        f'db;dur={sql_seconds * 1000:.1f};desc="{sql_count} queries", '
+        f'db-pool;dur={g.get("db_pool_wait", 0.0) * 1000:.1f};desc="connection checkout"'
+    )
+    request_metrics.observe(
+        request.endpoint or 'unknown',
+        request.method,
+        response.status_code,
+        duration,
+        sql_count,
+        sql_seconds,
+        response_bytes
+    )
+    return response
@@ -0,0 +1,202 @@
+"""SQL慢查询日志与N+1检测模块
+
+基于SQLAlchemy引擎事件：
+- 慢查询：执行时间超过SLOW_QUERY_THRESHOLD_MS的语句，连同绑定参数、来源路由和request_id写入日志。
+  只比较一次耗时，开销很小，对所有请求（以及命令、后台任务）生效
+- 绑定参数中可能有密码哈希、令牌和个人信息，默认只记录参数的类型（字符串带长度），
+  QUERY_PROFILER_LOG_PARAMS=True时才记录参数值（仅用于开发环境）
+- N+1检测：按QUERY_PROFILER_SAMPLE_RATE抽样请求，统计请求内相同形态（IN列表归一化后语句文本相同）
+  的语句执行次数，请求结束时将次数达到N_PLUS_ONE_THRESHOLD的语句记录下来，
+  例如逐条查询用户昵称的 SELECT ... FROM users WHERE users.id = ?
+
+日志为JSON格式，写入logs/目录下的sql_profile_<日期>.log，由后台线程异步写入。
+"""
+import json
+import logging
+import os
+import queue
+import random
+import re
+import time
+from logging.handlers import RotatingFileHandler, QueueListener
+from datetime import datetime
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.logger import log_dir, BoundedQueueHandler
+
+# 绑定参数在日志中的最大长度
+MAX_PARAMS_LENGTH = 500
+
+# IN列表、多行VALUES中的占位符列表，归一化为同一形态
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# 慢查询/N+1日志记录器，不传递给app记录器，单独写入sql_profile日志文件
+profiler_logger = logging.getLogger('app.sql')
+profiler_logger.propagate = False
+profiler_logger.setLevel(logging.INFO)
+
+
+class QueryProfiler:
+    """慢查询与N+1检测"""
+
+    enabled = False
+    slow_threshold = 0.2
+    sample_rate = 1.0
+    n_plus_one_threshold = 5
+    log_params = False
+    _listener = None
+
+    @staticmethod
+    def statement_shape(statement):
+        """语句形态：合并空白并将占位符列表归一化，IN列表长度不同的同一查询视为相同形态"""
+        return _PLACEHOLDER_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+    @staticmethod
+    def _describe(value):
+        """参数值的类型，字符串和字节带长度，例如 str(12)"""
+        if isinstance(value, (str, bytes)):
+            return f'{type(value).__name__}({len(value)})'
+        return type(value).__name__
+
+    @staticmethod
+    def _redact(parameters):
+        """将绑定参数替换为参数类型，保留参数的结构（位置参数、命名参数、executemany的多组参数）"""
+        if isinstance(parameters, dict):
+            return {key: QueryProfiler._describe(value) for key, value in parameters.items()}
+        if isinstance(parameters, (list, tuple)):
+            return [
+                QueryProfiler._redact(item) if isinstance(item, (list, tuple, dict)) else QueryProfiler._describe(item)
+                for item in parameters
+            ]
+        return QueryProfiler._describe(parameters)
+
+    @staticmethod
+    def _format_params(parameters):
+        if not QueryProfiler.log_params:
+            parameters = QueryProfiler._redact(parameters)
+        text = repr(parameters)
+        if len(text) > MAX_PARAMS_LENGTH:
+            text = text[:MAX_PARAMS_LENGTH] + '...'
+        return text
+
+    @staticmethod
+    def _request_info():
+        """来源路由和request_id，不在请求中时为None"""
+        if not has_request_context():
+            return {'route': None, 'method': None, 'path': None, 'request_id': None}
+        return {
+            'route': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'request_id': getattr(g, 'request_id', None)
+        }
+
+    @staticmethod
+    def _write(event_type, data):
+        profiler_logger.warning(json.dumps(dict(event=event_type, **data), ensure_ascii=False, default=str))
+
+    @staticmethod
+    def on_query(statement, parameters, elapsed):
+        """记录一条已执行的语句"""
+        if elapsed >= QueryProfiler.slow_threshold:
+            QueryProfiler._write('slow_query', dict(
+                duration_ms=round(elapsed * 1000, 2),
+                statement=_WHITESPACE.sub(' ', statement).strip(),
+                parameters=QueryProfiler._format_params(parameters),
+                **QueryProfiler._request_info()
+            ))
+
+        if has_request_context():
+            shapes = g.get('query_shapes')
+            if shapes is not None:
+                shape = QueryProfiler.statement_shape(statement)
+                entry = shapes.get(shape)
+                if entry is None:
+                    # [次数, 累计耗时, 首次执行时的参数]
+                    shapes[shape] = [1, elapsed, parameters]
+                else:
+                    entry[0] += 1
+                    entry[1] += elapsed
+
+    @staticmethod
+    def start_request():
+        """请求开始时按采样率决定是否统计本请求的语句形态"""
+        if QueryProfiler.sample_rate >= 1.0 or random.random() < QueryProfiler.sample_rate:
+            g.query_shapes = {}
+
+    @staticmethod
+    def finish_request():
+        """请求结束时记录重复执行的语句形态"""
+        shapes = g.pop('query_shapes', None)
+        if not shapes:
+            return
+        for shape, (count, total_time, parameters) in shapes.items():
+            if count >= QueryProfiler.n_plus_one_threshold:
+                QueryProfiler._write('n_plus_one', dict(
+                    count=count,
+                    total_ms=round(total_time * 1000, 2),
+                    statement=shape,
+                    example_parameters=QueryProfiler._format_params(parameters),
+                    **QueryProfiler._request_info()
+                ))
+
+    @staticmethod
+    def _start_log_writer(app):
+        """创建sql_profile日志文件的后台写入线程"""
+        if QueryProfiler._listener is not None:
+            return
+        file_handler = RotatingFileHandler(
+            os.path.join(log_dir, f'sql_profile_{datetime.now().strftime("%Y%m%d")}.log'),
+            maxBytes=1024 * 1024 * 10,  # 10MB
+            backupCount=5,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(logging.Formatter('%(message)s'))
+        log_queue = queue.Queue(maxsize=app.config.get('LOG_QUEUE_SIZE', 10000))
+        profiler_logger.addHandler(BoundedQueueHandler(log_queue))
+        QueryProfiler._listener = QueueListener(log_queue, file_handler)
+        QueryProfiler._listener.start()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if QueryProfiler.enabled:
+        conn.info.setdefault('profiler_start_time', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get('profiler_start_time')
+    if not QueryProfiler.enabled or not start_times:
+        return
+    QueryProfiler.on_query(statement, parameters, time.perf_counter() - start_times.pop())
+
+
+def init_query_profiler(app):
+    """根据应用配置初始化慢查询日志和N+1检测
+
+    配置项:
+        QUERY_PROFILER_ENABLED: 是否启用
+        SLOW_QUERY_THRESHOLD_MS: 慢查询阈值（毫秒）
+        QUERY_PROFILER_SAMPLE_RATE: 做N+1检测的请求比例（0~1）
+        N_PLUS_ONE_THRESHOLD: 同一请求内相同形态语句执行多少次视为N+1
+        QUERY_PROFILER_LOG_PARAMS: 是否记录绑定参数的值（否则只记录类型）
+    """
+    QueryProfiler.enabled = app.config.get('QUERY_PROFILER_ENABLED', False)
+    if not QueryProfiler.enabled:
+        return
+    QueryProfiler.slow_threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200) / 1000.0
+    QueryProfiler.sample_rate = app.config.get('QUERY_PROFILER_SAMPLE_RATE', 1.0)
+    QueryProfiler.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+    QueryProfiler.log_params = app.config.get('QUERY_PROFILER_LOG_PARAMS', False)
+    QueryProfiler._start_log_writer(app)
+
+    @app.before_request
+    def _start_query_profile():
+        QueryProfiler.start_request()
+
+    @app.teardown_request
+    def _finish_query_profile(exc):
+        QueryProfiler.finish_request()
@@ -0,0 +1,53 @@
+"""共享Redis客户端模块
+
+为缓存、计数等非关键路径功能提供统一的Redis客户端。
+Redis不可用时调用方应退化为进程内实现，因此这里的操作失败不会抛出异常，
+并在失败后的冷却期内直接跳过Redis，避免每个请求都等待连接超时。
+"""
+import os
+import time
+import redis
+from app.utils.logger import logger
+
+# Redis配置
+REDIS_HOST = os.environ.get('REDIS_HOST') or 'localhost'
+REDIS_PORT = int(os.environ.get('REDIS_PORT') or 6379)
+REDIS_DB = int(os.environ.get('REDIS_DB') or 0)
+# 连接/读写超时（秒），缓存场景宁可快速失败也不要阻塞请求
+REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT') or 0.5)
+# Redis操作失败后跳过Redis的冷却时间（秒）
+REDIS_RETRY_INTERVAL = float(os.environ.get('REDIS_RETRY_INTERVAL') or 30)
+
+# 创建Redis客户端（连接在首次使用时才真正建立）
+redis_client = redis.Redis(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB,
+    decode_responses=True,
+    socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT
+)
+
+# 冷却截止时间（time.monotonic），在此之前不再尝试访问Redis
+_down_until = 0.0
+
+
+def safe_redis(operation, default=None):
+    """安全执行Redis操作
+
+    Args:
+        operation (callable): 接收redis_client作为参数的函数
+        default (any, optional): Redis不可用或操作失败时的返回值. Defaults to None.
+
+    Returns:
+        any: operation的返回值，失败时返回default
+    """
+    global _down_until
+    if time.monotonic() < _down_until:
+        return default
+    try:
+        return operation(redis_client)
+    except redis.RedisError as e:
+        _down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+        logger.warning(f"Redis操作失败，{REDIS_RETRY_INTERVAL}秒内改用进程内存储: {str(e)}")
+        return default
@@ -1,5 +1,8 @@
 from flask import request, g, current_app
-from app.utils.logger import logger
+from app.utils.logger import get_logger
+
+# 每个请求都会记录路径，使用单独的记录器以便按LOG_SAMPLE_RATES采样
+logger = get_logger('request')
 
 
 def register_before_request(app):
@@ -1,9 +1,10 @@
 """响应工具模块
 提供统一的API响应格式生成功能
 """
-from flask import jsonify, g, request
+from flask import g, request
 from .app_uuid import generate_request_id
 from .date_time import get_timestamp
+from .json_provider import json_response
 from .status_codes import (
     HTTP_200_OK,
     HTTP_400_BAD_REQUEST,
@@ -42,7 +43,7 @@ def api_response(success=True, code=HTTP_200_OK, message="", data=None, request_
         "refresh_token": refresh_token,
     }
     
-    return jsonify(response_data), code
+    return json_response(response_data), code
 
 def validate_request_data(required_fields=None):
     """验证请求数据格式和必填字段
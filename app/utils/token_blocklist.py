@@ -0,0 +1,347 @@
+"""JWT令牌黑名单存储
+
+每个携带JWT的请求都要判断令牌是否已被撤销，而绝大多数令牌都未被撤销，
+因此按"布隆过滤器 -> Redis -> 数据库"的顺序判断：
+- 进程内布隆过滤器判断"一定未撤销"时直接返回，不访问网络
+- 可能已撤销时查询Redis，撤销的jti以令牌剩余有效期为TTL保存在Redis中
+- Redis未命中或不可用时查询token_blocklist表，数据库始终是持久的完整记录
+
+布隆过滤器在订阅Redis频道后从数据库构建，其他进程撤销令牌时通过pub/sub通知本进程加入过滤器，
+并按JWT_BLOCKLIST_BLOOM_REFRESH_INTERVAL定期重建。订阅断开期间不信任布隆过滤器，
+退化为每次查询Redis/数据库，重新订阅后会重建过滤器补上断开期间的撤销记录。
+
+撤销时写入Redis或发布通知失败，其他进程的布隆过滤器就收不到这条撤销记录。此时本进程同样不再信任布隆过滤器，
+并由订阅线程重试发布，全部发布成功后恢复；其他进程的订阅若也因Redis故障断开，会在重新订阅时从数据库重建。
+
+每条记录保存令牌的过期时间，已过期的记录不参与判断（过期令牌在验证签名时就会被拒绝），
+并由定时任务和 flask purge-token-blocklist 命令分批删除，表的大小只与未过期的令牌数量相关。
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import redis
+from sqlalchemy import and_, or_
+from app.db import db
+from app.utils.bloom_filter import BloomFilter
+from app.utils.logger import logger
+from app.utils.redis_client import (
+    safe_redis, REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_SOCKET_TIMEOUT, REDIS_RETRY_INTERVAL
+)
+
+# Redis中保存已撤销jti的键
+REDIS_KEY = 'jwt:blocklist:{}'
+# 撤销通知频道，消息内容为jti
+REDIS_CHANNEL = 'jwt:blocklist:revoked'
+
+
+class TokenBlocklistStore:
+    """JWT令牌黑名单存储"""
+
+    _use_redis = False
+    _bloom_capacity = 100000
+    _bloom_error_rate = 0.001
+    _bloom_refresh_interval = 3600
+    # 令牌缺少exp时Redis记录的保留时间（秒）
+    _default_ttl = 3 * 24 * 3600
+    _bloom = None
+    # 只有订阅正常且过滤器已从数据库构建时，才信任"一定未撤销"的判断
+    _bloom_ready = False
+    _listener = None
+    _purge_batch_size = 1000
+    _purge_timer = None
+    # 写入Redis或发布通知失败、等待重试的撤销记录 [(jti, Redis记录的过期时间戳)]
+    _pending_publish = []
+    _pending_lock = threading.Lock()
+
+    @staticmethod
+    def _utcnow():
+        """当前UTC时间（不带时区，与exp列的存储方式一致）"""
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _live_condition():
+        """未过期记录的过滤条件
+
+        exp为空的是添加exp列之前的记录，按created_at加最长令牌有效期判断是否过期
+        """
+        from app.models.token import TokenBlocklist
+
+        now = TokenBlocklistStore._utcnow()
+        legacy_cutoff = now - timedelta(seconds=TokenBlocklistStore._default_ttl)
+        return or_(
+            TokenBlocklist.exp > now,
+            and_(TokenBlocklist.exp.is_(None), TokenBlocklist.created_at > legacy_cutoff)
+        )
+
+    @staticmethod
+    def configure(app):
+        """根据应用配置初始化黑名单存储
+
+        配置项:
+            JWT_BLOCKLIST_USE_REDIS: 是否使用Redis和布隆过滤器
+            JWT_BLOCKLIST_BLOOM_CAPACITY: 布隆过滤器的预期元素数量
+            JWT_BLOCKLIST_BLOOM_ERROR_RATE: 布隆过滤器的误判率
+            JWT_BLOCKLIST_BLOOM_REFRESH_INTERVAL: 布隆过滤器定期重建的间隔（秒，0为不定期重建）
+            JWT_BLOCKLIST_PURGE_BATCH_SIZE: 清理过期记录时每批删除的行数
+        """
+        TokenBlocklistStore._use_redis = app.config.get('JWT_BLOCKLIST_USE_REDIS', False)
+        TokenBlocklistStore._bloom_capacity = app.config.get('JWT_BLOCKLIST_BLOOM_CAPACITY', 100000)
+        TokenBlocklistStore._bloom_error_rate = app.config.get('JWT_BLOCKLIST_BLOOM_ERROR_RATE', 0.001)
+        TokenBlocklistStore._bloom_refresh_interval = app.config.get('JWT_BLOCKLIST_BLOOM_REFRESH_INTERVAL', 3600)
+        TokenBlocklistStore._purge_batch_size = app.config.get('JWT_BLOCKLIST_PURGE_BATCH_SIZE', 1000)
+        refresh_expires = app.config.get('JWT_REFRESH_TOKEN_EXPIRES')
+        if refresh_expires:
+            # 记住我状态下刷新令牌的有效期为配置值的2倍
+            TokenBlocklistStore._default_ttl = int(refresh_expires.total_seconds()) * 2
+
+    @staticmethod
+    def revoke(jti, exp=None):
+        """撤销令牌
+
+        先写入数据库（持久记录），再写入Redis并通知其他进程
+
+        Args:
+            jti (str): 令牌的唯一标识符
+            exp (int, optional): 令牌的过期时间戳，用于计算Redis记录的TTL
+        """
+        from app.models.token import TokenBlocklist
+
+        db.session.add(TokenBlocklist(
+            jti=jti,
+            created_at=datetime.now(timezone.utc),
+            exp=datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None) if exp else None
+        ))
+        db.session.commit()
+
+        bloom = TokenBlocklistStore._bloom
+        if bloom is not None:
+            bloom.add(jti)
+
+        if TokenBlocklistStore._use_redis:
+            expires_at = exp or time.time() + TokenBlocklistStore._default_ttl
+            if expires_at <= time.time():
+                # 令牌已过期，验证时会先因过期被拒绝，无需写入Redis
+                return
+            if not TokenBlocklistStore._publish(jti, expires_at):
+                # 其他进程收不到这条撤销记录，在重试发布成功前不信任布隆过滤器
+                # （先加入重试列表，订阅线程看到_bloom_ready为False时一定能重试到这条记录）
+                with TokenBlocklistStore._pending_lock:
+                    TokenBlocklistStore._pending_publish.append((jti, expires_at))
+                TokenBlocklistStore._bloom_ready = False
+                logger.warning(f"JWT撤销记录写入Redis失败，暂停使用布隆过滤器并等待重试: {jti}")
+
+    @staticmethod
+    def _publish(jti, expires_at):
+        """将撤销记录写入Redis并通知其他进程
+
+        Returns:
+            bool: 是否成功（令牌已过期时无需写入，视为成功）
+        """
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return True
+
+        def _store(client):
+            pipe = client.pipeline()
+            pipe.set(REDIS_KEY.format(jti), 1, ex=ttl)
+            pipe.publish(REDIS_CHANNEL, jti)
+            pipe.execute()
+            return True
+        return safe_redis(_store, default=False)
+
+    @staticmethod
+    def _retry_pending():
+        """重试发布失败的撤销记录
+
+        Returns:
+            bool: 是否已没有等待重试的记录
+        """
+        with TokenBlocklistStore._pending_lock:
+            pending = TokenBlocklistStore._pending_publish
+            TokenBlocklistStore._pending_publish = []
+        failed = [(jti, expires_at) for jti, expires_at in pending if not TokenBlocklistStore._publish(jti, expires_at)]
+        if failed:
+            with TokenBlocklistStore._pending_lock:
+                TokenBlocklistStore._pending_publish[:0] = failed
+        return not failed
+
+    @staticmethod
+    def is_revoked(jti):
+        """判断令牌是否已被撤销
+
+        Args:
+            jti (str): 令牌的唯一标识符
+
+        Returns:
+            bool: 是否已被撤销
+        """
+        bloom = TokenBlocklistStore._bloom
+        if TokenBlocklistStore._bloom_ready and bloom is not None and jti not in bloom:
+            return False
+
+        if TokenBlocklistStore._use_redis:
+            if safe_redis(lambda client: client.exists(REDIS_KEY.format(jti)), default=0):
+                return True
+
+        # Redis未命中（布隆过滤器误判，或撤销时Redis不可用）或Redis不可用时以数据库为准
+        from app.models.token import TokenBlocklist
+        return db.session.query(
+            TokenBlocklist.query.filter(
+                TokenBlocklist.jti == jti,
+                TokenBlocklistStore._live_condition()
+            ).exists()
+        ).scalar()
+
+    @staticmethod
+    def rebuild_bloom():
+        """从数据库的未过期记录重建布隆过滤器，需在应用上下文中调用"""
+        from app.models.token import TokenBlocklist
+
+        query = db.session.query(TokenBlocklist.jti).filter(TokenBlocklistStore._live_condition())
+        capacity = max(TokenBlocklistStore._bloom_capacity, query.count() * 2)
+        bloom = BloomFilter(capacity, TokenBlocklistStore._bloom_error_rate)
+        for (jti,) in query.yield_per(10000):
+            bloom.add(jti)
+        TokenBlocklistStore._bloom = bloom
+        return bloom
+
+    @staticmethod
+    def _listen(app):
+        """订阅撤销通知并维护布隆过滤器，断开后按REDIS_RETRY_INTERVAL重试"""
+        while True:
+            pubsub = None
+            try:
+                # 订阅连接长时间阻塞读取，不能使用共享客户端的读写超时
+                client = redis.Redis(
+                    host=REDIS_HOST,
+                    port=REDIS_PORT,
+                    db=REDIS_DB,
+                    decode_responses=True,
+                    socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                    health_check_interval=30
+                )
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REDIS_CHANNEL)
+
+                # 先订阅再构建，构建期间发布的撤销通知会在构建完成后读取，不会遗漏
+                with app.app_context():
+                    TokenBlocklistStore.rebuild_bloom()
+                TokenBlocklistStore._bloom_ready = TokenBlocklistStore._retry_pending()
+                built_at = time.monotonic()
+                logger.info("JWT黑名单布隆过滤器已构建，开始接收撤销通知")
+
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        TokenBlocklistStore._bloom.add(message['data'])
+                    if not TokenBlocklistStore._bloom_ready and TokenBlocklistStore._retry_pending():
+                        TokenBlocklistStore._bloom_ready = True
+                        logger.info("JWT撤销记录已重新发布，恢复使用布隆过滤器")
+                    interval = TokenBlocklistStore._bloom_refresh_interval
+                    if interval and time.monotonic() - built_at >= interval:
+                        with app.app_context():
+                            TokenBlocklistStore.rebuild_bloom()
+                        built_at = time.monotonic()
+            except Exception as e:
+                TokenBlocklistStore._bloom_ready = False
+                logger.warning(f"JWT黑名单撤销通知订阅中断，{REDIS_RETRY_INTERVAL}秒后重试: {str(e)}")
+                time.sleep(REDIS_RETRY_INTERVAL)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    @staticmethod
+    def start_listener(app):
+        """启动后台订阅线程，未启用Redis时不启动"""
+        if not TokenBlocklistStore._use_redis or TokenBlocklistStore._listener is not None:
+            return
+        thread = threading.Thread(
+            target=TokenBlocklistStore._listen, args=(app,), name='jwt-blocklist-listener', daemon=True
+        )
+        TokenBlocklistStore._listener = thread
+        thread.start()
+
+    @staticmethod
+    def purge_expired(batch_size=None):
+        """分批删除已过期的黑名单记录
+
+        每批先按exp索引查出一批ID再按主键删除并提交，避免长时间锁表
+
+        Args:
+            batch_size (int, optional): 每批删除的行数，默认使用配置项JWT_BLOCKLIST_PURGE_BATCH_SIZE
+
+        Returns:
+            int: 删除的记录数
+        """
+        from app.models.token import TokenBlocklist
+
+        batch_size = batch_size or TokenBlocklistStore._purge_batch_size
+        now = TokenBlocklistStore._utcnow()
+        legacy_cutoff = now - timedelta(seconds=TokenBlocklistStore._default_ttl)
+        expired = or_(
+            TokenBlocklist.exp <= now,
+            and_(TokenBlocklist.exp.is_(None), TokenBlocklist.created_at <= legacy_cutoff)
+        )
+
+        total = 0
+        while True:
+            ids = [row.id for row in db.session.query(TokenBlocklist.id).filter(expired).limit(batch_size)]
+            if not ids:
+                break
+            total += TokenBlocklist.query.filter(
+                TokenBlocklist.id.in_(ids)
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            if len(ids) < batch_size:
+                break
+        return total
+
+    @staticmethod
+    def start_purge_job(app):
+        """启动后台定时清理任务
+
+        配置项JWT_BLOCKLIST_PURGE_INTERVAL为清理间隔（秒），小于等于0时不启动
+        """
+        interval = app.config.get('JWT_BLOCKLIST_PURGE_INTERVAL', 0)
+        if not interval or interval <= 0 or TokenBlocklistStore._purge_timer is not None:
+            return
+
+        def _run():
+            try:
+                with app.app_context():
+                    deleted = TokenBlocklistStore.purge_expired()
+                    if deleted:
+                        logger.info(f"已清理 {deleted} 条过期的JWT黑名单记录")
+            except Exception as e:
+                logger.error(f"JWT黑名单定时清理失败: {str(e)}")
+            finally:
+                _schedule()
+
+        def _schedule():
+            timer = threading.Timer(interval, _run)
+            timer.daemon = True
+            TokenBlocklistStore._purge_timer = timer
+            timer.start()
+
+        _schedule()
+
+    @staticmethod
+    def stats():
+        """获取黑名单存储的状态"""
+        bloom = TokenBlocklistStore._bloom
+        return {
+            'use_redis': TokenBlocklistStore._use_redis,
+            'bloom_ready': TokenBlocklistStore._bloom_ready,
+            'bloom': bloom.stats() if bloom is not None else None
+        }
+
+
+def init_token_blocklist(app):
+    """根据应用配置初始化JWT黑名单存储，非测试环境下启动撤销通知订阅和过期记录清理任务"""
+    TokenBlocklistStore.configure(app)
+    if not app.testing:
+        TokenBlocklistStore.start_listener(app)
+        TokenBlocklistStore.start_purge_job(app)
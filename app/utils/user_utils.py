@@ -1,4 +1,75 @@
+from app.db import db
 from app.models.user.user import User
+from app.utils.cache import TTLCache, MISSING
+from app.utils.redis_client import safe_redis
+
+# 用户昵称缓存
+# 昵称被报告、公告等序列化逻辑在每个请求中反复读取，但很少修改，
+# 因此在进程内缓存，并在用户资料修改/删除时主动失效
+nickname_cache = TTLCache(maxsize=2048, ttl=300)
+
+# 是否同时使用Redis作为二级缓存（多进程部署时可减少数据库查询）
+_use_redis = False
+
+# Redis中昵称缓存的键前缀
+NICKNAME_REDIS_KEY = 'user:nickname:{}'
+
+
+def init_nickname_cache(app):
+    """根据应用配置初始化昵称缓存
+
+    配置项:
+        NICKNAME_CACHE_MAXSIZE: 最大缓存条目数
+        NICKNAME_CACHE_TTL: 缓存过期时间（秒）
+        NICKNAME_CACHE_USE_REDIS: 是否使用Redis作为二级缓存
+    """
+    global _use_redis
+    nickname_cache.configure(
+        maxsize=app.config.get('NICKNAME_CACHE_MAXSIZE', 2048),
+        ttl=app.config.get('NICKNAME_CACHE_TTL', 300)
+    )
+    _use_redis = app.config.get('NICKNAME_CACHE_USE_REDIS', False)
+
+
+def _load_nicknames(ids):
+    """从Redis和数据库加载昵称并写入进程内缓存
+
+    Args:
+        ids (set): 需要加载的用户ID集合（int）
+
+    Returns:
+        dict: {用户ID: 昵称或用户名}，不存在的用户对应空字符串
+    """
+    ids = list(ids)
+    result = {}
+    if _use_redis:
+        keys = [NICKNAME_REDIS_KEY.format(user_id) for user_id in ids]
+        values = safe_redis(lambda client: client.mget(keys), default=None)
+        if values:
+            for user_id, value in zip(ids, values):
+                if value is not None:
+                    result[user_id] = value
+                    nickname_cache.set(user_id, value)
+
+    missing_ids = set(ids) - result.keys()
+    if missing_ids:
+        # 一次IN查询取回所有用户，只查询需要的列
+        rows = db.session.query(User.id, User.nickname, User.username).filter(User.id.in_(missing_ids)).all()
+        loaded = {row.id: row.nickname if row.nickname else row.username for row in rows}
+        # 不存在的用户也缓存为空字符串，避免重复查询
+        for user_id in missing_ids:
+            nickname = loaded.get(user_id, '')
+            result[user_id] = nickname
+            nickname_cache.set(user_id, nickname)
+
+        if _use_redis:
+            def _store(client):
+                pipe = client.pipeline()
+                for user_id in missing_ids:
+                    pipe.set(NICKNAME_REDIS_KEY.format(user_id), result[user_id], ex=nickname_cache.ttl)
+                pipe.execute()
+            safe_redis(_store)
+    return result
 
 
 def get_user_nickname(user_id):
@@ -15,9 +86,56 @@ def get_user_nickname(user_id):
         user_id = int(user_id)
     except (ValueError, TypeError):
         return ""
-    # 查询用户
-    user = User.query.get(user_id)
-    if not user:
-        return ""
-    # 返回昵称或用户名
-    return user.nickname if user.nickname else user.username
\ No newline at end of file
+    # 优先读取缓存
+    nickname = nickname_cache.get(user_id)
+    if nickname is not MISSING:
+        return nickname
+    return _load_nicknames({user_id}).get(user_id, "")
+
+
+def get_user_nicknames(user_ids):
+    """批量根据用户ID获取昵称，用于列表序列化时避免逐行查询用户
+
+    Args:
+        user_ids: 用户ID的可迭代对象，可以是字符串或数字，无效ID会被忽略
+
+    Returns:
+        dict: {用户ID(int): 昵称或用户名}，不存在的用户对应空字符串
+    """
+    result = {}
+    missing_ids = set()
+    for user_id in user_ids:
+        try:
+            user_id = int(user_id)
+        except (ValueError, TypeError):
+            continue
+        nickname = nickname_cache.get(user_id)
+        if nickname is MISSING:
+            missing_ids.add(user_id)
+        else:
+            result[user_id] = nickname
+    if missing_ids:
+        result.update(_load_nicknames(missing_ids))
+    return result
+
+
+def invalidate_user_nickname(user_id):
+    """使指定用户的昵称缓存失效，应在修改昵称/用户名或删除用户后调用
+
+    Args:
+        user_id: 用户ID，可以是字符串或数字
+    """
+    try:
+        user_id = int(user_id)
+    except (ValueError, TypeError):
+        return
+    nickname_cache.delete(user_id)
+    if _use_redis:
+        safe_redis(lambda client: client.delete(NICKNAME_REDIS_KEY.format(user_id)))
+
+
+def get_nickname_cache_stats():
+    """获取昵称缓存统计信息（命中、未命中、淘汰次数等）"""
+    stats = nickname_cache.stats()
+    stats['use_redis'] = _use_redis
+    return stats
@@ -0,0 +1,143 @@
+"""流式XLSX写入工具
+
+不依赖第三方库，按行生成只含一个工作表的XLSX文件：
+- 单元格使用内联字符串（inlineStr），无需在末尾生成共享字符串表
+- zip以数据描述符模式写入不可回退的缓冲区，每写入一批行即可取出已压缩的字节发送给客户端，
+  内存占用与总行数无关
+"""
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+# XML 1.0不允许的控制字符
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_SHEET_FOOTER = '</sheetData></worksheet>'
+
+
+class _ChunkBuffer:
+    """只支持写入的缓冲区，zipfile检测到不可定位时会使用数据描述符模式"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """取出并清空已写入的字节"""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def column_letter(index):
+    """将从0开始的列序号转换为列字母（0 -> A, 26 -> AA）"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _cell(ref, value):
+    """生成单个单元格的XML"""
+    if value is None or value == '':
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(row_number, values):
+    """生成一行的XML"""
+    cells = ''.join(
+        _cell(f'{column_letter(index)}{row_number}', value)
+        for index, value in enumerate(values)
+    )
+    return f'<row r="{row_number}">{cells}</row>'
+
+
+def iter_xlsx(row_batches, sheet_name='Sheet1'):
+    """流式生成XLSX文件内容
+
+    Args:
+        row_batches (iterable): 行批次的可迭代对象，每个批次是若干行（每行为值列表）
+        sheet_name (str, optional): 工作表名称. Defaults to 'Sheet1'.
+
+    Yields:
+        bytes: XLSX文件的字节片段
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _ROOT_RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(sheet_name=escape(sheet_name, {'"': '&quot;'})))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+
+        # 数据量未知，强制使用zip64以支持超过2GB的工作表
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEADER.encode('utf-8'))
+            row_number = 0
+            for rows in row_batches:
+                parts = []
+                for values in rows:
+                    row_number += 1
+                    parts.append(_row(row_number, values))
+                sheet.write(''.join(parts).encode('utf-8'))
+                data = buffer.drain()
+                if data:
+                    yield data
+            sheet.write(_SHEET_FOOTER.encode('utf-8'))
+    yield buffer.drain()
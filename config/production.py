@@ -23,6 +23,37 @@ class ProductionConfig:
     # 配置: 建议设为False以提高性能
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Waitress工作线程数
+    # 作用: 同时处理请求的线程数，每个线程同一时间最多占用一个数据库连接
+    # 配置: 连接池大小默认与其相同
+    WAITRESS_THREADS = int(os.environ.get('WAITRESS_THREADS', 16))
+
+    # 数据库引擎参数
+    # 作用: 配置数据库连接池（SQLite不使用连接池，会忽略pool_size/max_overflow/pool_timeout）
+    # 配置:
+    #   pool_size: 常驻连接数，默认等于WAITRESS_THREADS
+    #   max_overflow: 突发时可额外创建的连接数，用于批量接口、后台任务等
+    #   pool_timeout: 获取连接的最长等待时间（秒），超时抛出异常而不是无限阻塞
+    #   pool_recycle: 连接最长使用时间（秒），需小于MySQL的wait_timeout，避免使用已被服务端断开的连接
+    #   pool_pre_ping: 取出连接时先检测是否可用
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', WAITRESS_THREADS)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 8)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'True') == 'True'
+    }
+
+    # 只读从库
+    # 作用: 报告列表、人员列表、权限计算等只读查询发送到从库，减轻主库压力
+    # 配置: 环境变量DATABASE_REPLICA_URLS，多个地址用逗号分隔，不配置时所有查询都使用主库
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+
+    # 从库选择策略
+    # 作用: 配置了多个从库时如何选择
+    # 配置: round_robin（轮询）或least_connections（使用中连接数最少）
+    DB_REPLICA_STRATEGY = os.environ.get('DB_REPLICA_STRATEGY', 'round_robin')
+
     # CORS凭证支持
     # 作用: 是否允许跨域请求携带凭证
     # 配置: 当前端需要携带Cookie等凭证时设为True
@@ -103,6 +134,111 @@ class ProductionConfig:
     LOG_LEVEL = 'WARNING'
     LOG_FILE = 'app.log'
 
+    # 异步日志
+    # 作用: 请求线程只把日志放入有界队列，由后台线程写入控制台和文件；文件日志为JSON格式并带有request_id
+    # 配置: 是否异步写入、队列容量、队列满时的策略（drop丢弃/block阻塞，阻塞超时后丢弃）、
+    #       文件日志格式（json/text），以及按日志记录器采样的比例（如 app.request=0.1,app.jwt=0.2，WARNING及以上不采样）
+    LOG_ASYNC = os.environ.get('LOG_ASYNC', 'True') == 'True'
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    LOG_QUEUE_POLICY = os.environ.get('LOG_QUEUE_POLICY', 'drop')
+    LOG_QUEUE_BLOCK_TIMEOUT = float(os.environ.get('LOG_QUEUE_BLOCK_TIMEOUT', 1.0))
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', 'app.request=0.1,app.jwt=0.1')
+
+    # 用户昵称缓存配置
+    # 作用: 报告、公告序列化时缓存登记人/创建人昵称，减少用户表查询
+    # 配置: 最大条目数、过期时间（秒），以及是否使用Redis作为多进程共享的二级缓存
+    NICKNAME_CACHE_MAXSIZE = int(os.environ.get('NICKNAME_CACHE_MAXSIZE', 2048))
+    NICKNAME_CACHE_TTL = int(os.environ.get('NICKNAME_CACHE_TTL', 300))
+    NICKNAME_CACHE_USE_REDIS = os.environ.get('NICKNAME_CACHE_USE_REDIS', 'False') == 'True'
+
+    # 用户权限缓存配置
+    # 作用: 缓存每个用户编译后的权限集合，权限校验不再逐个遍历用户权限、角色及父角色
+    # 配置: 最大缓存用户数、过期时间（秒），以及是否使用Redis共享编译结果和失效版本号
+    PERMISSION_CACHE_MAXSIZE = int(os.environ.get('PERMISSION_CACHE_MAXSIZE', 1024))
+    PERMISSION_CACHE_TTL = int(os.environ.get('PERMISSION_CACHE_TTL', 60))
+    PERMISSION_CACHE_USE_REDIS = os.environ.get('PERMISSION_CACHE_USE_REDIS', 'False') == 'True'
+
+    # 权限编译读取从库的延迟
+    # 作用: 权限版本号变化后的这段时间内在主库编译权限，避免从库复制延迟导致旧权限被缓存到新版本号下
+    # 配置: 秒，应不小于从库的最大复制延迟；未配置从库时不起作用
+    PERMISSION_REPLICA_DELAY = float(os.environ.get('PERMISSION_REPLICA_DELAY', 5))
+
+    # JWT黑名单
+    # 作用: 已撤销令牌的jti按剩余有效期保存在Redis中，进程内布隆过滤器（经Redis pub/sub同步）
+    #       直接判定绝大多数未撤销的令牌，Redis不可用时查询token_blocklist表
+    # 配置: 是否启用Redis和布隆过滤器、布隆过滤器的预期元素数量、误判率及定期重建间隔（秒，0为不定期重建）
+    JWT_BLOCKLIST_USE_REDIS = os.environ.get('JWT_BLOCKLIST_USE_REDIS', 'False') == 'True'
+    JWT_BLOCKLIST_BLOOM_CAPACITY = int(os.environ.get('JWT_BLOCKLIST_BLOOM_CAPACITY', 100000))
+    JWT_BLOCKLIST_BLOOM_ERROR_RATE = float(os.environ.get('JWT_BLOCKLIST_BLOOM_ERROR_RATE', 0.001))
+    JWT_BLOCKLIST_BLOOM_REFRESH_INTERVAL = int(os.environ.get('JWT_BLOCKLIST_BLOOM_REFRESH_INTERVAL', 3600))
+
+    # JWT黑名单过期记录清理
+    # 作用: 定时分批删除令牌已过期的黑名单记录，也可执行 flask purge-token-blocklist 手动清理
+    # 配置: 清理间隔（秒，0为不启动）及每批删除的行数
+    JWT_BLOCKLIST_PURGE_INTERVAL = int(os.environ.get('JWT_BLOCKLIST_PURGE_INTERVAL', 3600))
+    JWT_BLOCKLIST_PURGE_BATCH_SIZE = int(os.environ.get('JWT_BLOCKLIST_PURGE_BATCH_SIZE', 1000))
+
+    # 报告全文检索
+    # 作用: MySQL下使用inspection_reports的FULLTEXT(ngram)索引检索报告，需先执行数据库迁移
+    # 配置: 设为False时始终使用LIKE检索（其他数据库自动使用LIKE检索）
+    REPORT_SEARCH_FULLTEXT = os.environ.get('REPORT_SEARCH_FULLTEXT', 'True') == 'True'
+
+    # 报告编号检索模式
+    # 作用: 匹配该正则的搜索输入视为报告编号（前缀），优先在report_code唯一索引上做前缀匹配
+    # 配置: 未设置时使用默认模式（字母前缀 + '-'，如 REP-20250813-）
+    REPORT_CODE_SEARCH_PATTERN = os.environ.get('REPORT_CODE_SEARCH_PATTERN')
+
+    # 报告计数
+    # 作用: 报告总数、有效数及按登记人/状态的分布在创建、删除、修改时增量维护，统计接口不再执行COUNT
+    # 配置: 是否使用Redis保存计数（多进程部署时共享），以及定时按数据库校准计数的间隔（秒，0为不启动）
+    REPORT_COUNTER_USE_REDIS = os.environ.get('REPORT_COUNTER_USE_REDIS', 'False') == 'True'
+    REPORT_COUNTER_RECONCILE_INTERVAL = int(os.environ.get('REPORT_COUNTER_RECONCILE_INTERVAL', 600))
+
+    # 报告导出
+    # 作用: 导出接口按批读取报告并流式写出，内存占用与报告总数无关
+    # 配置: 每批读取的行数
+    REPORT_EXPORT_CHUNK_SIZE = int(os.environ.get('REPORT_EXPORT_CHUNK_SIZE', 1000))
+
+    # 报告批量写入
+    # 作用: 批量创建/更新报告时按块执行IN查询和多行INSERT/UPDATE，避免逐行访问数据库
+    # 配置: 每块的行数
+    REPORT_BATCH_CHUNK_SIZE = int(os.environ.get('REPORT_BATCH_CHUNK_SIZE', 1000))
+
+    # 请求性能指标
+    # 作用: 记录每个请求的耗时、SQL语句数/耗时和响应大小，通过Server-Timing响应头返回，
+    #       并在 /metrics 接口以Prometheus文本格式输出
+    # 配置: 是否启用、访问 /metrics 所需的令牌（Authorization: Bearer <令牌>），
+    #       以及未设置令牌时是否允许匿名访问（不允许时 /metrics 返回404；生产环境默认不允许，需配置METRICS_TOKEN）
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOW_ANONYMOUS = os.environ.get('METRICS_ALLOW_ANONYMOUS', 'False') == 'True'
+
+    # SQL慢查询日志与N+1检测
+    # 作用: 记录超过阈值的SQL语句（含绑定参数、来源路由和request_id），并检测同一请求内重复执行的相同形态语句，
+    #       结果以JSON写入logs/sql_profile_<日期>.log
+    # 配置: 是否启用、慢查询阈值（毫秒）、做N+1检测的请求比例（0~1）、相同形态语句执行多少次视为N+1，
+    #       以及是否记录绑定参数的值（参数中可能有密码哈希、令牌和个人信息，关闭时只记录参数类型，生产环境应关闭）
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', 'True') == 'True'
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    QUERY_PROFILER_SAMPLE_RATE = float(os.environ.get('QUERY_PROFILER_SAMPLE_RATE', 0.05))
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+    QUERY_PROFILER_LOG_PARAMS = os.environ.get('QUERY_PROFILER_LOG_PARAMS', 'False') == 'True'
+
+    # JSON序列化
+    # 作用: 接口响应使用的JSON序列化器，以及是否按键排序
+    # 配置: auto（安装了orjson时使用orjson，否则使用标准库）、orjson或stdlib；按键排序会增加大列表的序列化开销，默认关闭
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+    JSON_SORT_KEYS = False
+
+    # 响应压缩
+    # 作用: 按客户端的Accept-Encoding使用brotli（需安装brotli）或gzip压缩JSON、文本等响应
+    # 配置: 是否启用、最小压缩大小（字节）、gzip压缩级别（1~9）和brotli压缩质量（0~11）
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True') == 'True'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
     # 功能开关
 
     # 应用域名
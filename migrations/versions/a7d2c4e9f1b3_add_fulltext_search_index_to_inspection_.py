@@ -0,0 +1,36 @@
+"""Add fulltext search index to inspection_reports table
+
+Revision ID: a7d2c4e9f1b3
+Revises: 4fa8b40efa28
+Create Date: 2025-08-25 10:12:31.512047
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2c4e9f1b3'
+down_revision = '4fa8b40efa28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FULLTEXT + ngram解析器仅MySQL支持，其他数据库使用LIKE检索，无需建索引
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.create_index(
+        'ft_inspection_reports_search',
+        'inspection_reports',
+        ['report_code', 'project_name', 'client_unit', 'construction_unit', 'inspection_object'],
+        unique=False,
+        mysql_prefix='FULLTEXT',
+        mysql_with_parser='ngram'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.drop_index('ft_inspection_reports_search', table_name='inspection_reports')
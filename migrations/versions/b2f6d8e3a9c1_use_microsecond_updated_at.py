@@ -0,0 +1,37 @@
+"""Use microsecond precision for updated_at of reports and announcements
+
+Revision ID: b2f6d8e3a9c1
+Revises: e4b7c1f9a2d6
+Create Date: 2025-09-02 10:41:18.206531
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2f6d8e3a9c1'
+down_revision = 'e4b7c1f9a2d6'
+branch_labels = None
+depends_on = None
+
+# updated_at用于计算ETag，精确到秒时同一秒内的多次修改会得到相同的ETag
+TABLES = ('inspection_reports', 'announcements')
+
+
+def upgrade():
+    # 其他数据库（SQLite）的DateTime本身保存微秒
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for table in TABLES:
+        op.alter_column(table, 'updated_at', type_=mysql.DATETIME(fsp=6),
+                        existing_type=sa.DateTime(), existing_nullable=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for table in TABLES:
+        op.alter_column(table, 'updated_at', type_=sa.DateTime(),
+                        existing_type=mysql.DATETIME(fsp=6), existing_nullable=True)
@@ -0,0 +1,30 @@
+"""Add composite indexes for report list queries
+
+Revision ID: c5e8a1d3b7f2
+Revises: a7d2c4e9f1b3
+Create Date: 2025-08-26 09:41:07.228315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a1d3b7f2'
+down_revision = 'a7d2c4e9f1b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('inspection_reports', schema=None) as batch_op:
+        # 报告列表：WHERE is_deleted = 0 ORDER BY created_at DESC
+        batch_op.create_index('ix_inspection_reports_deleted_created', ['is_deleted', 'created_at'], unique=False)
+        # 仅查看自己的报告：WHERE is_deleted = 0 AND registrant_id = ? ORDER BY created_at DESC
+        batch_op.create_index('ix_inspection_reports_deleted_registrant_created', ['is_deleted', 'registrant_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('inspection_reports', schema=None) as batch_op:
+        batch_op.drop_index('ix_inspection_reports_deleted_registrant_created')
+        batch_op.drop_index('ix_inspection_reports_deleted_created')
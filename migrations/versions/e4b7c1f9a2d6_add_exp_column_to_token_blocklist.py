@@ -0,0 +1,30 @@
+"""Add exp column to token_blocklist table
+
+Revision ID: e4b7c1f9a2d6
+Revises: c5e8a1d3b7f2
+Create Date: 2025-08-27 15:20:44.613092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7c1f9a2d6'
+down_revision = 'c5e8a1d3b7f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        # 令牌过期时间（UTC），已有记录为空，清理时按created_at判断
+        batch_op.add_column(sa.Column('exp', sa.DateTime(), nullable=True))
+        # 清理任务：WHERE exp < ?
+        batch_op.create_index('ix_token_blocklist_exp', ['exp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.drop_index('ix_token_blocklist_exp')
+        batch_op.drop_column('exp')
@@ -38,7 +38,8 @@ if __name__ == '__main__':
     else:
         # 生产环境使用Waitress
         from waitress import serve
-        serve(app, host=host, port=port)
+        # 线程数与数据库连接池大小（SQLALCHEMY_ENGINE_OPTIONS）使用同一配置
+        serve(app, host=host, port=port, threads=app.config['WAITRESS_THREADS'])
 
 
 
@@ -0,0 +1,139 @@
+"""检查报告查询是否使用了预期索引
+
+执行ReportService中的报告列表/按编号查询方法及报告计数的校准查询，捕获它们实际发出的SQL，
+再对每条SQL执行EXPLAIN（SQLite下为EXPLAIN QUERY PLAN），确认使用了迁移
+c5e8a1d3b7f2 中添加的复合索引（按编号查询则确认走report_code唯一索引）。
+
+注意: 表中数据过少时MySQL优化器可能直接选择全表扫描，请在接近生产数据量的库上运行。
+
+使用方法:
+    python scripts/check_report_indexes.py [--user-id 1]
+"""
+import argparse
+import os
+import sys
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+from sqlalchemy import event
+from app import create_app
+from app.db import db
+from app.models.report.inspection_report import InspectionReport
+from app.services.report.report_service import ReportService
+from app.services.report.report_counter import ReportCounterService
+
+# 列表查询应使用的复合索引
+LIST_INDEX = 'ix_inspection_reports_deleted_created'
+OWN_LIST_INDEX = 'ix_inspection_reports_deleted_registrant_created'
+
+
+def capture_statements(func):
+    """执行func并返回期间发出的、访问inspection_reports表的SQL语句及参数"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'inspection_reports' in statement and statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def explain(statement, parameters):
+    """执行EXPLAIN并返回(计划文本, 使用的索引名集合, 是否存在全表扫描)"""
+    dialect = db.engine.dialect.name
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    with db.engine.connect() as conn:
+        result = conn.exec_driver_sql(prefix + statement, parameters)
+        columns = list(result.keys())
+        rows = [dict(zip(columns, row)) for row in result]
+
+    used_indexes = set()
+    full_scan = False
+    if dialect == 'mysql':
+        for row in rows:
+            if row.get('table') != 'inspection_reports':
+                continue
+            if row.get('key'):
+                used_indexes.add(row['key'])
+            if row.get('type') == 'ALL':
+                full_scan = True
+    else:
+        for row in rows:
+            detail = str(row.get('detail', ''))
+            if 'INDEX' in detail:
+                used_indexes.add(detail.split('INDEX', 1)[1].split()[0])
+            elif detail.startswith('SCAN') and 'inspection_reports' in detail:
+                full_scan = True
+    return '\n'.join(str(row) for row in rows), used_indexes, full_scan
+
+
+def check(name, func, expected_indexes=None):
+    """检查一个服务方法发出的所有报告查询
+
+    Args:
+        name (str): 检查项名称
+        func (callable): 调用服务方法的函数
+        expected_indexes (set, optional): 可接受的索引名；为None时只要求不发生全表扫描
+
+    Returns:
+        bool: 是否通过
+    """
+    passed = True
+    statements = capture_statements(func)
+    if not statements:
+        print(f'[跳过] {name}: 未发出访问inspection_reports的查询（可能命中了缓存）')
+        return True
+    for statement, parameters in statements:
+        plan, used_indexes, full_scan = explain(statement, parameters)
+        if expected_indexes is None:
+            ok = bool(used_indexes) and not full_scan
+        else:
+            ok = bool(used_indexes & expected_indexes)
+        passed = passed and ok
+        print(f'[{"通过" if ok else "失败"}] {name}: 使用索引 {sorted(used_indexes) or "无"}')
+        if not ok:
+            print(f'  SQL: {" ".join(statement.split())}')
+            print(f'  计划:\n    ' + plan.replace('\n', '\n    '))
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查报告查询是否使用了预期索引')
+    parser.add_argument('--user-id', type=int, default=1, help='scope=own检查使用的用户ID')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        sample = InspectionReport.query.with_entities(InspectionReport.report_code).limit(3).all()
+        sample_codes = [row.report_code for row in sample] or ['REP-00000000-000000']
+
+        results = [
+            # 分页的COUNT查询只按is_deleted过滤，两个以is_deleted开头的复合索引都可以覆盖
+            check('get_reports_paginated(scope=all)',
+                  lambda: ReportService.get_reports_paginated(1, 10, '', user_id=args.user_id, scope='all'),
+                  {LIST_INDEX, OWN_LIST_INDEX}),
+            check('get_reports_paginated(scope=own)',
+                  lambda: ReportService.get_reports_paginated(1, 10, '', user_id=args.user_id, scope='own'),
+                  {OWN_LIST_INDEX}),
+            # 统计接口读取增量维护的计数，这里检查计数加载/校准时的分组统计查询
+            check('ReportCounterService._load_from_db',
+                  ReportCounterService._load_from_db),
+            check('get_reports_by_codes',
+                  lambda: ReportService.get_reports_by_codes(sample_codes, str(args.user_id), True)),
+        ]
+
+    if all(results):
+        print('所有报告查询均使用了预期索引')
+        return 0
+    print('部分报告查询未使用预期索引')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
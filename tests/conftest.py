@@ -0,0 +1,64 @@
+"""pytest公共夹具
+
+每个测试使用临时目录中的SQLite数据库文件，不依赖MySQL和Redis。
+pytest-flask会为使用app夹具的测试推入请求上下文，测试中可以直接调用服务层方法。
+"""
+import os
+import pytest
+
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import create_app
+from app.db import db as _db
+from app.models.user.user import User
+from app.models.report.inspection_report import InspectionReport
+from app.services.permission_service import PermissionService
+from app.utils.user_utils import nickname_cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    # 在create_app之前设置，测试环境不启动计数校准、黑名单订阅和清理等后台任务
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+    })
+    nickname_cache.clear()
+    with app.app_context():
+        _db.create_all()
+        # 每个测试使用新的数据库，使之前编译的权限集合和角色闭包失效
+        PermissionService.invalidate_permission_cache()
+        yield app
+        _db.session.remove()
+        for engine in _db.get_binds(app).values():
+            engine.dispose()
+        _db.engine.dispose()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def make_user(db):
+    """创建用户"""
+    def _make_user(username, nickname=None):
+        user = User(username=username, email=f'{username}@example.com', password_hash='x', nickname=nickname)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return _make_user
+
+
+@pytest.fixture
+def make_report(db):
+    """创建报告，未指定created_at时由模型默认值生成"""
+    def _make_report(report_code, **kwargs):
+        kwargs.setdefault('project_name', '测试工程')
+        kwargs.setdefault('client_unit', '测试单位')
+        report = InspectionReport(report_code=report_code, **kwargs)
+        db.session.add(report)
+        db.session.commit()
+        return report
+    return _make_report
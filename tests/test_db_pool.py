@@ -0,0 +1,52 @@
+"""连接池指标测试"""
+import pytest
+from sqlalchemy import create_engine, exc
+from app.utils.db_pool import TimedQueuePool, render_pool_metrics
+
+
+@pytest.fixture
+def engines(tmp_path):
+    engines = {
+        bind: create_engine(f"sqlite:///{tmp_path / f'{bind}.db'}", poolclass=TimedQueuePool,
+                            pool_size=1, max_overflow=0, pool_timeout=0.05)
+        for bind in ('default', 'replica_0')
+    }
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+def test_stats_are_kept_per_pool(engines):
+    conn = engines['replica_0'].connect()
+    try:
+        with pytest.raises(exc.TimeoutError):
+            engines['replica_0'].connect()
+    finally:
+        conn.close()
+
+    assert engines['default'].pool.stats.checkout_wait.count == 0
+    assert engines['replica_0'].pool.stats.checkout_wait.count == 2
+    assert engines['replica_0'].pool.stats.timeouts == 1
+
+
+def test_stats_survive_pool_recreate(engines):
+    engines['default'].connect().close()
+    engines['default'].dispose()
+    assert engines['default'].pool.stats.checkout_wait.count == 1
+
+
+def test_render_with_bind_label(engines):
+    conn = engines['default'].connect()
+    try:
+        text = render_pool_metrics(engines, max_overflow=3)
+    finally:
+        conn.close()
+
+    assert 'db_pool_checked_out{bind="default"} 1' in text
+    assert 'db_pool_checked_out{bind="replica_0"} 0' in text
+    assert 'db_pool_max_overflow{bind="default"} 3' in text
+    assert 'db_pool_checkout_wait_seconds_count{bind="default"} 1' in text
+    assert 'db_pool_checkout_wait_seconds_count{bind="replica_0"} 0' in text
+    assert 'db_pool_checkout_timeouts_total{bind="replica_0"} 0' in text
+    # 每个指标只输出一次HELP
+    assert text.count('# HELP db_pool_checked_out ') == 1
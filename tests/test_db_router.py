@@ -0,0 +1,127 @@
+"""读写分离测试
+
+主库和两个从库分别使用独立的SQLite文件，各库写入不同的数据，根据查询结果判断查询发送到了哪个库。
+"""
+import pytest
+from sqlalchemy.orm import Session
+from app.models.report.inspection_report import InspectionReport
+from app.models.user.permission import Permission, user_permissions
+from app.models.user.role import Role
+from app.models.user.user import User
+from app.services import permission_service
+from app.services.permission_service import PermissionService, RoleHierarchy
+from app.utils.db_router import get_replica_router, init_db_router, use_replica
+
+
+@pytest.fixture(params=['round_robin', 'least_connections'])
+def replica_app(request, app, db, tmp_path):
+    app.config['SQLALCHEMY_REPLICA_URIS'] = [f"sqlite:///{tmp_path / f'replica_{index}.db'}" for index in range(2)]
+    app.config['DB_REPLICA_STRATEGY'] = request.param
+    init_db_router(app, db)
+    for bind_key in get_replica_router(app).bind_keys:
+        db.Model.metadata.create_all(db.get_engine(app, bind=bind_key))
+    return app
+
+
+def add_to_bind(db, app, bind_key, *objects, statements=()):
+    """直接写入指定的库（绕过读写分离），bind_key为None时写入主库"""
+    with Session(db.get_engine(app, bind=bind_key)) as session:
+        session.add_all(objects)
+        session.flush()
+        for statement in statements:
+            session.execute(statement)
+        session.commit()
+
+
+@pytest.fixture
+def seeded_reports(replica_app, db, make_report):
+    """主库写入报告P，各从库写入以bind名称为编号的报告"""
+    make_report('P')
+    for bind_key in get_replica_router(replica_app).bind_keys:
+        add_to_bind(db, replica_app, bind_key,
+                    InspectionReport(report_code=bind_key, project_name='测试工程', client_unit='测试单位'))
+    db.session.remove()
+
+
+def report_codes():
+    return [report.report_code for report in InspectionReport.query.all()]
+
+
+def test_reads_go_to_replica(seeded_reports):
+    assert report_codes() == ['P']
+    with use_replica():
+        assert report_codes()[0] in ('replica_0', 'replica_1')
+
+
+def test_flush_pins_session_to_primary(seeded_reports, db):
+    with use_replica():
+        db.session.add(InspectionReport(report_code='P2', project_name='测试工程', client_unit='测试单位'))
+        db.session.flush()
+        assert sorted(report_codes()) == ['P', 'P2']
+
+
+def test_update_statement_pins_session_to_primary(seeded_reports, db):
+    with use_replica():
+        InspectionReport.query.filter_by(report_code='P').update({'project_name': '已修改'})
+        assert report_codes() == ['P']
+    assert db.session.info['db_primary_pinned']
+
+
+def test_select_for_update_uses_primary(seeded_reports):
+    with use_replica():
+        assert [report.report_code for report in InspectionReport.query.with_for_update().all()] == ['P']
+
+
+@pytest.mark.parametrize('replica_app', ['round_robin'], indirect=True)
+def test_round_robin_alternates_replicas(seeded_reports, db):
+    with use_replica():
+        codes = []
+        for _ in range(4):
+            codes.extend(report_codes())
+            db.session.commit()
+    assert codes == ['replica_0', 'replica_1', 'replica_0', 'replica_1']
+
+
+@pytest.mark.parametrize('replica_app', ['least_connections'], indirect=True)
+def test_least_connections_prefers_idle_replica(seeded_reports, replica_app, db):
+    with use_replica():
+        assert report_codes() == ['replica_0']
+        db.session.commit()
+        # replica_0上有一个使用中的连接，查询发送到replica_1
+        with db.get_engine(replica_app, bind='replica_0').connect():
+            assert get_replica_router(replica_app).stats()['in_use'] == {'replica_0': 1, 'replica_1': 0}
+            assert report_codes() == ['replica_1']
+
+
+def test_check_parent_reads_primary(replica_app, db):
+    # 主库中role 2的父角色为role 1，从库尚未同步
+    add_to_bind(db, replica_app, None, Role(id=1, name='parent'), Role(id=2, name='child', parent_id=1))
+    for bind_key in get_replica_router(replica_app).bind_keys:
+        add_to_bind(db, replica_app, bind_key, Role(id=1, name='parent'), Role(id=2, name='child'))
+
+    with use_replica():
+        with pytest.raises(ValueError):
+            RoleHierarchy.check_parent(1, 2)
+
+
+def test_permissions_compiled_on_primary_after_invalidation(replica_app, db, monkeypatch):
+    def seed(bind_key, granted):
+        add_to_bind(
+            db, replica_app, bind_key,
+            User(id=1, username='u', email='u@example.com', password_hash='x'),
+            Permission(id=1, code='report:read', resource='report', action='read'),
+            statements=[user_permissions.insert().values(user_id=1, permission_id=1)] if granted else []
+        )
+
+    # 主库已授予权限，从库尚未同步
+    seed(None, True)
+    for bind_key in get_replica_router(replica_app).bind_keys:
+        seed(bind_key, False)
+
+    PermissionService.invalidate_permission_cache()
+    assert PermissionService.get_permission_set(1) == {('report', 'read', 'all')}
+
+    # 超过PERMISSION_REPLICA_DELAY后，同一版本号下的编译使用从库
+    monkeypatch.setattr(permission_service, '_replica_delay', 0)
+    permission_service.permission_cache.clear()
+    assert PermissionService.get_permission_set(1) == frozenset()
@@ -0,0 +1,94 @@
+"""ETag条件请求和响应压缩测试"""
+import gzip
+from datetime import datetime
+import pytest
+from sqlalchemy.dialects import mysql
+from app.models.announcement import Announcement
+from app.models.report.inspection_report import InspectionReport
+from app.services.report.report_service import ReportService
+from app.utils.http_cache import conditional_response, make_etag
+from app.utils.json_provider import json_response
+
+ETAG = make_etag('resource', 1)
+LAST_MODIFIED = datetime(2024, 1, 1, 8, 0, 0)
+
+
+@pytest.fixture
+def builds(app):
+    """注册一个带ETag的测试接口，返回生成完整响应的次数"""
+    calls = []
+
+    def build_response():
+        calls.append(1)
+        return json_response({'items': ['检测报告'] * 200})
+
+    @app.route('/_conditional')
+    def _conditional():
+        return conditional_response(ETAG, build_response, last_modified=LAST_MODIFIED)
+
+    return calls
+
+
+def test_gzip_response_etag_suffix(client, builds):
+    response = client.get('/_conditional', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == f'"{ETAG}-gzip"'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).decode('utf-8').startswith('{"items":["检测报告"')
+
+
+def test_uncompressed_response(client, builds):
+    response = client.get('/_conditional', headers={'Accept-Encoding': 'identity'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == f'"{ETAG}"'
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+@pytest.mark.parametrize('if_none_match', [f'"{ETAG}-gzip"', f'"{ETAG}"', f'"other", "{ETAG}-br"', '*'])
+def test_not_modified(client, builds, if_none_match):
+    response = client.get('/_conditional', headers={'If-None-Match': if_none_match, 'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    # 返回客户端持有的ETag（包括编码后缀）
+    if if_none_match != '*':
+        assert response.headers['ETag'] in if_none_match
+    assert builds == []
+
+
+def test_etag_mismatch_builds_response(client, builds):
+    response = client.get('/_conditional', headers={'If-None-Match': '"other"'})
+    assert response.status_code == 200
+    assert builds == [1]
+
+
+def test_if_modified_since(client, builds):
+    not_modified = client.get('/_conditional', headers={'If-Modified-Since': 'Mon, 01 Jan 2024 08:00:00 GMT'})
+    modified = client.get('/_conditional', headers={'If-Modified-Since': 'Mon, 01 Jan 2024 07:59:59 GMT'})
+    # If-None-Match优先，不匹配时忽略If-Modified-Since
+    mismatch = client.get('/_conditional', headers={
+        'If-None-Match': '"other"', 'If-Modified-Since': 'Mon, 01 Jan 2024 08:00:00 GMT'
+    })
+
+    assert (not_modified.status_code, modified.status_code, mismatch.status_code) == (304, 200, 200)
+
+
+def test_updated_at_has_microsecond_precision_on_mysql():
+    for model in (InspectionReport, Announcement):
+        column_type = model.__table__.c.updated_at.type
+        assert str(column_type.compile(dialect=mysql.dialect())) == 'DATETIME(6)'
+
+
+def test_report_etag_changes_within_same_second(make_report, db):
+    report = make_report('R1', updated_at=datetime(2024, 1, 1, 8, 0, 0, 100))
+    first, _ = ReportService.get_report_etag('R1')
+    report.updated_at = datetime(2024, 1, 1, 8, 0, 0, 200)
+    db.session.commit()
+    second, _ = ReportService.get_report_etag('R1')
+
+    assert first != second
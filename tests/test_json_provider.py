@@ -0,0 +1,41 @@
+"""JSON序列化器测试：标准库与orjson的输出必须一致"""
+import datetime
+import pytest
+from app.models.report.inspection_report import InspectionReport
+from app.utils.json_provider import StdlibJSONProvider, OrjsonJSONProvider
+
+
+def test_backends_serialize_to_dict_identically(make_user, make_report):
+    pytest.importorskip('orjson')
+    user = make_user('registrant', nickname='登记人')
+    report = make_report(
+        'R1',
+        registrant_id=user.id,
+        project_name='某某大桥',
+        commission_date=datetime.date(2024, 1, 2),
+        report_date=datetime.date(2024, 3, 4)
+    )
+    data = report.to_dict()
+    # to_dict返回原始的date值，由序列化器统一格式化
+    assert isinstance(data['commission_date'], datetime.date)
+
+    stdlib_body = StdlibJSONProvider().dumps(data)
+    orjson_body = OrjsonJSONProvider().dumps(data)
+
+    assert stdlib_body == orjson_body
+    assert b'"commission_date":"2024-01-02"' in stdlib_body
+    assert b'"report_date":"2024-03-04"' in stdlib_body
+    # 中文不转义
+    assert '"project_name":"某某大桥"'.encode('utf-8') in stdlib_body
+
+
+@pytest.mark.parametrize('sort_keys', [False, True])
+def test_backends_serialize_values_identically(sort_keys):
+    pytest.importorskip('orjson')
+    data = {
+        'b': datetime.datetime(2024, 1, 2, 8, 30),
+        'a': ['中文', None, True, 1.5],
+        'c': {'d': datetime.date(2024, 1, 2)}
+    }
+    assert (StdlibJSONProvider(sort_keys=sort_keys).dumps(data)
+            == OrjsonJSONProvider(sort_keys=sort_keys).dumps(data))
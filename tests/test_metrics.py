@@ -0,0 +1,20 @@
+"""/metrics 接口访问控制测试"""
+
+
+def test_metrics_open_when_anonymous_allowed(app, client):
+    app.config.update(METRICS_TOKEN=None, METRICS_ALLOW_ANONYMOUS=True)
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert 'http_requests_total' in response.get_data(as_text=True)
+
+
+def test_metrics_hidden_without_token_when_anonymous_not_allowed(app, client):
+    app.config.update(METRICS_TOKEN=None, METRICS_ALLOW_ANONYMOUS=False)
+    assert client.get('/metrics').status_code == 404
+
+
+def test_metrics_requires_configured_token(app, client):
+    app.config.update(METRICS_TOKEN='secret', METRICS_ALLOW_ANONYMOUS=False)
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
@@ -0,0 +1,146 @@
+"""权限编译缓存测试"""
+import itertools
+import pytest
+from app.models.report.inspection_report import InspectionReport
+from app.models.user.permission import Permission
+from app.models.user.role import Role
+from app.models.user.user import User
+from app.services.admin.staff_service import StaffService
+from app.services.permission_service import PermissionService
+
+
+def legacy_check_permission(permission, resource, action, scope, user, resource_id):
+    """编译缓存之前逐个遍历权限对象的判断（PermissionService._check_permission），作为语义参照"""
+    if not (permission.is_active and permission.resource == resource and permission.action == action
+            and permission.scope in ('all', scope)):
+        return False
+    if scope == 'own' and resource_id is not None:
+        if not resource_id or not user:
+            return False
+        if resource == 'inspection_report':
+            instance = InspectionReport.query.filter_by(report_code=resource_id).first()
+            return instance is not None and str(user.id) == str(instance.registrant_id)
+        if resource == 'user':
+            instance = User.query.get(resource_id)
+            return instance is not None and str(user.id) == str(instance.id)
+        return False
+    return True
+
+
+def legacy_has_role_permission(role, resource, action, scope, user, resource_id, checked_roles):
+    if role.id in checked_roles:
+        return False
+    checked_roles.add(role.id)
+    if scope != 'all':
+        if any(perm.scope == 'all' and legacy_check_permission(perm, resource, action, 'all', user, None)
+               for perm in role.permissions):
+            return True
+        if role.parent and legacy_has_role_permission(role.parent, resource, action, 'all', user, None,
+                                                      set(checked_roles)):
+            return True
+    if any(legacy_check_permission(perm, resource, action, scope, user, resource_id) for perm in role.permissions):
+        return True
+    if role.parent:
+        return legacy_has_role_permission(role.parent, resource, action, scope, user, resource_id, checked_roles)
+    return False
+
+
+def legacy_has_user_permission(user, resource, action, scope, resource_id):
+    if any(perm.scope == 'all' and legacy_check_permission(perm, resource, action, 'all', user, None)
+           for perm in user.permissions):
+        return True
+    if any(legacy_has_role_permission(role, resource, action, 'all', user, None, set()) for role in user.roles):
+        return True
+    if scope != 'all':
+        if any(legacy_check_permission(perm, resource, action, scope, user, resource_id) for perm in user.permissions):
+            return True
+        if any(legacy_has_role_permission(role, resource, action, scope, user, resource_id, set())
+               for role in user.roles):
+            return True
+    return False
+
+
+@pytest.fixture
+def permissions(db):
+    def permission(code, resource, action, scope, is_active=True):
+        return Permission(code=code, resource=resource, action=action, scope=scope, is_active=is_active)
+
+    perms = {
+        'report_view_all': permission('inspection_report:view:all', 'inspection_report', 'view', 'all'),
+        'report_edit_own': permission('inspection_report:edit:own', 'inspection_report', 'edit', 'own'),
+        'report_delete_own': permission('inspection_report:delete:own', 'inspection_report', 'delete', 'own',
+                                        is_active=False),
+        'user_view_own': permission('user:view:own', 'user', 'view', 'own'),
+        'user_edit_all': permission('user:edit:all', 'user', 'edit', 'all'),
+    }
+    db.session.add_all(perms.values())
+    db.session.commit()
+    return perms
+
+
+@pytest.fixture
+def users(db, make_user, make_report, permissions):
+    base = Role(name='base', permissions=[permissions['report_edit_own']])
+    child = Role(name='child', parent=base, permissions=[permissions['user_view_own']])
+    viewer = Role(name='viewer', permissions=[permissions['report_view_all']])
+    db.session.add_all([base, child, viewer])
+
+    owner = make_user('owner')
+    owner.roles.append(child)
+    owner.permissions.append(permissions['report_delete_own'])
+    viewer_user = make_user('viewer')
+    viewer_user.roles.append(viewer)
+    admin = make_user('admin')
+    admin.permissions.append(permissions['user_edit_all'])
+    admin.roles.append(base)
+    nobody = make_user('nobody')
+    db.session.commit()
+
+    make_report('R1', registrant_id=owner.id)
+    make_report('R2', registrant_id=viewer_user.id)
+    return [owner, viewer_user, admin, nobody]
+
+
+def test_matches_legacy_semantics(users):
+    resources = {'inspection_report': [None, 'R1', 'R2', 'MISSING'], 'user': [None] + [user.id for user in users]}
+    for user in users:
+        for resource, resource_ids in resources.items():
+            for action, scope, resource_id in itertools.product(['view', 'edit', 'delete'], ['all', 'own'],
+                                                                 resource_ids):
+                expected = legacy_has_user_permission(user, resource, action, scope, resource_id)
+                actual = PermissionService.has_user_permission(user, resource, action, scope, resource_id)
+                assert actual == expected, (user.username, resource, action, scope, resource_id)
+
+
+def test_role_permission_change_invalidates_cache(users, permissions):
+    owner = users[0]
+    assert not PermissionService.has_user_permission(owner, 'inspection_report', 'view')
+
+    # 修改父角色的权限，子角色的用户立即生效
+    base = Role.query.filter_by(name='base').one()
+    StaffService.update_role_permissions(base.id, [permissions['report_view_all'].id], [])
+    assert PermissionService.has_user_permission(owner, 'inspection_report', 'view')
+
+    StaffService.set_role_permissions(base.id, [])
+    assert not PermissionService.has_user_permission(owner, 'inspection_report', 'edit', 'own', 'R1')
+
+
+def test_user_role_and_permission_change_invalidates_cache(users, permissions):
+    nobody = users[3]
+    assert PermissionService.get_permission_set(nobody.id) == frozenset()
+
+    viewer = Role.query.filter_by(name='viewer').one()
+    StaffService.update_staff_roles(nobody.id, [viewer.id])
+    assert PermissionService.get_permission_set(nobody.id) == {('inspection_report', 'view', 'all')}
+
+    StaffService.update_user_permissions(nobody.id, [permissions['user_edit_all'].id])
+    assert ('user', 'edit', 'all') in PermissionService.get_permission_set(nobody.id)
+
+
+def test_role_hierarchy_change_invalidates_cache(users):
+    owner = users[0]
+    assert ('inspection_report', 'edit', 'own') in PermissionService.get_permission_set(owner.id)
+
+    child = Role.query.filter_by(name='child').one()
+    StaffService.set_role_parent(child.id, None)
+    assert ('inspection_report', 'edit', 'own') not in PermissionService.get_permission_set(owner.id)
@@ -0,0 +1,29 @@
+"""SQL慢查询日志测试"""
+import json
+import pytest
+from app.utils.query_profiler import QueryProfiler, profiler_logger
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """记录写入的慢查询日志"""
+    records = []
+    monkeypatch.setattr(QueryProfiler, 'slow_threshold', 0.1)
+    monkeypatch.setattr(profiler_logger, 'warning', lambda message: records.append(json.loads(message)))
+    return records
+
+
+def test_parameters_redacted_by_default(written, monkeypatch):
+    monkeypatch.setattr(QueryProfiler, 'log_params', False)
+    QueryProfiler.on_query('UPDATE users SET password_hash=? WHERE id=?', ('pbkdf2:sha256:secret', 7), 0.5)
+    QueryProfiler.on_query('INSERT INTO t VALUES (%(a)s)', [{'a': 'token'}, {'a': None}], 0.5)
+
+    assert written[0]['parameters'] == "['str(20)', 'int']"
+    assert written[1]['parameters'] == "[{'a': 'str(5)'}, {'a': 'NoneType'}]"
+    assert 'secret' not in json.dumps(written)
+
+
+def test_parameters_logged_when_enabled(written, monkeypatch):
+    monkeypatch.setattr(QueryProfiler, 'log_params', True)
+    QueryProfiler.on_query('SELECT * FROM users WHERE id=?', (7,), 0.5)
+    assert written[0]['parameters'] == '(7,)'
@@ -0,0 +1,167 @@
+"""报告批量创建、更新、删除测试"""
+import pytest
+from app.models.report.inspection_report import InspectionReport
+from app.services.report.report_service import ReportService
+
+
+def report_data(report_code, **kwargs):
+    data = {
+        'report_code': report_code,
+        'project_name': '测试工程',
+        'client_unit': '测试单位',
+        'inspection_unit': '检测单位',
+        'inspection_object': '检测对象',
+        'inspection_type': '检测类型',
+        'inspection_conclusion': '合格',
+    }
+    data.update(kwargs)
+    return data
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user('registrant')
+
+
+def test_batch_create_reports_failures(app, make_report, user):
+    app.config['REPORT_BATCH_CHUNK_SIZE'] = 2
+    make_report('EXISTING')
+    missing_field = report_data('NEW3')
+    del missing_field['inspection_type']
+    reports_data = [
+        report_data('NEW1', commission_date='2024年1月2日'),
+        report_data('NEW1'),
+        report_data('EXISTING'),
+        report_data(''),
+        report_data('NEW2', sampling_date='not-a-date'),
+        missing_field,
+        report_data('NEW4'),
+        report_data('NEW5'),
+    ]
+
+    result = ReportService.batch_create_reports(reports_data, user.id)
+
+    assert result['success'] is True
+    data = result['data']
+    assert (data['total_count'], data['success_count'], data['failed_count']) == (8, 3, 5)
+    assert data['created_report_codes'] == ['NEW1', 'NEW4', 'NEW5']
+    messages = [failed['message'] for failed in data['failed_reports']]
+    assert messages[:3] == ['报告编号已存在', '报告编号已存在', '报告编号必须上传']
+    assert messages[3].startswith('抽样日期格式不正确')
+    assert messages[4].startswith('缺少必填字段') and 'inspection_type' in messages[4]
+    assert [failed['data'] for failed in data['failed_reports']] == [reports_data[index] for index in (1, 2, 3, 4, 5)]
+
+    created = InspectionReport.query.filter_by(report_code='NEW1').one()
+    assert str(created.commission_date) == '2024-01-02'
+    assert created.registrant_id == user.id
+    assert InspectionReport.query.count() == 4
+
+
+def test_batch_create_reports_rejects_non_string_code(make_report, user):
+    make_report('123')
+
+    result = ReportService.batch_create_reports([report_data(123), report_data('NEW1')], user.id)
+
+    assert result['success'] is True
+    assert result['data']['created_report_codes'] == ['NEW1']
+    assert [failed['message'] for failed in result['data']['failed_reports']] == ['报告编号必须是字符串']
+    assert InspectionReport.query.count() == 2
+
+
+def test_batch_create_reports_unknown_user(app):
+    result = ReportService.batch_create_reports([report_data('NEW1')], 999)
+    assert (result['success'], result['code']) == (False, 404)
+    assert InspectionReport.query.count() == 0
+
+
+def test_batch_update_reports_failures(app, make_user, make_report, user):
+    app.config['REPORT_BATCH_CHUNK_SIZE'] = 2
+    other = make_user('other')
+    make_report('OWN1', registrant_id=user.id)
+    make_report('OWN2', registrant_id=user.id)
+    make_report('OTHER', registrant_id=other.id)
+    make_report('DELETED', registrant_id=user.id, is_deleted=True)
+    reports_data = [
+        {'report_code': 'OWN1', 'project_name': '修改后的工程'},
+        {'project_name': '没有编号'},
+        {'report_code': 'MISSING', 'project_name': 'x'},
+        {'report_code': 'DELETED', 'project_name': 'x'},
+        {'report_code': 'OTHER', 'project_name': 'x'},
+        {'report_code': 'OWN2', 'client_unit': ''},
+        {'report_code': 'OWN2', 'sampling_date': 'not-a-date'},
+        {'report_code': ' OWN2 ', 'sampling_date': '2024/03/04', 'unknown_field': 'ignored'},
+        {'report_code': 'OWN1', 'remarks': '同一报告的第二次修改'},
+    ]
+
+    # 用户没有inspection_report:edit:all权限，只能修改自己登记的报告
+    result = ReportService.batch_update_reports(reports_data, user.id)
+
+    assert result['success'] is True
+    data = result['data']
+    assert (data['total_count'], data['success_count'], data['failed_count']) == (9, 3, 6)
+    assert data['updated_report_codes'] == ['OWN1', 'OWN2', 'OWN1']
+    messages = [failed['message'] for failed in data['failed_reports']]
+    assert messages[0] == '缺少report_code字段'
+    assert messages[1] == '未找到报告编号为MISSING的报告或报告已被删除'
+    assert messages[2] == '未找到报告编号为DELETED的报告或报告已被删除'
+    assert messages[3] == '无权限修改报告编号为OTHER的报告，该报告不属于您'
+    assert messages[4].startswith('缺少必填字段') and 'client_unit' in messages[4]
+    assert messages[5].startswith('sampling_date日期格式不正确')
+
+    db_reports = {report.report_code: report for report in InspectionReport.query.all()}
+    # 同一报告的多次修改合并写入
+    assert db_reports['OWN1'].project_name == '修改后的工程'
+    assert db_reports['OWN1'].remarks == '同一报告的第二次修改'
+    assert db_reports['OWN1'].last_modified_by_id == user.id
+    assert str(db_reports['OWN2'].sampling_date) == '2024-03-04'
+    assert db_reports['OWN2'].client_unit == '测试单位'
+    assert db_reports['OTHER'].project_name == '测试工程'
+    assert db_reports['DELETED'].project_name == '测试工程'
+
+
+@pytest.mark.parametrize('scope', ['all', 'own'])
+def test_batch_soft_delete_results(app, make_user, make_report, user, scope):
+    app.config['REPORT_BATCH_CHUNK_SIZE'] = 2
+    other = make_user('other')
+    make_report('OWN1', registrant_id=user.id)
+    make_report('OWN2', registrant_id=user.id)
+    make_report('OTHER', registrant_id=other.id)
+    make_report('DELETED', registrant_id=user.id, is_deleted=True)
+    report_codes = ['OWN1', 'MISSING', 'DELETED', 'OTHER', 'OWN1', 123, 'OWN2', 'OTHER', 'DELETED']
+
+    result = ReportService.batch_soft_delete_reports(report_codes, user.id, scope)
+
+    other_status = 'not_owned' if scope == 'own' else 'deleted'
+    assert result['success'] is True
+    assert [(item['report_code'], item['status']) for item in result['data']['results']] == [
+        ('OWN1', 'deleted'),
+        ('MISSING', 'not_found'),
+        ('DELETED', 'already_deleted'),
+        ('OTHER', other_status),
+        ('OWN1', 'duplicate'),
+        (123, 'not_found'),
+        ('OWN2', 'deleted'),
+        ('OTHER', 'duplicate'),
+        ('DELETED', 'duplicate'),
+    ]
+    deleted_count = 3 if scope == 'all' else 2
+    assert result['data']['success_count'] == deleted_count
+    assert result['data']['failed_count'] == len(report_codes) - deleted_count
+    assert [item['report_code'] for item in result['data']['failed_reports']] == [
+        code for code, status in zip(report_codes, [item['status'] for item in result['data']['results']])
+        if status != 'deleted'
+    ]
+
+    deleted = {report.report_code for report in InspectionReport.query.filter_by(is_deleted=True)}
+    assert deleted == {'OWN1', 'OWN2', 'DELETED'} | ({'OTHER'} if scope == 'all' else set())
+
+
+def test_batch_soft_delete_repeated_code_not_owned(make_user, make_report, user):
+    other = make_user('other')
+    make_report('R1', registrant_id=other.id)
+
+    result = ReportService.batch_soft_delete_reports(['R1', 'R1'], user.id, 'own')
+
+    assert [item['status'] for item in result['data']['results']] == ['not_owned', 'duplicate']
+    assert result['data']['success_count'] == 0
+    assert InspectionReport.query.filter_by(report_code='R1').one().is_deleted is False
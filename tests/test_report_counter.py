@@ -0,0 +1,76 @@
+"""报告计数服务测试"""
+import pytest
+from app import create_app
+from app.services.report.report_counter import ReportCounterService
+from app.services.report.report_service import ReportService
+from app.utils.token_blocklist import TokenBlocklistStore
+
+
+@pytest.fixture
+def counters(app, monkeypatch):
+    """未加载计数的计数服务"""
+    monkeypatch.setattr(ReportCounterService, '_counters', {})
+    monkeypatch.setattr(ReportCounterService, '_loaded', False)
+    return ReportCounterService
+
+
+def test_load_and_incremental_updates(counters, make_user, make_report):
+    user = make_user('registrant')
+    make_report('R1', registrant_id=user.id, report_status='待审核')
+    make_report('R2', registrant_id=user.id, report_status='已完成')
+    make_report('R3', is_deleted=True)
+
+    summary = counters.get_summary()
+    assert (summary['total'], summary['active']) == (3, 2)
+    assert summary['by_registrant'] == {str(user.id): 2}
+    assert summary['by_status'] == {'待审核': 1, '已完成': 1}
+
+    ReportService.batch_soft_delete_reports(['R1'])
+    summary = counters.get_summary()
+    assert (summary['total'], summary['active']) == (3, 1)
+    assert summary['by_status'] == {'已完成': 1}
+    # 增量结果与重新从数据库统计一致
+    assert counters.reconcile() == {}
+
+
+def test_reconcile_reports_and_fixes_drift(counters, make_report):
+    make_report('R1')
+    counters.get_counters()
+    counters._apply({'total': 5, 'active': 5})
+
+    drift = counters.reconcile()
+
+    assert drift == {'total': (6, 1), 'active': (6, 1)}
+    assert (counters.get_total_count(), counters.get_active_count()) == (1, 1)
+
+
+def test_reconcile_keeps_increments_during_load(counters, make_report, monkeypatch):
+    make_report('R1')
+    counters.get_counters()
+    load_from_db = ReportCounterService._load_from_db
+
+    def load_with_concurrent_create():
+        counters_in_db = load_from_db()
+        # 统计完成后、合并之前，其他请求创建了一个报告
+        make_report('R2')
+        counters.on_created(counters.snapshot_mappings([{'is_deleted': False, 'report_status': None}]))
+        return counters_in_db
+
+    monkeypatch.setattr(ReportCounterService, '_load_from_db', staticmethod(load_with_concurrent_create))
+    counters.reconcile()
+
+    assert counters.get_total_count() == 2
+
+
+def test_reconcile_job_starts_on_first_request(tmp_path, monkeypatch):
+    started = []
+    monkeypatch.setattr(ReportCounterService, 'start_reconcile_job', staticmethod(started.append))
+    monkeypatch.setattr(TokenBlocklistStore, 'start_listener', staticmethod(lambda app: None))
+    monkeypatch.setattr(TokenBlocklistStore, 'start_purge_job', staticmethod(lambda app: None))
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    # flask命令、迁移和脚本只创建应用，不启动校准任务
+    assert started == []
+
+    app.test_client().get('/metrics')
+    assert started == [app]
@@ -0,0 +1,71 @@
+"""报告游标分页测试"""
+from datetime import datetime
+import pytest
+from app.models.report.inspection_report import InspectionReport
+from app.services.report.report_service import ReportService
+
+
+@pytest.fixture
+def reports(make_report):
+    same_time = datetime(2024, 1, 1, 8, 0, 0)
+    for index in range(7):
+        # 前4个报告创建时间相同，翻页需要按id区分
+        created_at = same_time if index < 4 else datetime(2024, 1, 2, 8, 0, index)
+        make_report(f'R{index}', created_at=created_at)
+    make_report('DELETED', is_deleted=True)
+
+
+def collect_pages(per_page, **kwargs):
+    pages = []
+    cursor = None
+    while True:
+        result = ReportService.get_reports_by_cursor(cursor, per_page, **kwargs)
+        pages.append(result)
+        cursor = result['pagination']['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_all_reports_once(reports):
+    pages = collect_pages(3)
+    codes = [report['report_code'] for page in pages for report in page['reports']]
+    assert codes == ['R6', 'R5', 'R4', 'R3', 'R2', 'R1', 'R0']
+    assert [page['pagination']['has_more'] for page in pages] == [True, True, False]
+
+
+def test_cursor_exact_page_boundary(reports):
+    pages = collect_pages(7)
+    assert len(pages) == 1
+    assert len(pages[0]['reports']) == 7
+    assert pages[0]['pagination']['has_more'] is False
+
+
+def test_cursor_with_total_and_fields(reports):
+    result = ReportService.get_reports_by_cursor(None, 2, with_total=True, fields=('report_code',))
+    assert result['pagination']['total_items'] == 7
+    assert result['reports'] == [{'report_code': 'R6'}, {'report_code': 'R5'}]
+
+
+def test_invalid_cursor(reports):
+    with pytest.raises(ValueError):
+        ReportService.get_reports_by_cursor('not-a-cursor', 3)
+
+
+@pytest.mark.parametrize('per_page', [0, -5])
+def test_cursor_per_page_at_least_one(reports, per_page):
+    result = ReportService.get_reports_by_cursor(None, per_page)
+    assert [report['report_code'] for report in result['reports']] == ['R6']
+    assert result['pagination']['per_page'] == 1
+    assert result['pagination']['has_more'] is True
+
+
+def test_cursor_pages_through_null_created_at(reports, db):
+    for code in ('R1', 'R2'):
+        report = InspectionReport.query.filter_by(report_code=code).one()
+        report.created_at = None
+    db.session.commit()
+
+    pages = collect_pages(2)
+    codes = [report['report_code'] for page in pages for report in page['reports']]
+    # 倒序排列时created_at为NULL的记录排在最后
+    assert codes == ['R6', 'R5', 'R4', 'R3', 'R0', 'R2', 'R1']
@@ -0,0 +1,46 @@
+"""报告流式导出测试"""
+import json
+from datetime import datetime
+from sqlalchemy import event
+from app.services.report.report_export import ReportExportService
+from app.utils.user_utils import nickname_cache
+
+
+def test_export_multiple_chunks_with_cold_nickname_cache(app, db, make_user, make_report):
+    app.config['REPORT_EXPORT_CHUNK_SIZE'] = 3
+    same_time = datetime(2024, 1, 1, 8, 0, 0)
+    for index in range(8):
+        # 每个报告使用不同的登记人，每一批都需要查询昵称；部分报告创建时间相同，验证按id区分
+        user = make_user(f'user{index}', nickname=f'昵称{index}')
+        created_at = same_time if index < 4 else datetime(2024, 1, 2, 8, 0, index)
+        make_report(f'R{index}', registrant_id=user.id, created_at=created_at)
+    nickname_cache.clear()
+
+    streamed = []
+
+    @event.listens_for(db.engine, 'before_cursor_execute')
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        streamed.append(bool(context.execution_options.get('stream_results')))
+
+    try:
+        content = b''.join(ReportExportService.export('ndjson'))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+
+    rows = [json.loads(line) for line in content.decode('utf-8').splitlines()]
+    assert len(rows) == 8
+    assert sorted(row['report_code'] for row in rows) == [f'R{index}' for index in range(8)]
+    assert all(row['registrant'] == f"昵称{row['report_code'][1:]}" for row in rows)
+    # 不使用服务端游标，读取过程中可以在同一连接上执行昵称查询
+    assert not any(streamed)
+
+
+def test_export_csv_row_count(app, make_report):
+    app.config['REPORT_EXPORT_CHUNK_SIZE'] = 2
+    for index in range(5):
+        make_report(f'C{index}')
+    make_report('DELETED', is_deleted=True)
+
+    lines = b''.join(ReportExportService.export('csv')).decode('utf-8-sig').splitlines()
+    # 表头 + 5条未删除的报告
+    assert len(lines) == 6
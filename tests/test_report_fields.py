@@ -0,0 +1,76 @@
+"""报告列表字段投影（fields参数）测试"""
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import inspect
+from app.models.report.inspection_report import InspectionReport
+from app.models.user.permission import Permission
+from app.services.report.report_service import ReportService
+
+SUMMARY = InspectionReport.FIELD_PRESETS['summary']
+
+
+def test_parse_fields():
+    assert InspectionReport.parse_fields('') is None
+    assert InspectionReport.parse_fields('full') is None
+    assert InspectionReport.parse_fields('summary') == SUMMARY
+    # 预设与字段名混用时去重，并保持参数顺序
+    assert InspectionReport.parse_fields(' remarks , summary,id') == ('remarks',) + SUMMARY
+
+
+def test_parse_unknown_fields():
+    with pytest.raises(ValueError, match='未知的字段: password, secret'):
+        InspectionReport.parse_fields('report_code,password,secret')
+
+
+def test_load_only_computed_field(make_user, make_report, db):
+    user = make_user('registrant', nickname='登记人')
+    make_report('R1', registrant_id=user.id, remarks='备注')
+    db.session.expunge_all()
+
+    fields = InspectionReport.parse_fields('report_code,registrant')
+    report = InspectionReport.query.options(InspectionReport.load_only_option(fields)).one()
+
+    unloaded = inspect(report).unloaded
+    # registrant由registrant_id计算，加载的是registrant_id列
+    assert 'registrant_id' not in unloaded
+    assert {'remarks', 'project_name', 'created_at'} <= unloaded
+    assert report.to_dict(fields=fields) == {'report_code': 'R1', 'registrant': '登记人'}
+
+
+def test_cursor_mode_loads_created_at(make_report, db):
+    for index in range(3):
+        make_report(f'R{index}')
+    db.session.expunge_all()
+
+    first = ReportService.get_reports_by_cursor(None, 2, fields=('report_code',))
+    assert first['reports'] == [{'report_code': 'R2'}, {'report_code': 'R1'}]
+    # 游标由(created_at, id)生成，即使未请求created_at也会加载
+    second = ReportService.get_reports_by_cursor(first['pagination']['next_cursor'], 2, fields=('report_code',))
+    assert second['reports'] == [{'report_code': 'R0'}]
+
+
+@pytest.fixture
+def auth_headers(app, db, make_user):
+    user = make_user('viewer')
+    user.permissions.append(Permission(
+        code='inspection_report:view:all', resource='inspection_report', action='view', scope='all'
+    ))
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+@pytest.mark.parametrize('url', ['/report/get-reports', '/report/get-all-reports'])
+def test_unknown_field_returns_400(client, auth_headers, url):
+    response = client.get(f'{url}?fields=report_code,bogus', headers=auth_headers)
+    assert response.status_code == 400
+    assert 'bogus' in response.get_json()['message']
+
+
+@pytest.mark.parametrize('query', ['fields=summary', 'fields=summary&pagination=cursor'])
+def test_summary_fields_in_response(client, auth_headers, make_report, query):
+    make_report('R1')
+    response = client.get(f'/report/get-reports?{query}', headers=auth_headers)
+
+    assert response.status_code == 200
+    reports = response.get_json()['data']['reports']
+    assert [list(report) for report in reports] == [list(SUMMARY)]
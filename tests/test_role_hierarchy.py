@@ -0,0 +1,63 @@
+"""角色层级闭包测试"""
+import pytest
+from app.models.user.role import Role
+from app.services.admin.staff_service import StaffService
+from app.services.permission_service import PermissionService, RoleHierarchy
+
+
+@pytest.fixture
+def roles(db):
+    """角色链: 1 <- 2 <- 3，角色4没有父角色"""
+    db.session.add_all([
+        Role(id=1, name='root'),
+        Role(id=2, name='middle', parent_id=1),
+        Role(id=3, name='leaf', parent_id=2),
+        Role(id=4, name='other'),
+    ])
+    db.session.commit()
+    PermissionService.invalidate_permission_cache()
+
+
+def test_ancestors(roles):
+    assert RoleHierarchy.ancestors(3) == (3, 2, 1)
+    assert RoleHierarchy.ancestors(4) == (4,)
+    assert RoleHierarchy.ancestors(99) == ()
+    assert RoleHierarchy.ancestors_of([3, 4]) == {1, 2, 3, 4}
+
+
+@pytest.mark.parametrize('role_id, parent_id', [(1, 1), (1, 2), (1, 3), (2, 3)])
+def test_check_parent_rejects_cycle(roles, role_id, parent_id):
+    with pytest.raises(ValueError, match='循环'):
+        RoleHierarchy.check_parent(role_id, parent_id)
+
+
+def test_check_parent_accepts_valid_parent(roles):
+    RoleHierarchy.check_parent(4, 3)
+    RoleHierarchy.check_parent(3, 1)
+    RoleHierarchy.check_parent(None, 3)
+    RoleHierarchy.check_parent(1, None)
+
+
+def test_check_parent_missing_parent(roles):
+    with pytest.raises(ValueError, match='不存在'):
+        RoleHierarchy.check_parent(1, 99)
+
+
+def test_set_role_parent_rejects_cycle_and_refreshes_closure(roles, db):
+    with pytest.raises(ValueError):
+        StaffService.set_role_parent(1, 3)
+    assert db.session.get(Role, 1).parent_id is None
+
+    StaffService.set_role_parent(4, 3)
+    # 修改后版本号递增，闭包重建
+    assert RoleHierarchy.ancestors(4) == (4, 3, 2, 1)
+
+
+def test_build_truncates_existing_cycle(roles, db):
+    # 历史数据中已存在的环: 1 -> 3 -> 2 -> 1
+    db.session.get(Role, 1).parent_id = 3
+    db.session.commit()
+    PermissionService.invalidate_permission_cache()
+
+    assert RoleHierarchy.ancestors(3) == (3, 2, 1)
+    assert RoleHierarchy.ancestors(1) == (1, 3, 2)
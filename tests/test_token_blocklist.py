@@ -0,0 +1,81 @@
+"""JWT令牌黑名单测试"""
+import time
+import pytest
+from app.models.token import TokenBlocklist
+from app.utils import token_blocklist
+from app.utils.bloom_filter import BloomFilter
+from app.utils.token_blocklist import TokenBlocklistStore
+
+
+class FakeRedis:
+    """记录写入和发布的Redis客户端"""
+
+    def __init__(self):
+        self.keys = {}
+        self.published = []
+
+    def pipeline(self):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.keys[key] = value
+
+    def publish(self, channel, message):
+        self.published.append(message)
+
+    def execute(self):
+        pass
+
+    def exists(self, key):
+        return int(key in self.keys)
+
+
+@pytest.fixture
+def store(app, monkeypatch):
+    """启用Redis、布隆过滤器已构建的黑名单存储"""
+    monkeypatch.setattr(TokenBlocklistStore, '_use_redis', True)
+    monkeypatch.setattr(TokenBlocklistStore, '_bloom', BloomFilter(1000, 0.001))
+    monkeypatch.setattr(TokenBlocklistStore, '_bloom_ready', True)
+    monkeypatch.setattr(TokenBlocklistStore, '_pending_publish', [])
+    return TokenBlocklistStore
+
+
+def use_redis(monkeypatch, client):
+    """client为None时模拟Redis不可用"""
+    monkeypatch.setattr(
+        token_blocklist, 'safe_redis',
+        lambda operation, default=None: default if client is None else operation(client)
+    )
+
+
+def test_revoke_publishes(store, monkeypatch):
+    client = FakeRedis()
+    use_redis(monkeypatch, client)
+
+    store.revoke('jti-1', int(time.time()) + 60)
+
+    assert client.published == ['jti-1']
+    assert store._bloom_ready is True
+    assert store.is_revoked('jti-1') is True
+    assert store.is_revoked('jti-2') is False
+
+
+def test_failed_publish_falls_back_to_database(store, db, monkeypatch):
+    use_redis(monkeypatch, None)
+
+    store.revoke('jti-1', int(time.time()) + 60)
+
+    # 发布失败后不再信任布隆过滤器，其他进程撤销（只写入了数据库）的令牌也能查到
+    assert store._bloom_ready is False
+    db.session.add(TokenBlocklist(jti='jti-other'))
+    db.session.commit()
+    assert store.is_revoked('jti-other') is True
+    assert store.is_revoked('jti-1') is True
+
+    # Redis恢复后重试发布，全部成功才恢复使用布隆过滤器
+    assert store._retry_pending() is False
+    client = FakeRedis()
+    use_redis(monkeypatch, client)
+    assert store._retry_pending() is True
+    assert client.published == ['jti-1']
+    assert store._pending_publish == []